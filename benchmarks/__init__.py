@@ -0,0 +1,32 @@
+"""Benchmarks of the folding searches.
+
+Run them from the root of the repository, e.g.
+`python -m benchmarks.server_throughput`.
+"""
+
+# benchmark proteins, with their optimal energy
+SEQUENCES = {
+    "S1": ("HPHPPHHPHPPHPHHPPHPH", -9),
+    "S2": ("HHPPHPPHPPHPPHPPHPPHPPHH", -9),
+    "S3": ("PPHPPHHPPPPHHPPPPHHPPPPHH", -8),
+    "S4": ("PPPHHPPHHPPPPPHHHHHHHPPHHPPPPHHPPHPP", -14),
+    "S5": ("PPHPPHHPPHHPPPPPHHHHHHHHHHPPPPPPPPHHPPHHHPPHHHHH", -23),
+    "S6": ("HHPHPHPHPHHHHPHPPPHPPPHPPPPHPPPHPPPHPHPHHHHHPHPHPHH", -21),
+    "S7": ("PPHHHPHHHHHHHHPPPHHHHHHHHHHPHPPPHHHHHHHHHHHHPPPPHHHHHHPHHPHP", -36),
+    "S8": ("HHHHHHHHHHHHPHPHPPHHPPHHPPHPPHHPPHHPPHPPHHPPHHPPHPHPHHHHHHHHHHHH", -42),
+    "S9": (
+        "HHHHPPPPHHHHHHHHHHHHPPPPPPHHHHHHHHHHHHPPPHHHHHHHHHHHHPPPHHHHHHHHHHHHPPPHPPHHPP"
+        "HHPPHPH",
+        -53,
+    ),
+    "S10": (
+        "PPPHHPPHHHHPPHHHPHHPHHPHHHHPPPPPPPPHHHHHHPPHHHHHHPPPPPPPPPHPHHPHHHHHHHHHHHPPHH"
+        "HPHHPHPPHPHHHPPPPPPHHH",
+        -50,
+    ),
+    "S11": (
+        "PPPPPPHPHHPPPPPHHHPHHHHHPHHPPPPHHPPHHPHHHHHPHHHHHHHHHHPHHPHHHHHHHPPPPPPPPPPPHH"
+        "HHHHHPPHPHHHPPPPPPHPHH",
+        -48,
+    ),
+}
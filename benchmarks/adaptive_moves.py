@@ -0,0 +1,86 @@
+"""Effective accepted movements per second with adaptive proposals.
+
+Compares the default MC proposals, every valid movement of a random residue
+being equally likely, with the adaptive proposals whose movement type
+weights are learned during a burn-in. Both searches start from the same
+conformation, equilibrated at the temperature of the search, and count the
+accepted movements after the burn-in.
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.proposal import AdaptiveProposal
+
+
+class AcceptanceCounter:
+    """
+    Count the accepted steps of a search, recorded as a telemetry.
+    """
+
+    def __init__(self):
+        self.steps = 0
+        self.accepted = 0
+
+    def record(self, replica, temperature, energy, accepted):
+        self.steps += 1
+        self.accepted += accepted
+
+
+def accepted_per_second(lattice, n_steps, temperature, seed, proposal=None):
+    """
+    Return the acceptance rate and the accepted movements per second of a search.
+    """
+    np.random.seed(seed)
+    counter = AcceptanceCounter()
+    start = time.perf_counter()
+    MCsearch(n_steps, temperature, lattice, telemetry=counter, proposal=proposal)
+    elapsed = time.perf_counter() - start
+    return counter.accepted / counter.steps, counter.accepted / elapsed
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--sequences", nargs="+", default=["S1", "S4", "S8"],
+                        choices=list(SEQUENCES), help="benchmark proteins to fold")
+    parser.add_argument("-n", "--n-steps", type=int, default=3000,
+                        help="number of MC steps of each measure")
+    parser.add_argument("-b", "--burn-in", type=int, default=1000,
+                        help="number of steps to learn the weights")
+    parser.add_argument("-t", "--temperatures", type=float, nargs="+",
+                        default=[160.0, 220.0], help="temperatures of the searches")
+    args = parser.parse_args(args)
+
+    print(f"{'protein':>7} {'T':>6} {'proposals':>9} {'acceptance':>10} "
+          f"{'accepted/s':>10}  weights")
+    for name in args.sequences:
+        for temperature in args.temperatures:
+            np.random.seed(0)
+            lattice = MCsearch(
+                args.n_steps, temperature, Lattice(Protein(SEQUENCES[name][0]))
+            )
+
+            rate, speed = accepted_per_second(lattice, args.n_steps, temperature, 1)
+            print(f"{name:>7} {temperature:>6.0f} {'uniform':>9} {rate:>10.3f} "
+                  f"{speed:>10.1f}")
+
+            proposal = AdaptiveProposal(args.burn_in)
+            np.random.seed(2)
+            MCsearch(args.burn_in, temperature, lattice, proposal=proposal)
+            rate, speed = accepted_per_second(
+                lattice, args.n_steps, temperature, 1, proposal
+            )
+            weights = " ".join(f"{w:.2f}" for w in proposal.weights.values())
+            print(f"{name:>7} {temperature:>6.0f} {'adaptive':>9} {rate:>10.3f} "
+                  f"{speed:>10.1f}  {weights}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,109 @@
+"""Simulated annealing schedules against fixed-temperature MC and REMC.
+
+For each protein and seed, runs an MC search at a fixed temperature, an
+annealing MC search with each cooling schedule, all with the same number of
+steps, and a REMC search with 5 replicas performing as many steps each, i.e.
+5 times the work. Reports the mean and lowest final energies and the mean
+CPU time of each search, e.g.
+
+    python -m benchmarks.annealing -s S1 S2 S3 -r 10 -n 5000
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.runner import build_lattice, make_schedule
+from src.MCsearch import MCsearch
+from src.REMCsearch import REMCsearch
+from src.schedules import SCHEDULES
+
+
+def _run(task):
+    """
+    Run one seeded search.
+
+    Parameters
+    ----------
+    task : tuple
+        Name of the protein, name of the search, number of steps, starting
+        temperature, final temperature and random seed.
+
+    Returns
+    -------
+    tuple
+        Name of the protein, name of the search, final energy and CPU time.
+    """
+    name, search, n_steps, temperature, temperature_end, seed = task
+    np.random.seed(seed)
+    sequence, _ = SEQUENCES[name]
+    lattice = build_lattice(sequence, "linear")
+
+    start = time.process_time()
+    if search == "MC":
+        lattice = MCsearch(n_steps, temperature, lattice)
+    elif search == "REMC":
+        local_steps = 100
+        lattice = REMCsearch(
+            5, -float("inf"), n_steps // local_steps, local_steps, 160.0, 220.0, lattice
+        )
+    else:
+        params = {
+            "n_steps": n_steps,
+            "temperature": temperature,
+            "schedule": search,
+            "temperature_end": temperature_end,
+            "stagnation": n_steps // 5,
+            "reheat_factor": 2.0,
+        }
+        schedule = make_schedule(params)
+        lattice = MCsearch(**params, lattice_input=lattice, schedule=schedule)
+    return name, search, lattice.calculate_energy(), time.process_time() - start
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=["S1", "S2", "S3"],
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-r", "--n-runs", type=int, default=10,
+                        help="number of seeded runs per protein and search")
+    parser.add_argument("-n", "--n-steps", type=int, default=5000,
+                        help="number of steps of the MC searches")
+    parser.add_argument("-t", "--temperature", type=float, default=400.0,
+                        help="temperature of the MC search, starting one of the annealing")
+    parser.add_argument("-tend", "--temperature-end", type=float, default=50.0,
+                        help="final temperature of the annealing")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    args = parser.parse_args(args)
+
+    searches = ["MC", *SCHEDULES, "REMC"]
+    tasks = [
+        (name, search, args.n_steps, args.temperature, args.temperature_end, seed)
+        for name in args.sequences
+        for search in searches
+        for seed in range(args.n_runs)
+    ]
+    results = {}
+    with multiprocessing.Pool(args.n_workers) as pool:
+        for name, search, energy, cpu in pool.imap_unordered(_run, tasks):
+            results.setdefault((name, search), []).append((energy, cpu))
+
+    print(f"{'protein':>7} {'search':>14} {'mean E':>7} {'min E':>6} {'CPU (s)':>8}")
+    for name in args.sequences:
+        for search in searches:
+            energies, cpus = zip(*results[(name, search)])
+            print(
+                f"{name:>7} {search:>14} {np.mean(energies):>7.2f} "
+                f"{min(energies):>6} {np.mean(cpus):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
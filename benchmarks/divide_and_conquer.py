@@ -0,0 +1,115 @@
+"""Divide-and-conquer folding against plain REMC at equal CPU time.
+
+For each protein and seed, runs the DC search with the given options, then
+a plain REMC search from a linear lattice, with the same replicas and
+temperatures, stopped once it has used the CPU time of the DC search
+(summed over its worker processes). Reports the energy of each DC stage,
+its timings and the energy of the REMC search, e.g.
+
+    python -m benchmarks.divide_and_conquer --sequences S9 S10 --runs 3 DC -s 30 -o 6 -g 20 -r 40
+
+Proteins longer than the benchmark ones can be generated with --length.
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.parser import parse_args
+from src.runner import build_lattice, split_args
+from src.DCsearch import DCsearch
+from src.REMCsearch import REMCsearch
+
+
+def compare(sequence, dc_args, seed):
+    """
+    Run the DC search and plain REMC search at equal CPU time.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    dc_args : list
+        DC sub-command and its options.
+    seed : int
+        Random seed of both searches.
+
+    Returns
+    -------
+    dict
+        Stages of the DC search, and energy and CPU time of the REMC search.
+    """
+    _, params = split_args(parse_args(["-p", sequence] + dc_args))
+
+    np.random.seed(seed)
+    lattice, stages = DCsearch(**params, lattice_input=build_lattice(sequence, "linear"))
+    budget = sum(stage["cpu"] for stage in stages.values())
+
+    np.random.seed(seed)
+    start = time.process_time()
+
+    def callback(step, energy):
+        return time.process_time() - start < budget
+
+    remc = REMCsearch(
+        params["n_replica"],
+        -float("inf"),
+        sys.maxsize,
+        params["local_steps"],
+        params["temperature_min"],
+        params["temperature_max"],
+        build_lattice(sequence, "linear"),
+        callback=callback,
+    )
+    return {
+        "stages": stages,
+        "dc_energy": lattice.calculate_energy(),
+        "remc_energy": remc.calculate_energy(),
+        "cpu": budget,
+        "remc_cpu": time.process_time() - start,
+    }
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sequences", nargs="+", default=["S9", "S10", "S11"],
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("--length", type=int, nargs="*", default=[],
+                        help="lengths of random HP sequences to run as well")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="number of seeded runs per protein")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first run, the next runs use the following ones")
+    parser.add_argument("dc_args", nargs=argparse.REMAINDER,
+                        help="DC sub-command and its options")
+    args = parser.parse_args(args)
+    if not args.dc_args or args.dc_args[0] != "DC":
+        parser.error("the DC sub-command is required, e.g. DC -s 30 -o 6")
+
+    proteins = {name: SEQUENCES[name][0] for name in args.sequences}
+    generator = np.random.default_rng(args.seed)
+    for length in args.length:
+        proteins[f"R{length}"] = "".join(generator.choice(["H", "P"], length))
+
+    for name, sequence in proteins.items():
+        for run in range(args.runs):
+            result = compare(sequence, args.dc_args, args.seed + run)
+            stages = ", ".join(
+                f"{stage} {report.get('energy', report.get('energies'))} "
+                f"({report['wall']:.1f} s)"
+                for stage, report in result["stages"].items()
+            )
+            print(
+                f"{name:>5} seed {args.seed + run}: DC {result['dc_energy']} [{stages}], "
+                f"REMC {result['remc_energy']} in {result['remc_cpu']:.1f} "
+                f"of {result['cpu']:.1f} s CPU"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,92 @@
+"""Cost of the energy evaluations of the table-driven energy models.
+
+Times `Lattice.calculate_energy` on random compact conformations of the
+benchmark proteins with the HP model, against the former evaluation by
+string comparisons of the residue types over the neighbors of the 2-D grid,
+each one bounds checked, and with the HPNX model on the same conformations,
+where the polar residues alternate between positive, negative and neutral
+ones, e.g.
+
+    python -m benchmarks.energy_model -s S1 S5 S10 -c 2000
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from benchmarks.lattice_neighbors import checked_occupied_neighbors
+from src.energy import HPNX
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+
+
+def string_energy(lattice):
+    """
+    HP energy of a lattice as formerly computed, by string comparisons of
+    the residue types over the bounds-checked neighbors of the 2-D grid.
+    """
+    energy = 0
+    for residue in lattice.protein.get_H_residues():
+        for neighbor in checked_occupied_neighbors(lattice, residue.get_coords()):
+            if not residue.is_consecutive(neighbor) and neighbor.typeHP == "H":
+                energy -= 1
+    return int(energy / 2)
+
+
+def time_per_call(function, lattices, n_calls):
+    """
+    Return the mean time of a call of an energy function, in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(n_calls // len(lattices)):
+        for lattice in lattices:
+            function(lattice)
+    return (time.perf_counter() - start) / n_calls * 1e6
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=["S1", "S5", "S10"],
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-c", "--n-calls", type=int, default=2000,
+                        help="number of energy evaluations per protein and method")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(args)
+
+    np.random.seed(args.seed)
+    print(f"{'protein':>7} {'string (us)':>12} {'HP (us)':>8} {'HPNX (us)':>10} {'speedup':>8}")
+    for name in args.sequences:
+        sequence = SEQUENCES[name][0]
+        # compact conformations, from short searches at low temperature
+        lattices = [
+            MCsearch(5 * len(sequence), 160.0, Lattice(Protein(sequence), "random"))
+            for _ in range(10)
+        ]
+        for lattice in lattices:
+            assert lattice.calculate_energy() == string_energy(lattice)
+        hpnx_sequence = "".join(
+            r if r == "H" else "PNX"[i % 3] for i, r in enumerate(sequence)
+        )
+        hpnx_lattices = []
+        for lattice in lattices:
+            hpnx = Lattice(Protein(hpnx_sequence, HPNX))
+            hpnx.set_conformation(lattice.get_conformation())
+            hpnx_lattices.append(hpnx)
+
+        string = time_per_call(string_energy, lattices, args.n_calls)
+        table = time_per_call(Lattice.calculate_energy, lattices, args.n_calls)
+        hpnx = time_per_call(Lattice.calculate_energy, hpnx_lattices, args.n_calls)
+        print(
+            f"{name:>7} {string:>12.1f} {table:>8.1f} {hpnx:>10.1f} "
+            f"{string / table:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,47 @@
+"""Ground truth of the benchmark proteins from the exact solver.
+
+Solves the benchmark proteins up to a given length by branch and bound,
+checks their optimal energies against the ones of `SEQUENCES` and reports
+the time and number of nodes of each solve, e.g.
+
+    python -m benchmarks.exact_solver --max-length 25 -w 4
+"""
+
+import sys
+import time
+import argparse
+
+from benchmarks import SEQUENCES
+from src.exact import ground_states, contact_bounds
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--max-length", type=int, default=25,
+                        help="longest benchmark protein to solve")
+    parser.add_argument("-c", "--max-conformations", type=int, default=1,
+                        help="number of ground-state conformations to find")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    args = parser.parse_args(args)
+
+    for name, (sequence, target) in SEQUENCES.items():
+        if len(sequence) > args.max_length:
+            continue
+        start = time.perf_counter()
+        energy, conformations, nodes = ground_states(
+            sequence, args.n_workers, args.max_conformations
+        )
+        elapsed = time.perf_counter() - start
+        status = "ok" if energy == target else f"MISMATCH (expected {target})"
+        print(
+            f"{name:>4} ({len(sequence)} residues): energy {energy} {status}, "
+            f"bound {-contact_bounds(sequence)[1]}, {len(conformations)} conformations, "
+            f"{nodes} nodes in {elapsed:.1f} s"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,148 @@
+"""Cost per call of the neighbor lookups of the lattice.
+
+Times the neighbor lookups, the energy and the validity check of
+`Lattice`, on the flat cells with their border ring, against the former
+lookups on the 2-D grid with a bounds check per neighbor, on random
+conformations of the benchmark proteins. Each time is the best of five
+repeats, e.g.
+
+    python -m benchmarks.lattice_neighbors -s S1 S5 S10 -c 20000
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import EMPTY, Lattice
+
+
+def checked_neighbors(lattice, coords):
+    """
+    Neighbors of a cell of the 2-D grid, with a bounds check per neighbor.
+    """
+    neighbors = []
+    if coords[0] > 0:
+        neighbors.append((coords[0] - 1, coords[1]))
+    if coords[0] < lattice.size - 1:
+        neighbors.append((coords[0] + 1, coords[1]))
+    if coords[1] > 0:
+        neighbors.append((coords[0], coords[1] - 1))
+    if coords[1] < lattice.size - 1:
+        neighbors.append((coords[0], coords[1] + 1))
+    return neighbors
+
+
+def checked_is_empty(lattice, coords):
+    if not (0 <= coords[0] < lattice.size and 0 <= coords[1] < lattice.size):
+        return False
+    return lattice.grid[coords] == EMPTY
+
+
+def checked_empty_neighbors(lattice, coords):
+    return [n for n in checked_neighbors(lattice, coords) if checked_is_empty(lattice, n)]
+
+
+def checked_occupied_neighbors(lattice, coords):
+    residues = lattice.protein.residues
+    return [
+        residues[lattice.grid[n]]
+        for n in checked_neighbors(lattice, coords)
+        if not checked_is_empty(lattice, n)
+    ]
+
+
+def checked_energy(lattice):
+    """
+    Energy of a lattice read from the 2-D grid, wrapping around its borders.
+    """
+    sequence = lattice.protein.hp_sequence
+    codes = sequence.codes
+    table = sequence.model.table
+    residues = lattice.protein.residues
+    grid = lattice.grid
+    last = lattice.size - 1
+    energy = 0
+    for index in sequence.interacting:
+        residue = residues[index]
+        i = residue.coordI
+        j = residue.coordJ
+        row = table[codes[index]]
+        for neighbor in (
+            grid.item(i - 1, j),
+            grid.item(i - last, j),
+            grid.item(i, j - 1),
+            grid.item(i, j - last),
+        ):
+            if neighbor > index + 1:
+                energy += row[codes[neighbor]]
+    return energy
+
+
+def checked_is_valid(lattice):
+    residues = lattice.protein.residues
+    for index, res in enumerate(residues[1:]):
+        if res not in checked_occupied_neighbors(lattice, residues[index].get_coords()):
+            return False
+    return True
+
+
+def time_per_call(function, arguments, n_calls, n_repeats=5):
+    """
+    Return the mean time of a call of a function over its arguments, in
+    nanoseconds, the best of several repeats.
+    """
+    n_rounds = max(n_calls // len(arguments), 1)
+    best = float("inf")
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        for _ in range(n_rounds):
+            for argument in arguments:
+                function(*argument)
+        best = min(best, time.perf_counter() - start)
+    return best / (n_rounds * len(arguments)) * 1e9
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=["S1", "S5", "S10"],
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-c", "--n-calls", type=int, default=20000,
+                        help="number of calls per protein and lookup")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(args)
+
+    np.random.seed(args.seed)
+    print(f"{'protein':>7} {'lookup':>18} {'checked (ns)':>13} {'flat (ns)':>10} {'speedup':>8}")
+    for name in args.sequences:
+        lattice = Lattice(Protein(SEQUENCES[name][0]), "random")
+        cells = [(residue.get_coords(),) for residue in lattice.protein.residues]
+        lookups = (
+            ("neighbors", checked_neighbors, lattice.neighbors, cells),
+            ("empty_neighbors", checked_empty_neighbors, lattice.empty_neighbors, cells),
+            ("occupied_neighbors", checked_occupied_neighbors, lattice.occupied_neighbors, cells),
+            ("calculate_energy", checked_energy, Lattice.calculate_energy, [(lattice,)]),
+            ("is_valid", checked_is_valid, Lattice.is_valid, [(lattice,)]),
+        )
+        for lookup, checked, flat, arguments in lookups:
+            # the former lookups take the lattice first
+            checked_arguments = [
+                argument if argument == (lattice,) else (lattice, *argument)
+                for argument in arguments
+            ]
+            n_calls = args.n_calls if len(arguments) > 1 else args.n_calls // 20
+            checked_time = time_per_call(checked, checked_arguments, n_calls)
+            flat_time = time_per_call(flat, arguments, n_calls)
+            print(
+                f"{name:>7} {lookup:>18} {checked_time:>13.0f} {flat_time:>10.0f} "
+                f"{checked_time / flat_time:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
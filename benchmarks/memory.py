@@ -0,0 +1,101 @@
+"""Memory footprint of lattice snapshots.
+
+Measures the bytes allocated by `copy.deepcopy` of a lattice, as done by
+the searches and by every `Movement`, for proteins of increasing length.
+The same conformation is also copied in the former layout, where every
+residue had its own attribute dictionary, the protein its own sequence
+string, and the grid was an object array of references to the residues,
+which gives the reduction of the shared, slotted layout.
+"""
+
+import sys
+import copy
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice
+
+
+class FormerResidue:
+    """
+    Residue of the former layout, with an attribute dictionary.
+    """
+
+    def __init__(self, index, typeHP, coords):
+        self.index = index
+        self.typeHP = typeHP
+        self.coordI, self.coordJ = coords
+
+
+class FormerProtein:
+    """
+    Protein of the former layout, owning its sequence.
+    """
+
+    def __init__(self, sequence, residues):
+        self.length = len(sequence)
+        self.sequence = sequence
+        self.residues = residues
+
+
+class FormerLattice:
+    """
+    Lattice of the former layout, a grid of references to the residues.
+    """
+
+    def __init__(self, lattice):
+        sequence = lattice.protein.sequence
+        residues = [
+            FormerResidue(residue.index, residue.typeHP, residue.get_coords())
+            for residue in lattice.protein.residues
+        ]
+        self.size = lattice.size
+        self.grid = np.ndarray(shape=(self.size, self.size), dtype=FormerResidue)
+        for residue in residues:
+            self.grid[residue.coordI, residue.coordJ] = residue
+        self.protein = FormerProtein(sequence, residues)
+
+    def __deepcopy__(self, memo):
+        cls = self.__class__
+        result = cls.__new__(cls)
+        memo[id(self)] = result
+        for key, value in self.__dict__.items():
+            setattr(result, key, copy.deepcopy(value, memo))
+        return result
+
+
+def snapshot_bytes(lattice, n_copies):
+    """
+    Return the average number of bytes allocated by a deep copy of a lattice.
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    copies = [copy.deepcopy(lattice) for _ in range(n_copies)]
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del copies
+    return allocated / n_copies
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-l", "--lengths", type=int, nargs="+",
+                        default=[20, 50, 100, 200], help="lengths of the proteins")
+    parser.add_argument("-c", "--n-copies", type=int, default=100,
+                        help="number of copies to average over")
+    args = parser.parse_args(args)
+
+    print(f"{'length':>6} {'former bytes':>13} {'bytes/snapshot':>15} {'reduction':>10}")
+    for length in args.lengths:
+        sequence = ("HP" * length)[:length]
+        lattice = Lattice(Protein(sequence))
+        former = snapshot_bytes(FormerLattice(lattice), args.n_copies)
+        current = snapshot_bytes(lattice, args.n_copies)
+        print(f"{length:>6} {former:>13.0f} {current:>15.0f} {former / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,131 @@
+"""Decorrelation time of the MC search with and without pivot movements.
+
+Runs MC searches on all-P chains of increasing lengths, where every valid
+movement is accepted, so that only the movement set drives the dynamics.
+The squared end-to-end distance is sampled after every sweep (one step per
+residue) and its integrated autocorrelation time, in sweeps, is estimated
+with Sokal's automatic windowing, e.g.
+
+    python -m benchmarks.pivot_decorrelation -L 16 32 64 -s 400 -v 0 0.1 0.5
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+
+
+def autocorrelation_time(series, window=5):
+    """
+    Integrated autocorrelation time of a series, with automatic windowing.
+
+    Parameters
+    ----------
+    series : array-like
+        Samples of the observable.
+    window : float
+        The sum of the autocorrelation function stops at `window` times the
+        current estimate of the autocorrelation time.
+
+    Returns
+    -------
+    Integrated autocorrelation time, in samples, inf if the series is
+    too short to estimate it.
+    """
+    series = np.asarray(series, dtype=float)
+    series = series - series.mean()
+    n = len(series)
+    variance = series.var()
+    if variance == 0:
+        return np.inf
+    tau = 1.0
+    for lag in range(1, n):
+        rho = np.dot(series[:-lag], series[lag:]) / ((n - lag) * variance)
+        tau += 2 * rho
+        if lag >= window * tau:
+            return tau
+    return np.inf
+
+
+def _run(task):
+    """
+    Sample the squared end-to-end distance of a chain after every sweep.
+
+    Parameters
+    ----------
+    task : tuple
+        Length of the chain, pivot probability, number of sweeps and seed.
+
+    Returns
+    -------
+    dict
+        Autocorrelation time in sweeps and wall time per sweep.
+    """
+    length, pivot_probability, n_sweeps, seed = task
+    np.random.seed(seed)
+    lattice = Lattice(Protein("P" * length))
+
+    distances = []
+    start = time.perf_counter()
+    for _ in range(n_sweeps):
+        lattice = MCsearch(length, 300.0, lattice, pivot_probability=pivot_probability)
+        first, last = lattice.protein.residues[0], lattice.protein.residues[-1]
+        distances.append(
+            (first.coordI - last.coordI) ** 2 + (first.coordJ - last.coordJ) ** 2
+        )
+    elapsed = time.perf_counter() - start
+
+    # leave the linear start out of the estimate
+    samples = distances[n_sweeps // 5:]
+    return {
+        "length": length,
+        "pivot_probability": pivot_probability,
+        "tau": autocorrelation_time(samples),
+        "sweep_time": elapsed / n_sweeps,
+        "mean_distance": float(np.mean(samples)),
+    }
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-L", "--lengths", type=int, nargs="+", default=[16, 32, 64],
+                        help="lengths of the chains")
+    parser.add_argument("-s", "--n-sweeps", type=int, default=400,
+                        help="number of sweeps of each run")
+    parser.add_argument("-v", "--pivot-probabilities", type=float, nargs="+",
+                        default=[0.0, 0.5], help="pivot probabilities to compare")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the runs")
+    args = parser.parse_args(args)
+
+    tasks = [
+        (length, probability, args.n_sweeps, args.seed + i)
+        for i, (length, probability) in enumerate(
+            (length, probability)
+            for length in args.lengths
+            for probability in args.pivot_probabilities
+        )
+    ]
+    with multiprocessing.Pool(args.n_workers) as pool:
+        results = pool.map(_run, tasks)
+
+    print(f"{'N':>5} {'pivot':>6} {'tau (sweeps)':>13} {'tau (s)':>9} {'<R2>':>8}")
+    for result in results:
+        print(
+            f"{result['length']:>5} {result['pivot_probability']:>6.2f} "
+            f"{result['tau']:>13.1f} {result['tau'] * result['sweep_time']:>9.2f} "
+            f"{result['mean_distance']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
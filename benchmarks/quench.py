@@ -0,0 +1,95 @@
+"""Cost and gain of the steepest-descent quench.
+
+Scores every movement of conformations from short MC searches of the
+benchmark proteins in one vectorized pass, against applying each movement
+to a copy of the lattice and computing its energy, then quenches the
+conformations and reports the energies before and after, e.g.
+
+    python -m benchmarks.quench -s S1 S5 S10 -c 10
+"""
+
+import sys
+import copy
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.quench import enumerate_movements, energy_changes, quench
+
+
+def copied_changes(lattice, movements):
+    """
+    Energy changes of movements, each applied to a copy of the lattice.
+    """
+    energy = lattice.calculate_energy()
+    changes = []
+    for movement in movements:
+        moved = copy.deepcopy(lattice)
+        residues = moved.protein.residues
+        for index, _ in movement:
+            moved.remove_residue(residues[index].get_coords())
+        for index, coords in movement:
+            moved.place_residue(residues[index], coords)
+        changes.append(moved.calculate_energy() - energy)
+    return np.array(changes)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=["S1", "S5", "S10"],
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-c", "--n-conformations", type=int, default=10,
+                        help="number of conformations per protein")
+    parser.add_argument("-n", "--n-steps", type=int, default=None,
+                        help="MC steps of each conformation, 5 per residue if None")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(args)
+
+    np.random.seed(args.seed)
+    print(
+        f"{'protein':>7} {'moves':>6} {'vector (ms)':>12} {'copies (ms)':>12} "
+        f"{'before':>7} {'after':>6} {'applied':>8} {'quench (ms)':>12}"
+    )
+    for name in args.sequences:
+        sequence = SEQUENCES[name][0]
+        n_steps = args.n_steps or 5 * len(sequence)
+        lattices = [
+            MCsearch(n_steps, 200.0, Lattice(Protein(sequence), "random"))
+            for _ in range(args.n_conformations)
+        ]
+        n_movements = vector = copies = quench_time = 0.0
+        before = after = applied = 0
+        for lattice in lattices:
+            movements = enumerate_movements(lattice)
+            start = time.perf_counter()
+            changes = energy_changes(lattice, movements)
+            vector += time.perf_counter() - start
+            start = time.perf_counter()
+            assert np.array_equal(changes, copied_changes(lattice, movements))
+            copies += time.perf_counter() - start
+
+            start = time.perf_counter()
+            quenched, n_moves = quench(lattice)
+            quench_time += time.perf_counter() - start
+            n_movements += len(movements)
+            before += lattice.calculate_energy()
+            after += quenched.calculate_energy()
+            applied += n_moves
+
+        n = len(lattices)
+        print(
+            f"{name:>7} {n_movements / n:>6.0f} {vector / n * 1e3:>12.2f} "
+            f"{copies / n * 1e3:>12.2f} {before / n:>7.1f} {after / n:>6.1f} "
+            f"{applied / n:>8.1f} {quench_time / n * 1e3:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
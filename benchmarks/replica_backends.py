@@ -0,0 +1,81 @@
+"""Wall time of the REMC search with the serial, threads and processes backends.
+
+For each protein and number of replicas, runs the same seeded REMC search
+with each executor backend and reports its wall time, its MC steps per
+second and its speedup over the serial backend. The replicas draw from
+their own random streams, so that the three backends reach the same final
+energy, e.g.
+
+    python -m benchmarks.replica_backends -s S1 S5 S10 -n 2 4 8 -m 20
+
+Threads only pay off when the steps release the global interpreter lock,
+i.e. on free-threaded builds of Python (the build is printed first).
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import Lattice
+from src.REMCsearch import REMCsearch
+from src.replicas import BACKENDS
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=list(SEQUENCES),
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-n", "--n-replica", nargs="+", type=int, default=[2, 4, 8],
+                        help="numbers of replicas to run")
+    parser.add_argument("-m", "--max-steps", type=int, default=20,
+                        help="number of exchange steps of each search")
+    parser.add_argument("-l", "--local-steps", type=int, default=100,
+                        help="number of MC steps of each replica between two exchanges")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of threads or processes, one per replica or all the CPUs by default")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(args)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'protein':>7} {'replicas':>8} {'backend':>9} {'wall (s)':>9} "
+          f"{'steps/s':>9} {'speedup':>8} {'energy':>7}")
+    for name in args.sequences:
+        sequence = SEQUENCES[name][0]
+        for n_replica in args.n_replica:
+            serial = None
+            for backend in BACKENDS:
+                np.random.seed(args.seed)
+                lattice = Lattice(Protein(sequence), "random")
+                start = time.perf_counter()
+                lattice = REMCsearch(
+                    n_replica,
+                    -float("inf"),
+                    args.max_steps,
+                    args.local_steps,
+                    160.0,
+                    220.0,
+                    lattice,
+                    backend=backend,
+                    n_workers=args.n_workers,
+                )
+                wall = time.perf_counter() - start
+                serial = serial or wall
+                steps = n_replica * args.max_steps * args.local_steps
+                print(
+                    f"{name:>7} {n_replica:>8} {backend:>9} {wall:>9.2f} "
+                    f"{steps / wall:>9.0f} {serial / wall:>7.2f}x "
+                    f"{lattice.calculate_energy():>7}"
+                )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
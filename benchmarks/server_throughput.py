@@ -0,0 +1,77 @@
+"""Throughput of the folding server against one `fold.py` process per job.
+
+Submits many small folds to a server started for the occasion, checks that
+every job comes back with a result, then launches the same folds as separate
+`python fold.py` processes.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+from src.client import FoldClient
+
+SEQUENCE = "HPHPPHHPHPPHPHHPPHPH"
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-j", "--n-jobs", type=int, default=200,
+                        help="number of jobs submitted to the server")
+    parser.add_argument("-c", "--n-commands", type=int, default=20,
+                        help="number of fold.py processes launched for comparison")
+    parser.add_argument("-n", "--n-steps", type=int, default=50,
+                        help="number of MC steps of each job")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes of the server")
+    args = parser.parse_args(args)
+
+    job_args = ["-p", SEQUENCE, "MC", "-n", str(args.n_steps)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "fold.sock")
+        command = [sys.executable, "serve.py", "-s", socket_path]
+        if args.n_workers:
+            command += ["-w", str(args.n_workers)]
+        server = subprocess.Popen(command)
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.05)
+
+            with FoldClient(socket_path) as client:
+                # warm up the worker processes
+                client.fold(job_args)
+
+                start = time.perf_counter()
+                job_ids = [client.submit(job_args) for _ in range(args.n_jobs)]
+                results = [client.wait(job_id) for job_id in job_ids]
+                elapsed = time.perf_counter() - start
+
+                # a job cancelled while running stops early
+                job_id = client.submit(["-p", SEQUENCE, "MC", "-n", "1000000"])
+                time.sleep(1)
+                client.cancel(job_id)
+                cancelled = client.wait(job_id)
+        finally:
+            server.terminate()
+            server.wait()
+
+    assert all(result["event"] == "result" for result in results), results
+    assert cancelled["event"] == "cancelled", cancelled
+    print(f"server: {args.n_jobs} jobs in {elapsed:.2f}s, "
+          f"{args.n_jobs / elapsed:.1f} jobs/s")
+
+    start = time.perf_counter()
+    for _ in range(args.n_commands):
+        subprocess.run([sys.executable, "fold.py", *job_args],
+                       check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    print(f"fold.py: {args.n_commands} jobs in {elapsed:.2f}s, "
+          f"{args.n_commands / elapsed:.1f} jobs/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
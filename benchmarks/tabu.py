@@ -0,0 +1,122 @@
+"""Tabu search against MC and REMC at equal wall time.
+
+For each protein and seed, runs the tabu search, an MC search at a fixed
+temperature and a REMC search with 5 replicas from the same random
+conformation, each stopped after the same wall-time budget. Reports the
+mean lowest energy reached after a quarter, half and all of the budget, and
+the number of runs reaching the optimal energy, e.g.
+
+    python -m benchmarks.tabu -s S1 S2 S3 -r 5 -b 10
+
+The runs share the CPUs of the worker pool, use one worker per CPU for
+comparable wall times.
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.REMCsearch import REMCsearch
+from src.TABUsearch import TABUsearch
+
+SEARCHES = ("TABU", "MC", "REMC")
+
+# fractions of the budget at which the lowest energies are reported
+CHECKPOINTS = (0.25, 0.5, 1.0)
+
+
+def _run(task):
+    """
+    Run one seeded search for a wall-time budget.
+
+    Parameters
+    ----------
+    task : tuple
+        Name of the protein, name of the search, budget in seconds and
+        random seed.
+
+    Returns
+    -------
+    tuple
+        Name of the protein, name of the search and lowest energy reached at
+        each checkpoint.
+    """
+    name, search, budget, seed = task
+    np.random.seed(seed)
+    sequence, optimum = SEQUENCES[name]
+    lattice = Lattice(Protein(sequence), "random")
+
+    lowest = lattice.calculate_energy()
+    # lowest energy and the time at which it was reached
+    trace = [(0.0, lowest)]
+    start = time.perf_counter()
+
+    def callback(step, energy):
+        nonlocal lowest
+        elapsed = time.perf_counter() - start
+        if energy < lowest:
+            lowest = energy
+            trace.append((elapsed, energy))
+        return elapsed < budget and lowest > optimum
+
+    if search == "TABU":
+        TABUsearch(10**9, 100, "fifo", 200, 3, None, lattice, callback)
+    elif search == "MC":
+        MCsearch(10**9, 200.0, lattice, callback)
+    else:
+        REMCsearch(5, -float("inf"), 10**9, 100, 160.0, 220.0, lattice, callback)
+
+    energies = []
+    for fraction in CHECKPOINTS:
+        energies.append(min(e for t, e in trace if t <= fraction * budget))
+    return name, search, energies
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=list(SEQUENCES),
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-r", "--n-runs", type=int, default=5,
+                        help="number of seeded runs per protein and search")
+    parser.add_argument("-b", "--budget", type=float, default=10.0,
+                        help="wall time of each run, in seconds")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    args = parser.parse_args(args)
+
+    tasks = [
+        (name, search, args.budget, seed)
+        for name in args.sequences
+        for search in SEARCHES
+        for seed in range(args.n_runs)
+    ]
+    results = {}
+    with multiprocessing.Pool(args.n_workers) as pool:
+        for name, search, energies in pool.imap_unordered(_run, tasks):
+            results.setdefault((name, search), []).append(energies)
+
+    header = " ".join(f"{f'E at {f:.0%}':>9}" for f in CHECKPOINTS)
+    print(f"{'protein':>7} {'optimum':>7} {'search':>6} {header} {'optimal':>7}")
+    for name in args.sequences:
+        optimum = SEQUENCES[name][1]
+        for search in SEARCHES:
+            energies = np.array(results[(name, search)])
+            means = " ".join(f"{mean:>9.2f}" for mean in energies.mean(axis=0))
+            reached = int((energies[:, -1] <= optimum).sum())
+            print(
+                f"{name:>7} {optimum:>7} {search:>6} {means} "
+                f"{reached:>3}/{len(energies):<3}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
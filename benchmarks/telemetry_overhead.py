@@ -0,0 +1,106 @@
+"""Overhead of the telemetry on the Monte Carlo loop.
+
+Times the same seeded MC searches with and without telemetry, in pairs
+whose order alternates so that both see the same load. The searches with
+telemetry run with the flushing thread started and flushing at the given
+interval, the default one of `fold.py`, while the searches without it run
+with no telemetry at all. Reports the median times and the median and
+interquartile range of the relative slowdown of the pairs, next to the
+interquartile range of the searches without telemetry, which gives the
+noise to compare the slowdown with. The cost of a single record is also
+timed, which gives a noise-free estimate of the overhead per step, e.g.
+
+    python -m benchmarks.telemetry_overhead -n 5000 -r 21 -i 1.0
+"""
+
+import os
+import sys
+import time
+import timeit
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.telemetry import Telemetry
+
+
+def timed_search(lattice, n_steps, seed, telemetry=None):
+    """
+    Return the duration of a seeded MC search.
+    """
+    np.random.seed(seed)
+    start = time.perf_counter()
+    MCsearch(n_steps, 200.0, lattice, telemetry=telemetry)
+    return time.perf_counter() - start
+
+
+def timed_telemetry_search(lattice, n_steps, seed, path, interval):
+    """
+    Return the duration of a seeded MC search, with its telemetry flushing
+    to a metrics file.
+    """
+    with Telemetry(path, interval=interval) as telemetry:
+        return timed_search(lattice, n_steps, seed, telemetry)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequence", default="S4", choices=list(SEQUENCES),
+                        help="benchmark protein to fold")
+    parser.add_argument("-n", "--n-steps", type=int, default=5000,
+                        help="number of MC steps of each search")
+    parser.add_argument("-r", "--n-repeats", type=int, default=21,
+                        help="number of pairs of searches, with and without telemetry")
+    parser.add_argument("-i", "--interval", type=float, default=1.0,
+                        help="time in seconds between two flushes of the telemetry")
+    args = parser.parse_args(args)
+
+    lattice = Lattice(Protein(SEQUENCES[args.sequence][0]))
+
+    baseline = []
+    measured = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "metrics.jsonl")
+        for seed in range(args.n_repeats):
+            if seed % 2:
+                measured.append(
+                    timed_telemetry_search(lattice, args.n_steps, seed, path, args.interval)
+                )
+                baseline.append(timed_search(lattice, args.n_steps, seed))
+            else:
+                baseline.append(timed_search(lattice, args.n_steps, seed))
+                measured.append(
+                    timed_telemetry_search(lattice, args.n_steps, seed, path, args.interval)
+                )
+
+        # cost of a single record, on a telemetry that is not flushed
+        idle = Telemetry(os.path.join(directory, "idle.jsonl"))
+        record = min(
+            timeit.repeat(lambda: idle.record(0, 200.0, -1, True), number=100000)
+        ) / 100000
+
+    baseline = np.array(baseline)
+    measured = np.array(measured)
+    slowdown = 100 * (measured / baseline - 1)
+    noise = 100 * (np.percentile(baseline, [25, 75]) / np.median(baseline) - 1)
+    low, median, high = np.percentile(slowdown, [25, 50, 75])
+    step = np.median(baseline) / args.n_steps
+    print(f"{args.n_repeats} pairs of {args.n_steps} steps, flushed every {args.interval:g}s")
+    print(f"without telemetry: {np.median(baseline):.3f}s median, "
+          f"interquartile range {noise[0]:+.2f}% to {noise[1]:+.2f}%")
+    print(f"with telemetry:    {np.median(measured):.3f}s median")
+    print(f"overhead:          {median:+.2f}% median, "
+          f"interquartile range {low:+.2f}% to {high:+.2f}%")
+    print(f"record: {record * 1e9:.0f}ns, MC step: {step * 1e6:.0f}us, "
+          f"estimated overhead: {100 * record / step:.3f}%")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
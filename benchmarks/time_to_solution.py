@@ -0,0 +1,233 @@
+"""Time-to-solution statistics of the searches over many seeds.
+
+Runs M independently seeded searches per benchmark protein across a process
+pool, records the steps and wall time at which each energy level is first
+reached, and reports the success probability, the median and 95th percentile
+time-to-target and the energy versus time curves.
+
+The search is given as the `fold.py` sub-command and its options, e.g.
+
+    python -m benchmarks.time_to_solution -s S1 S2 -r 50 -w 8 REMC -n 5 -l 100 -m 500
+
+Searches stop as soon as they reach the optimal energy of the protein.
+Results are written to OUTPUT.json, OUTPUT.csv (summary) and
+OUTPUT_curves.csv (energy versus time).
+"""
+
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from benchmarks import SEQUENCES
+from src.parser import parse_args
+from src.runner import apply_profile, build_lattice, run_search, split_args
+
+
+def _run(task):
+    """
+    Run one seeded search and record when each energy level is reached.
+
+    Parameters
+    ----------
+    task : tuple
+        Name, sequence and optimal energy of the protein,
+        arguments of the search and random seed.
+
+    Returns
+    -------
+    dict
+        Seed, wall time and trajectory of the run, as a list of
+        (steps, seconds, energy) entries, one per new lowest energy.
+    """
+    name, sequence, target, search_args, seed = task
+    np.random.seed(seed)
+
+    options, params = split_args(parse_args(["-p", sequence] + search_args))
+    lattice = build_lattice(sequence, options["initial_lattice"])
+    sub_command = options["subparser_name"]
+
+    # number of MC steps between two calls of the callback
+    if sub_command == "REMC":
+        apply_profile(params, options["tunable"], options["profiles"], sequence)
+        params["energy_cutoff"] = target
+        steps_per_call = params["n_replica"] * params["local_steps"]
+    else:
+        steps_per_call = 1
+
+    start = time.perf_counter()
+    trajectory = [(0, 0.0, lattice.calculate_energy())]
+
+    def callback(step, energy):
+        if energy < trajectory[-1][2]:
+            elapsed = time.perf_counter() - start
+            trajectory.append(((step + 1) * steps_per_call, elapsed, energy))
+        return energy > target
+
+    run_search(sub_command, params, lattice, callback)
+    return {
+        "name": name,
+        "seed": seed,
+        "wall_time": time.perf_counter() - start,
+        "trajectory": trajectory,
+    }
+
+
+def _quantile(values, q):
+    """
+    Quantile of values where failed runs count as infinite, None if infinite.
+    """
+    value = float(np.quantile(values, q, method="inverted_cdf"))
+    return None if np.isinf(value) else value
+
+
+def summarize(name, target, runs, n_points):
+    """
+    Compute the statistics of the runs of a protein.
+
+    Parameters
+    ----------
+    name : str
+        Name of the protein.
+    target : int
+        Optimal energy of the protein.
+    runs : list
+        Results of the runs.
+    n_points : int
+        Number of time points of the energy versus time curve.
+
+    Returns
+    -------
+    dict
+        Statistics of the runs.
+    """
+    times = []
+    steps = []
+    levels = set()
+    for run in runs:
+        reached = [entry for entry in run["trajectory"] if entry[2] <= target]
+        times.append(reached[0][1] if reached else np.inf)
+        steps.append(reached[0][0] if reached else np.inf)
+        levels.update(entry[2] for entry in run["trajectory"])
+
+    # first time each energy level (or a lower one) is reached
+    energy_levels = []
+    for energy in sorted(levels, reverse=True):
+        reached = [
+            min(
+                (entry for entry in run["trajectory"] if entry[2] <= energy),
+                key=lambda entry: entry[1],
+            )
+            for run in runs
+            if run["trajectory"][-1][2] <= energy
+        ]
+        energy_levels.append(
+            {
+                "energy": energy,
+                "probability": len(reached) / len(runs),
+                "median_steps": float(np.median([entry[0] for entry in reached])),
+                "median_time": float(np.median([entry[1] for entry in reached])),
+            }
+        )
+
+    # best energy of every run on a common time grid
+    grid = np.linspace(0, max(run["wall_time"] for run in runs), n_points)
+    energies = np.empty((len(runs), n_points))
+    for i, run in enumerate(runs):
+        seconds = np.array([entry[1] for entry in run["trajectory"]])
+        values = np.array([entry[2] for entry in run["trajectory"]])
+        energies[i] = values[np.searchsorted(seconds, grid, side="right") - 1]
+
+    return {
+        "name": name,
+        "target": target,
+        "runs": len(runs),
+        "success_probability": float(np.mean(np.isfinite(times))),
+        "median_time": _quantile(times, 0.5),
+        "p95_time": _quantile(times, 0.95),
+        "median_steps": _quantile(steps, 0.5),
+        "p95_steps": _quantile(steps, 0.95),
+        "mean_wall_time": float(np.mean([run["wall_time"] for run in runs])),
+        "energy_levels": energy_levels,
+        "curve": {
+            "time": grid.tolist(),
+            "median_energy": np.median(energies, axis=0).tolist(),
+            "mean_energy": energies.mean(axis=0).tolist(),
+        },
+    }
+
+
+def main(args):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-s", "--sequences", nargs="+", default=list(SEQUENCES),
+                        choices=list(SEQUENCES), help="benchmark proteins to run")
+    parser.add_argument("-r", "--n-runs", type=int, default=20,
+                        help="number of seeded runs per protein")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first run, the next runs use the following ones")
+    parser.add_argument("--n-points", type=int, default=50,
+                        help="number of time points of the energy versus time curves")
+    parser.add_argument("-o", "--output", default="results/time_to_solution",
+                        help="prefix of the output files")
+    parser.add_argument("search_args", nargs=argparse.REMAINDER,
+                        help="fold.py sub-command and its options")
+    args = parser.parse_args(args)
+    if not args.search_args:
+        parser.error("the search sub-command is required, e.g. MC -n 5000")
+
+    tasks = [
+        (name, *SEQUENCES[name], args.search_args, args.seed + run)
+        for name in args.sequences
+        for run in range(args.n_runs)
+    ]
+    runs = {name: [] for name in args.sequences}
+    with multiprocessing.Pool(args.n_workers) as pool:
+        for run in pool.imap_unordered(_run, tasks):
+            runs[run["name"]].append(run)
+
+    summaries = [
+        summarize(name, SEQUENCES[name][1], runs[name], args.n_points)
+        for name in args.sequences
+    ]
+
+    with open(f"{args.output}.json", "w") as handle:
+        json.dump(
+            {"search": args.search_args, "summaries": summaries, "runs": runs},
+            handle,
+            indent=1,
+        )
+
+    columns = ["name", "target", "runs", "success_probability", "median_time",
+               "p95_time", "median_steps", "p95_steps", "mean_wall_time"]
+    with open(f"{args.output}.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for summary in summaries:
+            writer.writerow([summary[column] for column in columns])
+
+    with open(f"{args.output}_curves.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["name", "time", "median_energy", "mean_energy"])
+        for summary in summaries:
+            curve = summary["curve"]
+            for row in zip(curve["time"], curve["median_energy"], curve["mean_energy"]):
+                writer.writerow([summary["name"], *row])
+
+    for summary in summaries:
+        print(
+            f"{summary['name']:>4}: P(success) = {summary['success_probability']:.2f}, "
+            f"median time = {summary['median_time']}, "
+            f"95th percentile = {summary['p95_time']}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,52 +1,219 @@
 import sys
+import time
 
-from src.protein import Protein
-from src.lattice import Lattice
-from src.MCsearch import MCsearch
-from src.REMCsearch import REMCsearch
+from src.runner import (
+    read_sequence,
+    build_lattice,
+    run_search,
+    resolve_energy_cutoff,
+    save_result,
+    split_args,
+    make_proposals,
+    make_schedule,
+    make_energy_model,
+    apply_profile,
+)
+from src.PAsearch import PAsearch
+from src.TABUsearch import TABUsearch
+from src.GAsearch import GAsearch
+from src.DCsearch import DCsearch
+from src.exact import MAX_EXACT_LENGTH, EXACTsearch
+from src.multistart import multistart
+from src.telemetry import Telemetry
+from src.statistics import EnsembleStatistics
 from src.parser import parse_args
 
 
 def main(args):
-    args = parse_args(args)
-
-    if args.protein:
-        sequence = args.protein
-    elif args.file:
-        with open(args.file, "r") as handle:
-            sequence = ""
-            # read fasta file without header
-            for line in handle:
-                if line.startswith(">"):
-                    continue
-                else:
-                    sequence += line.strip()
-    del args.protein, args.file
-
-    # if sequence is not an HP sequence, convert it
-    if sequence.strip("HP"):
-        sequence = "".join("H" if r in "AILMFVPGWC" else "P" for r in sequence)
-    protein = Protein(sequence)
-
-    lattice = Lattice(protein, args.initial_lattice)
-
-    if args.initial_lattice == "random":
+    options, params = split_args(parse_args(args))
+
+    model = make_energy_model(options["energy_model"], options["energy_matrix"])
+    sequence = read_sequence(options["protein"], options["file"], model)
+    lattice = build_lattice(
+        sequence, options["initial_lattice"], options["store"], model
+    )
+
+    if isinstance(lattice, list):
+        print(
+            f"Warm start from {len(lattice)} stored conformations, "
+            f"the best with energy of {lattice[0].calculate_energy()}"
+        )
+    elif options["initial_lattice"] == "stored":
+        print("No stored conformation for this sequence, using a linear lattice")
+    elif options["initial_lattice"] == "random" and not options["restarts"]:
         print(f"Initial lattice with energy of {lattice.calculate_energy()}")
         lattice.draw_grid()
 
-    del args.initial_lattice
+    telemetry = None
+    if options["telemetry"]:
+        telemetry = Telemetry(
+            options["telemetry"],
+            options["telemetry_format"],
+            options["telemetry_interval"],
+        )
+
+    sub_command = options["subparser_name"]
+    start = time.time()
+
+    if sub_command == "REMC":
+        bucket = apply_profile(params, options["tunable"], options["profiles"], sequence)
+        if bucket is not None:
+            tuned = ", ".join(f"{name} {params[name]}" for name in options["tunable"])
+            print(f"Tuned REMC profile of the lengths {bucket}: {tuned}")
+
+    exact = resolve_energy_cutoff(params, sequence)
+    if exact:
+        print(f"Energy cutoff set to the ground-state energy, {params['energy_cutoff']}")
+    elif exact is not None:
+        print(
+            f"Warning: no energy cutoff, the exact solver is limited to "
+            f"{MAX_EXACT_LENGTH} residues"
+        )
 
-    sub_command = args.subparser_name
-    del args.subparser_name
+    if options["restarts"]:
+        best_energies = {}
 
-    if sub_command == "MC":
-        final_lattice = MCsearch(**vars(args), lattice_input=lattice)
-    elif sub_command == "REMC":
-        final_lattice = REMCsearch(**vars(args), lattice_input=lattice)
+        def progress(restart, energy):
+            best_energies[restart] = energy
+            print(
+                f"Restart {restart}: energy of {energy}, "
+                f"best of all restarts {min(best_energies.values())}"
+            )
+
+        final_lattice, restarts = multistart(
+            sub_command,
+            params,
+            sequence,
+            options["restarts"],
+            options["workers"],
+            lattices=lattice if isinstance(lattice, list) else None,
+            progress=progress,
+            model=model,
+        )
+        for result in restarts:
+            if result["lattice"] is None:
+                status = "cancelled before starting"
+            else:
+                status = (
+                    f"energy of {result['energy']} (lowest {result['lowest_energy']}), "
+                    f"{result['cpu']:.2f} s CPU"
+                )
+                if result["cancelled"]:
+                    status += ", cancelled"
+            print(f"Restart {result['restart']} (seed {result['seed']}): {status}")
+        print(
+            f"Total CPU time of the restarts: "
+            f"{sum(result['cpu'] for result in restarts):.2f} s"
+        )
+    elif sub_command in ("MC", "REMC"):
+        proposals = make_proposals(sub_command, params)
+        schedule = make_schedule(params) if sub_command == "MC" else None
+        statistics = None
+        if options["ensemble_stats"]:
+            statistics = EnsembleStatistics(sequence)
+        if telemetry:
+            with telemetry:
+                final_lattice = run_search(
+                    sub_command,
+                    params,
+                    lattice,
+                    telemetry=telemetry,
+                    proposals=proposals,
+                    statistics=statistics,
+                    schedule=schedule,
+                )
+        else:
+            final_lattice = run_search(
+                sub_command,
+                params,
+                lattice,
+                proposals=proposals,
+                statistics=statistics,
+                schedule=schedule,
+            )
+
+        if schedule is not None:
+            print(
+                f"Annealed down to {schedule.temperature:.1f} K "
+                f"with {schedule.n_reheats} reheats"
+            )
+        if statistics is not None:
+            statistics.save(options["ensemble_stats"])
+            print(f"Ensemble statistics written to {options['ensemble_stats']}")
+
+        for replica, proposal in enumerate(proposals or []):
+            weights = ", ".join(f"{m}: {w:.3f}" for m, w in proposal.weights.items())
+            print(f"Movement weights of replica {replica}: {weights}")
+    elif sub_command == "TABU":
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        final_lattice, report = TABUsearch(**params, lattice_input=lattice)
+        print(
+            f"{report['steps']} steps, {report['restarts']} restarts, "
+            f"{report['tabu']} tabu neighbors skipped, "
+            f"{report['aspirations']} steps with only tabu neighbors"
+        )
+    elif sub_command == "GA":
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        final_lattice, islands = GAsearch(**params, lattice_input=lattice)
+        print(f"Lowest energy of each island: {', '.join(map(str, islands))}")
+    elif sub_command == "PA":
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        final_lattice, free_energy = PAsearch(**params, lattice_input=lattice)
+        print(f"Reduced free-energy difference of {free_energy:.3f}")
+    elif sub_command == "DC":
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        if telemetry:
+            with telemetry:
+                final_lattice, stages = DCsearch(
+                    **params, lattice_input=lattice, telemetry=telemetry
+                )
+        else:
+            final_lattice, stages = DCsearch(**params, lattice_input=lattice)
+        for stage, report in stages.items():
+            if "energies" in report:
+                energy = "energies of " + ", ".join(map(str, report["energies"]))
+            else:
+                energy = f"energy of {report['energy']}"
+            print(
+                f"Stage {stage}: {report['wall']:.2f} s wall, "
+                f"{report['cpu']:.2f} s CPU, {energy}"
+            )
+
+    elif sub_command == "EXACT":
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        final_lattice, conformations = EXACTsearch(**params, lattice_input=lattice)
+        print(
+            f"Ground-state energy of {final_lattice.calculate_energy()}, "
+            f"{len(conformations)} conformations found up to symmetry"
+        )
 
     print(f"Final lattice with energy of {final_lattice.calculate_energy()}")
     final_lattice.draw_grid()
 
+    if options["store"]:
+        metadata = {
+            "search": sub_command,
+            "params": params,
+            "initial_lattice": options["initial_lattice"],
+            "energy_model": model.name,
+            "restarts": options["restarts"],
+            "time": time.time() - start,
+        }
+        kept = save_result(
+            options["store"],
+            options["store_size"],
+            sequence,
+            final_lattice,
+            metadata,
+            model,
+        )
+        print(f"Final lattice {'added to' if kept else 'not kept in'} {options['store']}")
+
     # final_lattice.protein.write_pdb("../results/final_lattice.pdb")
 
 
@@ -0,0 +1,39 @@
+import sys
+import signal
+import asyncio
+import argparse
+
+from src.server import FoldServer
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Serve folding jobs over a Unix socket or a localhost port"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-s", "--socket", help="path of the Unix socket to listen on")
+    group.add_argument("-P", "--port", type=int, help="localhost port to listen on")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="default time limit of a job in seconds")
+    parser.add_argument("--progress-interval", type=float, default=0.5,
+                        help="minimum time in seconds between two progress messages of a job")
+    return parser.parse_args(args)
+
+
+def main(args):
+    args = parse_args(args)
+    server = FoldServer(args.n_workers, args.timeout, args.progress_interval)
+
+    # shut the worker processes down on termination as on interruption
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(server.serve(socket_path=args.socket, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args)
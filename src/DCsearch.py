@@ -0,0 +1,355 @@
+"""Divide-and-conquer folding of long sequences.
+
+The sequence is split into overlapping segments, short enough to be folded
+quickly, which are folded independently with REMC searches in a pool of
+worker processes. The folded segments are assembled one after the other,
+each attached to the chain on the residues it shares with the previous
+segment under the rotation or reflection of the square lattice that keeps
+the chain self-avoiding with the most H-H contacts. When no symmetry does,
+the rest of the chain is grown depth first along the bonds of the segment.
+The assembled chain is then refined by a REMC search on the full sequence.
+"""
+
+import os
+import time
+import multiprocessing
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import DIRECTIONS, Lattice, center_conformation
+from src.movement import PIVOT_SYMMETRIES
+from src.REMCsearch import REMCsearch
+
+# rotations and reflections of the square lattice, the identity first
+SYMMETRIES = [np.eye(2, dtype=int)] + [np.array(matrix) for matrix in PIVOT_SYMMETRIES]
+
+
+def _split(length, segment_length, overlap):
+    """
+    Return the bounds of the overlapping segments of a sequence.
+
+    Parameters
+    ----------
+    length : int
+        Length of the sequence.
+    segment_length : int
+        Maximum length of a segment.
+    overlap : int
+        Number of residues shared by two consecutive segments.
+
+    Returns
+    -------
+    list
+        (start, end) bounds of the segments, every segment adds at least one
+        residue to the previous ones.
+    """
+    step = segment_length - overlap
+    starts = range(0, max(length - overlap, 1), step)
+    return [(start, min(start + segment_length, length)) for start in starts]
+
+
+def _fold_segment(task):
+    """
+    Fold a segment of the sequence with a REMC search.
+
+    Parameters
+    ----------
+    task : tuple
+        Sequence of the segment, parameters of the search and random seed.
+
+    Returns
+    -------
+    tuple
+        Conformation and energy of the segment, and CPU time of the search.
+    """
+    sequence, params, seed = task
+    np.random.seed(seed)
+    start = time.process_time()
+    lattice = REMCsearch(**params, lattice_input=Lattice(Protein(sequence)))
+    return (
+        lattice.get_conformation(),
+        lattice.calculate_energy(),
+        time.process_time() - start,
+    )
+
+
+def _contacts(sequence, chain, indices):
+    """
+    Count the H-H contacts of some residues of a chain.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    chain : list
+        Coordinates of the placed residues, as tuples.
+    indices : iterable
+        Indices of the residues whose contacts are counted, contacts between
+        two of them are counted once.
+
+    Returns
+    -------
+    Number of contacts, the opposite of their energy.
+    """
+    positions = {coords: index for index, coords in enumerate(chain)}
+    indices = set(indices)
+    contacts = 0
+    for i in indices:
+        if sequence[i] != "H":
+            continue
+        for di, dj in DIRECTIONS:
+            j = positions.get((chain[i][0] + di, chain[i][1] + dj))
+            if j is None or abs(i - j) == 1 or sequence[j] != "H":
+                continue
+            if j not in indices or j < i:
+                contacts += 1
+    return contacts
+
+
+def _grow(chain, preferred, length, max_nodes):
+    """
+    Extend a chain into a self-avoiding walk, following preferred bonds.
+
+    Depth-first search in which each residue first tries the direction of
+    its preferred bond, then the other ones.
+
+    Parameters
+    ----------
+    chain : list
+        Coordinates of the fixed first residues, as tuples.
+    preferred : list
+        Preferred direction of every bond of the full chain.
+    length : int
+        Length of the full chain.
+    max_nodes : int
+        Maximum number of placements tried.
+
+    Returns
+    -------
+    list
+        Coordinates of the full chain, None if the search failed.
+    """
+    chain = list(chain)
+    occupied = set(chain)
+    fixed = len(chain)
+    # directions left to try for each residue placed by the search
+    options = {}
+    nodes = 0
+    while fixed <= len(chain) < length:
+        index = len(chain)
+        if index not in options:
+            first = preferred[index - 1]
+            options[index] = [first] + [d for d in DIRECTIONS if d != first]
+
+        while options[index] and nodes < max_nodes:
+            di, dj = options[index].pop(0)
+            coords = (chain[-1][0] + di, chain[-1][1] + dj)
+            nodes += 1
+            if coords not in occupied:
+                chain.append(coords)
+                occupied.add(coords)
+                break
+        else:
+            if nodes >= max_nodes:
+                return None
+            # dead end, move the previous residue
+            del options[index]
+            if len(chain) == fixed:
+                return None
+            occupied.discard(chain.pop())
+    return chain
+
+
+def _assemble(sequence, segments, conformations, max_nodes):
+    """
+    Assemble the folded segments into a self-avoiding chain.
+
+    Each segment is attached at the last residue placed, which it shares
+    with the previous segment, under the rotation or reflection that keeps
+    the chain self-avoiding with the most H-H contacts. When none does, the
+    rest of the chain is grown along the bonds of the segment, and the
+    junction is moved back until the growth succeeds.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    segments : list
+        (start, end) bounds of the segments.
+    conformations : list
+        Conformations of the folded segments.
+    max_nodes : int
+        Maximum number of placements tried by each growth.
+
+    Returns
+    -------
+    numpy.ndarray of shape (length, 2) with the coordinates of the residues.
+    """
+    chain = [tuple(coords) for coords in conformations[0].tolist()]
+    for (start, end), conformation in zip(segments[1:], conformations[1:]):
+        junction = len(chain) - 1
+        local = junction - start
+        occupied = set(chain)
+
+        candidates = []
+        for symmetry in SYMMETRIES:
+            placed = conformation @ symmetry.T
+            placed = placed - placed[local] + chain[junction]
+            added = [tuple(coords) for coords in placed[local + 1:].tolist()]
+            collisions = sum(coords in occupied for coords in added)
+            # agreement with the previous segment on the shared residues
+            agreement = sum(
+                tuple(placed[k].tolist()) == chain[start + k] for k in range(local)
+            )
+            contacts = _contacts(sequence, chain + added, range(junction + 1, end))
+            candidates.append((collisions, -contacts, -agreement, added))
+        collisions, _, _, added = min(candidates, key=lambda c: c[:3])
+
+        if collisions == 0:
+            chain += added
+            continue
+
+        # constrained placement, along the bonds of the closest candidate
+        full = chain + added
+        preferred = [
+            (full[i + 1][0] - full[i][0], full[i + 1][1] - full[i][1])
+            for i in range(end - 1)
+        ]
+        fixed = len(chain)
+        grown = None
+        while grown is None:
+            grown = _grow(full[:fixed], preferred, end, max_nodes)
+            fixed //= 2
+            if grown is None and fixed == 0:
+                # a straight chain is always self-avoiding
+                grown = [(0, i) for i in range(end)]
+        chain = grown
+    return np.array(chain, dtype=np.int32)
+
+
+def DCsearch(
+    segment_length,
+    overlap,
+    segment_steps,
+    refine_steps,
+    n_replica,
+    local_steps,
+    temperature_min,
+    temperature_max,
+    energy_cutoff,
+    n_workers,
+    lattice_input,
+    callback=None,
+    telemetry=None,
+):
+    """
+    Perform a divide-and-conquer search on the lattice.
+
+    The sequence is split into overlapping segments, folded in parallel with
+    REMC searches across a pool of worker processes. The segments are then
+    assembled into a self-avoiding chain, which is refined with a REMC
+    search on the full sequence.
+
+    Parameters
+    ----------
+    segment_length : int
+        Maximum number of residues of a segment.
+    overlap : int
+        Number of residues shared by two consecutive segments.
+    segment_steps : int
+        Number of exchange steps of the REMC search of each segment.
+    refine_steps : int
+        Number of exchange steps of the REMC refinement of the full chain.
+    n_replica : int
+        Number of replicas of the REMC searches.
+    local_steps : int
+        Number of steps of each MC search of the REMC searches.
+    temperature_min : float
+        Temperature of the first replica.
+    temperature_max : float
+        Temperature of the last replica.
+    energy_cutoff : int
+        Energy at which the refinement stops, None to run all its steps.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    lattice_input : Lattice
+        Lattice of the protein to fold.
+    callback : callable, optional
+        Progress callback given to the refinement.
+    telemetry : Telemetry, optional
+        Telemetry in which the refinement records its steps.
+
+    Returns
+    -------
+    Lattice
+        Lattice with the refined conformation.
+    dict
+        Wall and CPU times in seconds and energy reached by each stage:
+        segments, assembly and refinement. The segments stage reports the
+        energy of each segment instead, as their overlaps share residues.
+    """
+    if not 0 < overlap < segment_length:
+        raise ValueError("the overlap must be positive and shorter than the segments")
+    n_workers = n_workers or os.cpu_count()
+    sequence = lattice_input.protein.sequence
+    length = lattice_input.protein.length
+    if energy_cutoff is None:
+        energy_cutoff = -float("inf")
+    stages = {}
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    segments = _split(length, segment_length, overlap)
+    params = {
+        "n_replica": n_replica,
+        "energy_cutoff": -float("inf"),
+        "max_steps": segment_steps,
+        "local_steps": local_steps,
+        "temperature_min": temperature_min,
+        "temperature_max": temperature_max,
+    }
+    tasks = [
+        (sequence[begin:end], params, np.random.randint(2**31))
+        for begin, end in segments
+    ]
+    if n_workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(n_workers, len(tasks))) as pool:
+            results = pool.map(_fold_segment, tasks)
+    else:
+        results = list(map(_fold_segment, tasks))
+    stages["segments"] = {
+        "wall": time.perf_counter() - wall,
+        # the searches run in the workers when there is a pool
+        "cpu": max(time.process_time() - cpu, sum(seconds for _, _, seconds in results)),
+        "energies": [energy for _, energy, _ in results],
+    }
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    conformation = _assemble(
+        sequence, segments, [conformation for conformation, _, _ in results], 100 * length
+    )
+    lattice = Lattice(Protein(sequence))
+    lattice.set_conformation(center_conformation(conformation, lattice.size))
+    stages["assembly"] = {
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu,
+        "energy": lattice.calculate_energy(),
+    }
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    lattice = REMCsearch(
+        n_replica,
+        energy_cutoff,
+        refine_steps,
+        local_steps,
+        temperature_min,
+        temperature_max,
+        lattice,
+        callback=callback,
+        telemetry=telemetry,
+    )
+    stages["refinement"] = {
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu,
+        "energy": lattice.calculate_energy(),
+    }
+    return lattice, stages
@@ -0,0 +1,374 @@
+"""Genetic algorithm on conformations encoded as relative directions.
+
+A conformation is encoded by the turn at each residue between its two
+bonds, straight, left or right, with the first bond fixed, as in the result
+store (see `src.store.conformation_turns`). A population is
+then an array of one row of turns per individual, and crossing two
+individuals over at a cut point keeps the shape of each side of the cut.
+
+The children of crossovers that are no longer self-avoiding are repaired
+by walking the chain and changing the turns of the colliding residues,
+backtracking from the dead ends. Mutations are movements of the MC search
+(end, corner, crankshaft, pull or pivot) on a random residue. The best
+individuals of each generation are kept unchanged (elitism).
+
+The energies of a population are computed in one vectorized pass over all
+its individuals. The population is split into islands evolved in parallel
+across a pool of worker processes. Every few generations, the best
+individuals of each island migrate to the next island in a ring, where
+they replace the worst ones.
+"""
+
+import os
+import multiprocessing
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice, center_conformation
+from src.movement import Movement
+from src.store import STEPS, conformation_turns, turns_conformations
+
+# turns encoded in the population, as changes of the heading
+STRAIGHT, LEFT, RIGHT = 0, 1, -1
+
+# movements applied as mutations
+MUTATIONS = ("end", "corner", "crankshaft", "pull", "pivot")
+
+
+def population_energies(sequence, population):
+    """
+    Return the energies of the self-avoiding individuals of a population.
+
+    The positions of all the individuals are flattened into one sorted
+    array of keys, offset by individual, in which the right and lower
+    neighbor of every residue is looked up, so that each contact is
+    counted once.
+
+    Parameters
+    ----------
+    sequence : Sequence
+        Sequence of the protein, with its energy model.
+    population : numpy.ndarray
+        Turns of the individuals, of shape (size, length - 2).
+
+    Returns
+    -------
+    numpy.ndarray
+        Energy of each individual.
+    """
+    matrix = sequence.model.matrix
+    codes = np.array(sequence.codes)
+    size = len(population)
+    length = sequence.length
+    coords = turns_conformations(population) + length
+    # keys of the positions, unique across the individuals
+    width = 2 * length + 1
+    keys = (
+        coords[..., 0] * width + coords[..., 1] + np.arange(size)[:, None] * width**2
+    ).ravel()
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    energies = np.zeros(size, dtype=matrix.dtype)
+    indices = np.tile(np.arange(length), size)
+    individuals = np.repeat(np.arange(size), length)
+    for offset in (1, width):
+        found = np.searchsorted(sorted_keys, keys + offset)
+        found = np.minimum(found, len(keys) - 1)
+        hit = sorted_keys[found] == keys + offset
+        neighbors = order[found] % length
+        contact = hit & (np.abs(neighbors - indices) > 1)
+        contact_energies = matrix[codes[indices[contact]], codes[neighbors[contact]]]
+        energies += np.bincount(
+            individuals[contact], contact_energies, size
+        ).astype(matrix.dtype)
+    return energies
+
+
+def _repair(turns, rng, max_placements):
+    """
+    Make the conformation of an individual self-avoiding.
+
+    The chain is walked from its first residue, keeping the turn of every
+    residue whose position is free, and otherwise trying the other turns,
+    backtracking from the dead ends.
+
+    Parameters
+    ----------
+    turns : numpy.ndarray
+        Turns of the individual.
+    rng : numpy.random.RandomState
+        Random stream choosing the order of the other turns.
+    max_placements : int
+        Number of placements after which the repair gives up.
+
+    Returns
+    -------
+    numpy.ndarray
+        Repaired turns, None if the repair gave up.
+    """
+    turns = turns.tolist()
+    n_turns = len(turns)
+    positions = [(0, 0), (0, 1)]
+    occupied = set(positions)
+    headings = [0]
+    options = [None] * n_turns
+    placements = 0
+
+    k = 0
+    while k < n_turns:
+        if options[k] is None:
+            # the turn of the individual first, then the others
+            others = [turn for turn in (STRAIGHT, LEFT, RIGHT) if turn != turns[k]]
+            if rng.random_sample() < 0.5:
+                others.reverse()
+            options[k] = [turns[k]] + others
+
+        placed = False
+        while options[k]:
+            turn = options[k].pop(0)
+            heading = (headings[-1] + turn) % 4
+            i, j = positions[-1]
+            di, dj = STEPS[heading]
+            if (i + di, j + dj) not in occupied:
+                positions.append((i + di, j + dj))
+                occupied.add((i + di, j + dj))
+                headings.append(heading)
+                turns[k] = turn
+                placed = True
+                break
+
+        placements += 1
+        if placed:
+            k += 1
+            continue
+        if placements > max_placements or k == 0:
+            return None
+        # dead end, take back the previous residue
+        options[k] = None
+        k -= 1
+        occupied.remove(positions.pop())
+        headings.pop()
+    return np.array(turns, dtype=np.int8)
+
+
+def _mutate(turns, lattice, rng):
+    """
+    Apply a random movement to an individual, return its new turns.
+    """
+    conformation = turns_conformations(turns)
+    lattice.set_conformation(center_conformation(conformation, lattice.size))
+    protein = lattice.protein
+    for _ in range(10):
+        movement_type = MUTATIONS[rng.randint(len(MUTATIONS))]
+        if movement_type == "end":
+            index = (0, protein.length - 1)[rng.randint(2)]
+        elif movement_type == "pivot":
+            index = rng.randint(protein.length)
+        else:
+            index = rng.randint(1, protein.length - 1)
+        movement = Movement(movement_type, lattice, protein.get_residue(index), rng)
+        if movement.moved:
+            return conformation_turns(movement.lattice.get_conformation())
+    return turns
+
+
+def _evolve_island(task):
+    """
+    Evolve the population of an island for some generations.
+
+    Parameters
+    ----------
+    task : tuple
+        Sequence of the protein, turns and energies of the individuals,
+        number of generations, crossover rate, mutation rate, number of
+        elite individuals and random seed.
+
+    Returns
+    -------
+    tuple
+        Turns and energies of the individuals after the generations.
+    """
+    (
+        sequence,
+        population,
+        energies,
+        n_generations,
+        crossover_rate,
+        mutation_rate,
+        elite,
+        seed,
+    ) = task
+    rng = np.random.RandomState(seed)
+    lattice = Lattice(Protein(sequence))
+    size, n_turns = population.shape
+    max_placements = 10 * sequence.length
+
+    def tournament():
+        first, second = rng.randint(size, size=2)
+        return first if energies[first] <= energies[second] else second
+
+    for _ in range(n_generations):
+        children = list(population[np.argsort(energies, kind="stable")[:elite]])
+        while len(children) < size:
+            parent = population[tournament()]
+            child = None
+            if n_turns > 1 and rng.random_sample() < crossover_rate:
+                other = population[tournament()]
+                cut = rng.randint(1, n_turns)
+                child = _repair(
+                    np.concatenate((parent[:cut], other[cut:])), rng, max_placements
+                )
+            if child is None:
+                child = parent.copy()
+            if rng.random_sample() < mutation_rate:
+                child = _mutate(child, lattice, rng)
+            children.append(child)
+        population = np.array(children)
+        energies = population_energies(sequence, population)
+    return population, energies
+
+
+def GAsearch(
+    population_size,
+    n_generations,
+    crossover_rate,
+    mutation_rate,
+    elite,
+    n_islands,
+    migration_interval,
+    n_migrants,
+    energy_cutoff,
+    n_workers,
+    lattice_input,
+    callback=None,
+):
+    """
+    Perform a genetic algorithm search on the lattice.
+
+    Parameters
+    ----------
+    population_size : int
+        Number of individuals, split evenly among the islands.
+    n_generations : int
+        Number of generations.
+    crossover_rate : float
+        Probability of a child to be the crossover of two parents, rather
+        than a copy of one.
+    mutation_rate : float
+        Probability of a child to be mutated by a random movement.
+    elite : int
+        Number of the best individuals of each island kept unchanged.
+    n_islands : int
+        Number of islands, one per worker process if None, as many as the
+        population can fill with islands of elite + 2 individuals.
+    migration_interval : int
+        Number of generations between two migrations.
+    n_migrants : int
+        Number of individuals migrating from each island to the next one.
+    energy_cutoff : int
+        Energy at which the search stops, None to run all the generations.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    lattice_input : Lattice
+        Lattice whose conformation is one of the initial individuals, the
+        others are random self-avoiding walks.
+    callback : callable, optional
+        Called after each migration with the number of generations and the
+        lowest energy, the search stops if it returns False.
+
+    Returns
+    -------
+    Lattice
+        Lattice with the lowest energy conformation found.
+    list
+        Lowest energy of each island.
+    """
+    n_workers = n_workers or os.cpu_count()
+    if not n_islands:
+        n_islands = max(min(n_workers, population_size // (elite + 2)), 1)
+    island_size = population_size // n_islands
+    if island_size < elite + 2:
+        raise ValueError(
+            f"islands of {island_size} individuals cannot keep {elite} elite ones"
+        )
+    if energy_cutoff is None:
+        energy_cutoff = -float("inf")
+    # shared with the workers, with its energy model
+    sequence = lattice_input.protein.hp_sequence
+    n_turns = lattice_input.protein.length - 2
+
+    # random self-avoiding walks, with the conformation of the lattice
+    max_placements = 10 * sequence.length
+    populations = []
+    for island in range(n_islands):
+        population = np.empty((island_size, n_turns), dtype=np.int8)
+        for individual in range(island_size):
+            turns = None
+            while turns is None:
+                turns = _repair(
+                    np.array((STRAIGHT, LEFT, RIGHT), dtype=np.int8)[
+                        np.random.randint(3, size=n_turns)
+                    ],
+                    np.random,
+                    max_placements,
+                )
+            population[individual] = turns
+        populations.append(population)
+    populations[0][0] = conformation_turns(lattice_input.get_conformation())
+    energies = [population_energies(sequence, p) for p in populations]
+
+    pool = multiprocessing.Pool(min(n_workers, n_islands)) if n_workers > 1 else None
+    try:
+        generation = 0
+        while generation < n_generations:
+            if min(e.min() for e in energies) <= energy_cutoff:
+                break
+            n_epoch = min(migration_interval, n_generations - generation)
+            tasks = [
+                (
+                    sequence,
+                    populations[island],
+                    energies[island],
+                    n_epoch,
+                    crossover_rate,
+                    mutation_rate,
+                    elite,
+                    np.random.randint(2**31),
+                )
+                for island in range(n_islands)
+            ]
+            results = (
+                pool.map(_evolve_island, tasks) if pool else map(_evolve_island, tasks)
+            )
+            populations, energies = (list(x) for x in zip(*results))
+            generation += n_epoch
+
+            # ring migration, the best of each island replace the worst
+            # of the next one
+            if n_islands > 1 and n_migrants:
+                migrants = [
+                    np.argsort(e, kind="stable")[:n_migrants] for e in energies
+                ]
+                arrivals = [
+                    (populations[island][m].copy(), energies[island][m].copy())
+                    for island, m in enumerate(migrants)
+                ]
+                for island in range(n_islands):
+                    target = (island + 1) % n_islands
+                    worst = np.argsort(energies[target], kind="stable")[-n_migrants:]
+                    populations[target][worst], energies[target][worst] = arrivals[island]
+
+            lowest = min(e.min() for e in energies)
+            if callback is not None and callback(generation, lowest) is False:
+                break
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    island = min(range(n_islands), key=lambda i: energies[i].min())
+    best = populations[island][np.argmin(energies[island])]
+    lattice = Lattice(Protein(sequence))
+    lattice.set_conformation(center_conformation(turns_conformations(best), lattice.size))
+    return lattice, [e.min().item() for e in energies]
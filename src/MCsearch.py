@@ -1,10 +1,20 @@
-import copy
-import numpy as np
+from src.sampler import Sampler
 
-from src.movement import Movement
 
-
-def MCsearch(n_steps, temperature, lattice_input):
+def MCsearch(
+    n_steps,
+    temperature,
+    lattice_input,
+    callback=None,
+    telemetry=None,
+    replica=0,
+    proposal=None,
+    pivot_probability=0.0,
+    statistics=None,
+    schedule=None,
+    energy_cutoff=None,
+    lowest=False,
+):
     """
     Perform a Monte Carlo search of the lattice.
 
@@ -15,55 +25,48 @@ def MCsearch(n_steps, temperature, lattice_input):
     lattice : Lattice
         Lattice on which to perform the search.
     temperature : float
-        Temperature of the search.
+        Temperature of the search, replaced at each step by the one of the
+        schedule if given.
+    callback : callable, optional
+        Called after each step with the step number and the current energy,
+        the search stops if it returns False.
+    telemetry : Telemetry, optional
+        Telemetry in which each step is recorded.
+    replica : int
+        Index of the replica under which the steps are recorded.
+    proposal : AdaptiveProposal, optional
+        Adaptive choice of the movement types, by default every valid
+        movement of a random residue is equally likely.
+    pivot_probability : float
+        Probability of a step to be a pivot movement around a random
+        residue, instead of a local movement.
+    statistics : EnsembleStatistics, optional
+        Statistics in which each step is recorded as a sample.
+    schedule : Schedule, optional
+        Cooling schedule of a simulated annealing search, which then returns
+        the lowest energy lattice found.
+    energy_cutoff : int, optional
+        Energy at which the search stops.
+    lowest : bool
+        Return the lowest energy lattice found instead of the final one.
 
     Returns
     -------
     Lattice
         Lattice with the protein placed on it.
     """
-    # copy the lattice
-    lattice = copy.deepcopy(lattice_input)
-
-    # compute the initial energy
-    energy = lattice.calculate_energy()
-    new_energy = energy
-
-    # perform the search
-    for _ in range(n_steps):
-        # choose a random residue
-        residue = np.random.choice(lattice.protein.residues)
-
-        # compute the movement
-        movements = []
-        if lattice.protein.is_end(residue):
-            movements.append(Movement("end", lattice, residue))
-        else:
-            if lattice.protein.is_corner(residue):
-                movements.append(Movement("corner", lattice, residue))
-                movements.append(Movement("crankshaft", lattice, residue))
-            movements.append(Movement("pull", lattice, residue))
-
-        # filter movements
-        movements = [m for m in movements if m.moved]
-
-        if movements:
-            random_movement = np.random.choice(movements)
-            new_energy = random_movement.lattice.calculate_energy()
-
-            # Boltzmann constant
-            K_b = 0.0019872041
-
-            # if the new energy is lower or if the Boltzmann condition is met
-            if new_energy <= energy or np.random.random() < np.exp(
-                -(new_energy - energy) / (temperature * K_b)
-            ):
-                # update the lattice
-                lattice = random_movement.lattice
-
-                # print(f"Iteration {i}, energy : {new_energy}")
-                # lattice.draw_grid()
-
-                # update the energy
-                energy = new_energy
-    return lattice
+    sampler = Sampler(
+        lattice_input,
+        temperature,
+        proposal=proposal,
+        pivot_probability=pivot_probability,
+        telemetry=telemetry,
+        replica=replica,
+        statistics=statistics,
+        schedule=schedule,
+    )
+    sampler.run(n_steps, callback, energy_cutoff)
+    sampler.close()
+    if schedule is not None or lowest:
+        return sampler.best_lattice
+    return sampler.lattice
@@ -0,0 +1,165 @@
+"""Population annealing of a population of conformations.
+
+A population of conformations is cooled down through a schedule of inverse
+temperatures, linear between the highest and the lowest temperature. At
+each new temperature, the members are reweighted by their Boltzmann factor
+and resampled in proportion to their weights, so that the population keeps
+its size while following the equilibrium of the new temperature. Every
+member then performs Monte Carlo sweeps, in chunks of the population spread
+across a pool of worker processes.
+
+The mean weights of the successive resamplings give an estimate of the
+reduced free-energy difference between the first and the last temperature
+of the schedule.
+"""
+
+import os
+import multiprocessing
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.sampler import K_b
+
+
+def _sweep_chunk(task):
+    """
+    Perform the Monte Carlo sweeps of a chunk of the population.
+
+    Parameters
+    ----------
+    task : tuple
+        Sequence of the protein, conformations of the chunk,
+        temperature, number of sweeps and random seed.
+
+    Returns
+    -------
+    tuple
+        Conformations and energies of the chunk after the sweeps.
+    """
+    sequence, conformations, temperature, n_sweeps, seed = task
+    np.random.seed(seed)
+
+    lattice = Lattice(Protein(sequence))
+    n_steps = n_sweeps * lattice.protein.length
+
+    energies = np.empty(len(conformations), dtype=sequence.model.matrix.dtype)
+    for member, conformation in enumerate(conformations):
+        lattice.set_conformation(conformation)
+        new_lattice = MCsearch(n_steps, temperature, lattice)
+        conformations[member] = new_lattice.get_conformation()
+        energies[member] = new_lattice.calculate_energy()
+    return conformations, energies
+
+
+def PAsearch(
+    population_size,
+    n_sweeps,
+    n_temperatures,
+    temperature_max,
+    temperature_min,
+    n_workers,
+    lattice_input,
+):
+    """
+    Perform a Population Annealing search on the lattice.
+
+    The whole population is stored in arrays, one row per member, so that
+    resampling is an index copy. Members are swept with Monte Carlo moves
+    in chunks spread across a pool of worker processes.
+
+    Parameters
+    ----------
+    population_size : int
+        Number of conformations in the population.
+    n_sweeps : int
+        Number of MC sweeps (one sweep is one step per residue)
+        performed on each member at each temperature.
+    n_temperatures : int
+        Number of temperatures in the cooling schedule.
+    temperature_max : float
+        Starting temperature of the schedule.
+    temperature_min : float
+        Final temperature of the schedule.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    lattice_input : Lattice
+        Lattice from which every member of the population starts.
+
+    Returns
+    -------
+    Lattice
+        Lattice with the lowest energy conformation found.
+    float
+        Estimate of the reduced free-energy difference between the last and
+        the first temperature of the schedule, -ln(Z(T_min) / Z(T_max)).
+    """
+    n_workers = n_workers or os.cpu_count()
+    # shared with the workers, with its energy model
+    sequence = lattice_input.protein.hp_sequence
+
+    # the population, of fixed size for the whole search
+    conformations = np.empty(
+        (population_size, lattice_input.protein.length, 2), dtype=np.int32
+    )
+    conformations[:] = lattice_input.get_conformation()
+    energies = np.full(
+        population_size, lattice_input.calculate_energy(), sequence.model.matrix.dtype
+    )
+
+    best_conformation = conformations[0].copy()
+    best_energy = energies[0]
+
+    # cool down linearly in inverse temperature
+    betas = np.linspace(
+        1 / (K_b * temperature_max), 1 / (K_b * temperature_min), n_temperatures
+    )
+    log_z = 0.0
+
+    chunks = np.array_split(np.arange(population_size), n_workers)
+    pool = multiprocessing.Pool(n_workers) if n_workers > 1 else None
+    try:
+        for step, beta in enumerate(betas):
+            if step > 0:
+                # Boltzmann reweighting of the population
+                log_weights = -(beta - betas[step - 1]) * energies
+                shift = log_weights.max()
+                weights = np.exp(log_weights - shift)
+                log_z += shift + np.log(weights.mean())
+
+                # resampling, the population keeps its size
+                indices = np.random.choice(
+                    population_size, size=population_size, p=weights / weights.sum()
+                )
+                conformations = conformations[indices]
+                energies = energies[indices]
+
+            tasks = [
+                (
+                    sequence,
+                    conformations[chunk],
+                    1 / (K_b * beta),
+                    n_sweeps,
+                    np.random.randint(2**31),
+                )
+                for chunk in chunks
+            ]
+            results = pool.map(_sweep_chunk, tasks) if pool else map(_sweep_chunk, tasks)
+            for chunk, (chunk_conformations, chunk_energies) in zip(chunks, results):
+                conformations[chunk] = chunk_conformations
+                energies[chunk] = chunk_energies
+
+            # keep track of the best conformation found
+            member = np.argmin(energies)
+            if energies[member] < best_energy:
+                best_energy = energies[member]
+                best_conformation = conformations[member].copy()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    lattice = Lattice(Protein(sequence))
+    lattice.set_conformation(best_conformation)
+    return lattice, -log_z
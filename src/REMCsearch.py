@@ -1,7 +1,18 @@
-import copy
 import numpy as np
 
-from src.MCsearch import MCsearch
+from src.sampler import Sampler, K_b
+from src.replicas import ReplicaState, BACKENDS
+
+
+def _exchange(state, owners, i, j):
+    """
+    Exchange the temperature rungs of the replicas at rungs i and j, with
+    their replica indices and adaptive proposals, which belong to the rungs.
+    """
+    first, second = owners[i], owners[j]
+    with state.lock:
+        state.ladder[first], state.ladder[second] = j, i
+    owners[i], owners[j] = second, first
 
 
 def REMCsearch(
@@ -12,6 +23,15 @@ def REMCsearch(
     temperature_min,
     temperature_max,
     lattice_input,
+    callback=None,
+    telemetry=None,
+    proposals=None,
+    pivot_probability=0.0,
+    statistics=None,
+    quench_interval=None,
+    backend="serial",
+    n_workers=None,
+    exchange_interval=1,
 ):
     """
     Perform a Replica Exchange Monte Carlo search on the lattice.
@@ -20,49 +40,115 @@ def REMCsearch(
     ----------
     n_replica : int
         Number of replicas to use.
-    nsteps : int
-        Number of steps to perform.
-    lattice : Lattice
-        Lattice on which to perform the search.
-    temperature : float
-        Temperature of the search.
+    energy_cutoff : int
+        Energy at which the search stops, None to run all its steps.
+    max_steps : int
+        Maximum number of exchange steps.
+    local_steps : int
+        Number of MC steps of each replica in an exchange step.
+    temperature_min : float
+        Temperature of the first replica.
+    temperature_max : float
+        Temperature of the last replica.
+    lattice_input : Lattice or list
+        Lattice on which to perform the search, or initial lattices of the
+        replicas, reused in turn if there are fewer lattices than replicas.
+    callback : callable, optional
+        Called after each exchange step with the step number and the lowest
+        energy among the replicas, the search stops if it returns False.
+    telemetry : Telemetry, optional
+        Telemetry in which each step of each replica is recorded.
+    proposals : list, optional
+        Adaptive choice of the movement types at each temperature,
+        one AdaptiveProposal per replica.
+    pivot_probability : float
+        Probability of a step to be a pivot movement.
+    statistics : EnsembleStatistics, optional
+        Statistics in which each step of each replica is recorded.
+    quench_interval : int, optional
+        Number of exchange steps between two quenches of the replicas, whose
+        local minima only update their lowest energy lattices.
+    backend : str
+        Executor running the replicas, serial, threads or processes, see
+        `src.replicas`. The telemetry needs the serial backend, and the
+        processes backend supports neither the adaptive proposals nor the
+        statistics.
+    n_workers : int, optional
+        Number of threads or worker processes, one per replica or all the
+        available CPUs if None.
+    exchange_interval : int
+        Number of exchange steps between two attempts to exchange the
+        temperatures of the replicas.
 
     Returns
     -------
     Lattice
-        Lattice with the protein placed on it.
+        Lowest energy lattice visited by the replicas.
     """
-    lattices = [copy.deepcopy(lattice_input) for _ in range(n_replica)]
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend}")
+    if telemetry is not None and backend != "serial":
+        raise ValueError("the telemetry needs the serial backend")
+    if statistics is not None and backend == "processes":
+        raise ValueError("the processes backend does not support the statistics")
+    if not isinstance(lattice_input, list):
+        lattice_input = [lattice_input]
+    if energy_cutoff is None:
+        energy_cutoff = -float("inf")
     temperatures = np.linspace(temperature_min, temperature_max, n_replica)
-    offset = 0
-    energy = 0
-    step = 0
-    while energy > energy_cutoff and step < max_steps:
-        for replica in range(n_replica):
-            lattice = MCsearch(local_steps, temperatures[replica], lattices[replica])
-            if lattice.calculate_energy() < lattices[replica].calculate_energy():
-                lattices[replica] = lattice
+    # samplers by replica, they keep their conformations and exchange
+    # their temperature rungs
+    samplers = [
+        Sampler(
+            lattice_input[replica % len(lattice_input)],
+            temperatures[replica],
+            proposal=proposals[replica] if proposals else None,
+            pivot_probability=pivot_probability,
+            telemetry=telemetry,
+            replica=replica,
+            statistics=statistics,
+        )
+        for replica in range(n_replica)
+    ]
+    dtype = lattice_input[0].protein.hp_sequence.model.matrix.dtype
+    state = ReplicaState(n_replica, dtype, shared=backend == "processes")
+    replicas = BACKENDS[backend](samplers, state, temperatures, proposals, n_workers)
+    try:
+        offset = 0
+        energy = state.best_energies.min().item()
+        step = 0
+        while energy > energy_cutoff and step < max_steps:
+            replicas.run(local_steps)
+            if quench_interval and (step + 1) % quench_interval == 0:
+                replicas.quench()
+
+            energy = state.best_energies.min().item()
+            if callback is not None and callback(step, energy) is False:
+                break
 
-        # if the replica with the minimum energy pass the cutoff
-        if min([l.calculate_energy() for l in lattices]) < energy_cutoff:
-            break
+            # if the replica with the minimum energy reaches the cutoff
+            if energy <= energy_cutoff:
+                break
 
-        i = offset
-        while i < (n_replica - 1):
-            j = i + 1
+            step += 1
+            if step % exchange_interval:
+                continue
 
-            # Boltzmann constant
-            K_b = 0.0019872041
+            owners = state.owners()
+            i = offset
+            while i < (n_replica - 1):
+                j = i + 1
 
-            # product of the energy difference and inverse temperature difference
-            delta = ((1 / (temperatures[j] * K_b)) - (1 / (temperatures[i] * K_b))) * (
-                lattices[i].calculate_energy() - lattices[j].calculate_energy()
-            )
+                # product of the energy difference and inverse temperature difference
+                delta = (
+                    (1 / (temperatures[j] * K_b)) - (1 / (temperatures[i] * K_b))
+                ) * (state.energies[owners[i]] - state.energies[owners[j]])
 
-            if delta <= 0 or np.random.random() <= np.exp(-delta):
-                lattices[i], lattices[j] = lattices[j], lattices[i]
-            i += 2
-        offset = 1 - offset
-        step += 1
-    # return the lattice with the lowest energy
-    return min(lattices, key=lambda x: x.calculate_energy())
+                if delta <= 0 or np.random.random() <= np.exp(-delta):
+                    _exchange(state, owners, i, j)
+                i += 2
+            offset = 1 - offset
+    finally:
+        # return the lattice with the lowest energy
+        lattice = replicas.close()
+    return lattice
@@ -0,0 +1,270 @@
+"""Tabu search over the local movements of a conformation.
+
+At each step, every valid end, corner, crankshaft and pull movement of the
+current conformation is scored at once (see `src.quench`), and the search
+moves to the lowest energy neighbor that is not in its tabu memory, even if
+its energy is higher. The memory holds the recently visited conformations,
+so that the search does not oscillate between the same few conformations.
+
+The conformations are keyed by a hash of their encoding in the result store
+(see `src.store.encode_conformation`), the turns of the chain, straight,
+left or right at each residue, which does not depend on their position,
+rotation or reflection on the lattice. The memory is bounded: once full, it evicts the
+oldest conformation (FIFO) or the least recently visited one (LRU).
+
+As the memory holds whole conformations, a tabu neighbor has already been
+visited and cannot beat the best energy found, so the aspiration criterion
+is by default: when all the neighbors are tabu, the search moves to the one
+visited the longest ago. When the best energy has not improved for a
+number of steps, the search restarts from the best conformation, perturbed
+by random pivot movements (diversification).
+"""
+
+import copy
+from collections import OrderedDict
+
+import numpy as np
+
+from src.movement import Movement
+from src.quench import enumerate_movements, energy_changes, apply_movement
+from src.store import encode_conformation
+
+# eviction orders of the tabu memory
+EVICTIONS = ("fifo", "lru")
+
+
+def conformation_key(conformation):
+    """
+    Return a hash of a conformation, invariant by translation, rotation and
+    reflection.
+
+    Parameters
+    ----------
+    conformation : numpy.ndarray
+        Coordinates of the residues, of shape (length, 2).
+
+    Returns
+    -------
+    int
+        Hash of the symmetry-invariant encoding of the conformation.
+    """
+    return hash(encode_conformation(conformation))
+
+
+class TabuMemory:
+    """
+    Bounded memory of the visited conformations.
+
+    Attributes
+    ----------
+    tenure : int
+        Number of conformations kept.
+    eviction : str
+        Order in which the conformations are evicted, fifo or lru.
+
+    Methods
+    -------
+    add(key):
+        Remember a visited conformation.
+    age(key):
+        Return when a remembered conformation was visited.
+    """
+
+    def __init__(self, tenure, eviction="fifo"):
+        """
+        Initialize an empty memory.
+
+        Parameters
+        ----------
+        tenure : int
+            Number of conformations kept.
+        eviction : str
+            Evict the oldest conformation (fifo) or the least recently
+            visited one (lru) once the memory is full.
+        """
+        if eviction not in EVICTIONS:
+            raise ValueError(f"unknown eviction order {eviction}")
+        self.tenure = tenure
+        self.eviction = eviction
+        self._keys = OrderedDict()
+        self._visits = 0
+
+    def add(self, key):
+        """
+        Remember a visited conformation.
+
+        Parameters
+        ----------
+        key : int
+            Key of the conformation, see `conformation_key`.
+        """
+        self._visits += 1
+        if key in self._keys:
+            if self.eviction == "lru":
+                self._keys.move_to_end(key)
+                self._keys[key] = self._visits
+            return
+        self._keys[key] = self._visits
+        if len(self._keys) > self.tenure:
+            self._keys.popitem(last=False)
+
+    def age(self, key):
+        """
+        Return when a remembered conformation was visited.
+
+        Parameters
+        ----------
+        key : int
+            Key of a remembered conformation.
+
+        Returns
+        -------
+        int
+            Number of visits since it was added, or since its last visit
+            with the lru eviction order.
+        """
+        return self._visits - self._keys[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _perturb(lattice, n_pivots, rng):
+    """
+    Apply random pivot movements to a lattice, return the perturbed lattice.
+    """
+    protein = lattice.protein
+    for _ in range(10 * n_pivots):
+        if not n_pivots:
+            break
+        residue = protein.residues[rng.randint(protein.length)]
+        movement = Movement("pivot", lattice, residue, rng)
+        if movement.moved:
+            lattice = movement.lattice
+            n_pivots -= 1
+    return lattice
+
+
+def TABUsearch(
+    n_steps,
+    tenure,
+    eviction,
+    stagnation,
+    perturbation,
+    energy_cutoff,
+    lattice_input,
+    callback=None,
+    seed=None,
+):
+    """
+    Perform a tabu search on the lattice.
+
+    Parameters
+    ----------
+    n_steps : int
+        Number of steps to perform.
+    tenure : int
+        Number of visited conformations kept in the tabu memory.
+    eviction : str
+        Eviction order of the tabu memory, fifo or lru.
+    stagnation : int
+        Number of steps without a new lowest energy before a diversification
+        restart, never restart if None.
+    perturbation : int
+        Number of random pivot movements applied to the best conformation
+        to restart from.
+    energy_cutoff : int
+        Energy at which the search stops, None to run all the steps.
+    lattice_input : Lattice
+        Lattice on which to perform the search.
+    callback : callable, optional
+        Called after each step with the step number and the lowest energy
+        found, the search stops if it returns False.
+    seed : int, optional
+        Seed of the random stream, drawn from the global one if None.
+
+    Returns
+    -------
+    Lattice
+        Lowest energy lattice found.
+    dict
+        Number of steps performed, of diversification restarts, of steps
+        whose neighbors were all tabu (aspirations) and of tabu neighbors
+        skipped.
+    """
+    if seed is None:
+        seed = np.random.randint(2**31)
+    rng = np.random.RandomState(seed)
+    if energy_cutoff is None:
+        energy_cutoff = -float("inf")
+    memory = TabuMemory(tenure, eviction)
+    report = {"steps": 0, "restarts": 0, "aspirations": 0, "tabu": 0}
+
+    lattice = copy.deepcopy(lattice_input)
+    conformation = lattice.get_conformation()
+    energy = lattice.calculate_energy()
+    memory.add(conformation_key(conformation))
+    best_lattice = copy.deepcopy(lattice)
+    best_energy = energy
+    since_best = 0
+
+    for step in range(n_steps):
+        if best_energy <= energy_cutoff:
+            break
+        movements = enumerate_movements(lattice)
+        if not movements:
+            break
+        changes = energy_changes(lattice, movements)
+        # by increasing energy change, ties in random order
+        order = rng.permutation(len(movements))
+        order = order[np.argsort(changes[order], kind="stable")]
+
+        # lowest energy neighbor that is not tabu, or the one visited the
+        # longest ago if they are all tabu
+        chosen = None
+        oldest = None
+        for candidate in order:
+            neighbor = conformation.copy()
+            for index, coords in movements[candidate]:
+                neighbor[index] = coords
+            key = conformation_key(neighbor)
+            if key not in memory:
+                chosen = (candidate, neighbor, key)
+                break
+            if oldest is None or memory.age(key) > memory.age(oldest[2]):
+                oldest = (candidate, neighbor, key)
+            report["tabu"] += 1
+        if chosen is None:
+            chosen = oldest
+            report["aspirations"] += 1
+        chosen, neighbor, key = chosen
+
+        apply_movement(lattice, movements[chosen])
+        conformation = neighbor
+        energy += changes[chosen].item()
+        memory.add(key)
+        report["steps"] = step + 1
+
+        if energy < best_energy:
+            best_lattice = copy.deepcopy(lattice)
+            best_energy = energy
+            since_best = 0
+        else:
+            since_best += 1
+
+        if callback is not None and callback(step, best_energy) is False:
+            break
+
+        # diversification restart around the best conformation
+        if stagnation and since_best >= stagnation:
+            lattice = _perturb(copy.deepcopy(best_lattice), perturbation, rng)
+            conformation = lattice.get_conformation()
+            energy = lattice.calculate_energy()
+            memory.add(conformation_key(conformation))
+            since_best = 0
+            report["restarts"] += 1
+
+    return best_lattice, report
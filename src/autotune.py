@@ -0,0 +1,287 @@
+"""Tuning of the REMC parameters by successive halving.
+
+Configurations of the number of replicas, the local steps, the temperature
+range and the exchange interval are drawn from a grid, then raced in
+rounds: every remaining configuration runs the same seeded searches, each
+limited to a CPU time budget and stopped once it reaches the target energy.
+The configurations are ranked by their expected time to reach the target,
+the total CPU time of their runs divided by their number of successes, i.e.
+the expected time of restarting runs of the budget until one succeeds. The
+best half is kept, with twice the budget, until one configuration remains.
+
+The tuned configurations are saved in a JSON file of profiles, keyed by
+bucket of sequence length, from which `fold.py` reads the REMC options not
+given on the command line.
+"""
+
+import os
+import json
+import time
+import multiprocessing
+
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice
+from src.REMCsearch import REMCsearch
+
+# values of the tuned REMC parameters
+SPACE = {
+    "n_replica": (2, 4, 6, 8),
+    "local_steps": (25, 50, 100, 200),
+    "temperature_min": (120.0, 140.0, 160.0, 180.0),
+    "temperature_max": (200.0, 240.0, 280.0, 320.0),
+    "exchange_interval": (1, 2, 4),
+}
+
+# file of the tuned profiles, read by default by fold.py
+DEFAULT_PROFILES = "profiles/REMC.json"
+
+
+def length_bucket(length):
+    """
+    Return the bucket of a sequence length, between two powers of two.
+
+    Parameters
+    ----------
+    length : int
+        Length of the sequence.
+
+    Returns
+    -------
+    str
+        Bucket of the length, e.g. 32-63.
+    """
+    low = 1 << (max(length, 1).bit_length() - 1)
+    return f"{low}-{2 * low - 1}"
+
+
+def sample_configurations(n_configs, rng):
+    """
+    Draw distinct configurations of the REMC parameters from the grid.
+
+    Parameters
+    ----------
+    n_configs : int
+        Number of configurations, at most the size of the grid.
+    rng : numpy.random.RandomState
+        Random stream of the draws.
+
+    Returns
+    -------
+    list
+        Configurations, as dicts of the tuned parameters.
+    """
+    sizes = [len(values) for values in SPACE.values()]
+    n_configs = min(n_configs, int(np.prod(sizes)))
+    indices = rng.choice(int(np.prod(sizes)), size=n_configs, replace=False)
+    configs = []
+    for index in indices:
+        config = {}
+        for (name, values), position in zip(
+            SPACE.items(), np.unravel_index(index, sizes)
+        ):
+            config[name] = values[position]
+        configs.append(config)
+    return configs
+
+
+def _run_trial(task):
+    """
+    Run one seeded, budget-limited REMC search of a configuration.
+
+    Parameters
+    ----------
+    task : tuple
+        Index of the configuration, configuration, sequence, target energy,
+        CPU time budget in seconds and random seed.
+
+    Returns
+    -------
+    tuple
+        Index of the configuration, whether the target was reached, CPU
+        time of the run and lowest energy reached.
+    """
+    index, config, sequence, target, budget, seed = task
+    np.random.seed(seed)
+    lattice = Lattice(Protein(sequence), "random")
+    start = time.process_time()
+    lowest = lattice.calculate_energy()
+
+    def callback(step, energy):
+        nonlocal lowest
+        lowest = min(lowest, energy)
+        return time.process_time() - start < budget
+
+    lattice = REMCsearch(
+        **config,
+        energy_cutoff=target,
+        max_steps=10**9,
+        lattice_input=lattice,
+        callback=callback,
+    )
+    lowest = min(lowest, lattice.calculate_energy())
+    return index, lowest <= target, time.process_time() - start, lowest
+
+
+def expected_time(trials):
+    """
+    Return the expected CPU time to reach the target of a configuration.
+
+    Parameters
+    ----------
+    trials : list
+        Whether each run reached the target, with its CPU time.
+
+    Returns
+    -------
+    float
+        Total CPU time of the runs divided by their number of successes,
+        infinite if none succeeded.
+    """
+    successes = sum(reached for reached, _ in trials)
+    if not successes:
+        return float("inf")
+    return sum(cpu for _, cpu in trials) / successes
+
+
+def successive_halving(
+    sequence,
+    target,
+    n_configs=16,
+    n_runs=4,
+    budget=1.0,
+    n_workers=None,
+    seed=0,
+    progress=None,
+):
+    """
+    Race configurations of the REMC parameters by successive halving.
+
+    Parameters
+    ----------
+    sequence : str
+        Sequence of the protein.
+    target : int
+        Energy to reach.
+    n_configs : int
+        Number of configurations drawn from the grid.
+    n_runs : int
+        Number of seeded runs of each configuration per round, with the
+        same seeds for all the configurations.
+    budget : float
+        CPU time budget of each run of the first round, in seconds, doubled
+        at each round.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    seed : int
+        Seed of the configurations and of the first run.
+    progress : callable, optional
+        Called after each round with its budget and its ranking, a list of
+        (configuration, expected time, success rate, mean lowest energy).
+
+    Returns
+    -------
+    dict
+        Best configuration.
+    float
+        Expected CPU time to reach the target of the best configuration,
+        in its last round.
+    """
+    configs = sample_configurations(n_configs, np.random.RandomState(seed))
+    with multiprocessing.Pool(n_workers) as pool:
+        while True:
+            tasks = [
+                (index, config, sequence, target, budget, seed + run)
+                for index, config in enumerate(configs)
+                for run in range(n_runs)
+            ]
+            trials = [[] for _ in configs]
+            lowest = [[] for _ in configs]
+            for index, reached, cpu, energy in pool.imap_unordered(_run_trial, tasks):
+                trials[index].append((reached, cpu))
+                lowest[index].append(energy)
+
+            # by expected time, then by mean lowest energy if none succeeds
+            ranking = sorted(
+                (
+                    (
+                        config,
+                        expected_time(trials[index]),
+                        np.mean([reached for reached, _ in trials[index]]),
+                        np.mean(lowest[index]),
+                    )
+                    for index, config in enumerate(configs)
+                ),
+                key=lambda entry: (entry[1], entry[3]),
+            )
+            if progress is not None:
+                progress(budget, ranking)
+            if len(configs) == 1:
+                return ranking[0][0], ranking[0][1]
+            configs = [entry[0] for entry in ranking[: (len(ranking) + 1) // 2]]
+            budget *= 2
+
+
+def save_profile(path, sequence, config, expected, target):
+    """
+    Save a tuned configuration as the profile of a length bucket.
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSON file of the profiles, updated if it exists.
+    sequence : str
+        Sequence the configuration was tuned on.
+    config : dict
+        Tuned configuration.
+    expected : float
+        Expected CPU time to reach the target, in seconds.
+    target : int
+        Target energy.
+
+    Returns
+    -------
+    str
+        Length bucket of the profile.
+    """
+    profiles = {}
+    if os.path.exists(path):
+        with open(path, "r") as handle:
+            profiles = json.load(handle)
+    bucket = length_bucket(len(sequence))
+    profiles[bucket] = {
+        **config,
+        "sequence": sequence,
+        "target": target,
+        "expected_time": None if np.isinf(expected) else expected,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(profiles, handle, indent=2, sort_keys=True)
+    return bucket
+
+
+def load_profile(path, length):
+    """
+    Return the tuned configuration of the bucket of a sequence length.
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSON file of the profiles.
+    length : int
+        Length of the sequence.
+
+    Returns
+    -------
+    dict
+        Tuned REMC parameters, None if the file or the bucket is missing.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r") as handle:
+        profile = json.load(handle).get(length_bucket(length))
+    if profile is None:
+        return None
+    return {name: profile[name] for name in SPACE}
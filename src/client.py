@@ -0,0 +1,184 @@
+"""Client of the folding server.
+
+Small blocking client speaking the JSON lines protocol of `src.server`.
+
+Example
+-------
+>>> with FoldClient("/tmp/fold.sock") as client:
+...     result = client.fold(["-p", "HPHPPHHPHPPHPHHPPHPH", "MC", "-n", "500"])
+...     print(result["energy"])
+"""
+
+# standard library
+import collections
+import json
+import socket
+
+
+class FoldClient:
+    """
+    Submit folding jobs to a folding server.
+
+    Methods
+    -------
+    submit(args, timeout):
+        Queue a job and return its identifier.
+    cancel(job_id):
+        Cancel a queued or running job.
+    events():
+        Iterate over the events sent by the server.
+    wait(job_id, progress):
+        Wait for the final event of a job.
+    fold(args, timeout, progress):
+        Run a job and return its final event.
+    close():
+        Close the connection.
+    """
+
+    def __init__(self, socket_path=None, host="127.0.0.1", port=None):
+        """
+        Connect to a folding server.
+
+        Parameters
+        ----------
+        socket_path : str
+            Path of the Unix socket of the server.
+        host : str
+            Host of the server if no socket path is given.
+        port : int
+            Port of the server if no socket path is given.
+        """
+        if socket_path:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(socket_path)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile("rwb")
+        # events received while waiting for another one
+        self._pending = collections.deque()
+
+    def _request(self, message):
+        self._file.write((json.dumps(message) + "\n").encode())
+        self._file.flush()
+
+    def _receive(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connection closed by the server")
+        return json.loads(line)
+
+    def submit(self, args, timeout=None):
+        """
+        Queue a job and return its identifier.
+
+        Parameters
+        ----------
+        args : list
+            Command line arguments of the job, as given to `fold.py`.
+        timeout : float
+            Time limit of the job in seconds, the server default if None.
+
+        Returns
+        -------
+        Identifier of the job.
+        """
+        request = {"op": "submit", "args": list(args)}
+        if timeout is not None:
+            request["timeout"] = timeout
+        self._request(request)
+
+        # jobs are queued in order, the first queued or error event without
+        # a pending job is the answer to this request
+        while True:
+            event = self._receive()
+            if event["event"] == "queued":
+                return event["job"]
+            if event["event"] == "error" and "job" in event:
+                self._pending.append(event)
+                return event["job"]
+            self._pending.append(event)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+
+        Parameters
+        ----------
+        job_id : int
+            Identifier of the job.
+        """
+        self._request({"op": "cancel", "job": job_id})
+
+    def events(self):
+        """
+        Iterate over the events sent by the server.
+
+        Yields
+        ------
+        dict
+            Event sent by the server.
+        """
+        while True:
+            yield self._pending.popleft() if self._pending else self._receive()
+
+    def wait(self, job_id, progress=None):
+        """
+        Wait for the final event of a job.
+
+        Parameters
+        ----------
+        job_id : int
+            Identifier of the job.
+        progress : callable, optional
+            Called with each progress event of the job.
+
+        Returns
+        -------
+        dict
+            Result, cancelled or error event of the job.
+        """
+        skipped = []
+        try:
+            for event in self.events():
+                if event.get("job") != job_id:
+                    skipped.append(event)
+                elif event["event"] == "progress":
+                    if progress is not None:
+                        progress(event)
+                elif event["event"] != "queued":
+                    return event
+        finally:
+            self._pending.extendleft(reversed(skipped))
+
+    def fold(self, args, timeout=None, progress=None):
+        """
+        Run a job and return its final event.
+
+        Parameters
+        ----------
+        args : list
+            Command line arguments of the job, as given to `fold.py`.
+        timeout : float
+            Time limit of the job in seconds, the server default if None.
+        progress : callable, optional
+            Called with each progress event of the job.
+
+        Returns
+        -------
+        dict
+            Result, cancelled or error event of the job.
+        """
+        return self.wait(self.submit(args, timeout), progress)
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
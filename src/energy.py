@@ -0,0 +1,211 @@
+"""Interaction energy models of the lattice.
+
+An energy model is an alphabet of residue types and a symmetric matrix of
+the energy of a contact between two residues, neighbors on the lattice but
+not consecutive in the chain. Sequences are encoded as the indices of their
+residues in the alphabet, so that the energy of a contact is a lookup in
+the matrix.
+
+- HP: hydrophobic (H) and polar (P) residues, -1 per H-H contact.
+- HPNX: hydrophobic (H), positive (P), negative (N) and neutral (X)
+  residues, -4 per H-H contact, +1 between charges of the same sign and -1
+  between opposite charges (Backofen, Will and Bornberg-Bauer).
+- Matrices read from a file, e.g. the Miyazawa-Jernigan contact potentials
+  over the 20 amino acids, see `load_matrix`.
+"""
+
+import numpy as np
+
+# amino acids mapped to the hydrophobic residues
+HYDROPHOBIC = "AILMFVPGWC"
+
+
+class EnergyModel:
+    """
+    Residue alphabet and contact energy matrix.
+
+    Attributes
+    ----------
+    name : str
+        Name of the model.
+    alphabet : str
+        Residue types, in the order of the rows of the matrix.
+    matrix : numpy.ndarray
+        Read-only symmetric matrix of the contact energies.
+    table : list
+        Rows of the matrix as lists, for fast lookups.
+    interacting : frozenset
+        Codes of the residue types with at least one non-zero contact energy.
+    conversion : dict
+        Residue type of the amino acids, None if the sequences are expected
+        in the alphabet of the model.
+    default : str
+        Residue type of the amino acids missing from `conversion`.
+
+    Methods
+    -------
+    encode(sequence):
+        Return the codes of the residues of a sequence.
+    convert(sequence):
+        Convert an amino acid sequence to the alphabet of the model.
+    """
+
+    def __init__(self, name, alphabet, matrix, conversion=None, default=None):
+        """
+        create EnergyModel object
+
+        Parameters
+        ----------
+        name : str
+            Name of the model.
+        alphabet : str
+            Residue types, in the order of the rows of the matrix.
+        matrix : array-like
+            Symmetric matrix of the contact energies.
+        conversion : dict, optional
+            Residue type of the amino acids, the sequences are expected in
+            the alphabet of the model if None.
+        default : str, optional
+            Residue type of the amino acids missing from `conversion`.
+        """
+        matrix = np.array(matrix)
+        if matrix.shape != (len(alphabet), len(alphabet)):
+            raise ValueError(
+                f"energy matrix of shape {matrix.shape} for {len(alphabet)} residue types"
+            )
+        if not np.array_equal(matrix, matrix.T):
+            raise ValueError("energy matrix is not symmetric")
+        matrix.flags.writeable = False
+
+        self.name = name
+        self.alphabet = alphabet
+        self.matrix = matrix
+        self.table = matrix.tolist()
+        self.interacting = frozenset(np.flatnonzero(matrix.any(axis=1)).tolist())
+        self.conversion = conversion
+        self.default = default
+        self._codes = {letter: code for code, letter in enumerate(alphabet)}
+
+    def encode(self, sequence):
+        """
+        Return the codes of the residues of a sequence.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence in the alphabet of the model.
+
+        Returns
+        -------
+        tuple
+            Index of each residue in the alphabet.
+        """
+        try:
+            return tuple(self._codes[letter] for letter in sequence)
+        except KeyError as error:
+            raise ValueError(
+                f"residue {error.args[0]} not in the {self.name} alphabet {self.alphabet}"
+            ) from None
+
+    def convert(self, sequence):
+        """
+        Convert an amino acid sequence to the alphabet of the model.
+
+        Parameters
+        ----------
+        sequence : str
+            Amino acid sequence, or sequence already in the alphabet of the
+            model, which is returned unchanged.
+
+        Returns
+        -------
+        Sequence in the alphabet of the model.
+        """
+        if not sequence.strip(self.alphabet) or self.conversion is None:
+            return sequence
+        return "".join(self.conversion.get(r, self.default) for r in sequence)
+
+    def __str__(self):
+        return self.name
+
+
+HP = EnergyModel(
+    "HP",
+    "HP",
+    [[-1, 0], [0, 0]],
+    conversion={r: "H" for r in HYDROPHOBIC},
+    default="P",
+)
+
+HPNX = EnergyModel(
+    "HPNX",
+    "HPNX",
+    [
+        [-4, 0, 0, 0],
+        [0, 1, -1, 0],
+        [0, -1, 1, 0],
+        [0, 0, 0, 0],
+    ],
+    conversion={
+        **{r: "H" for r in HYDROPHOBIC},
+        **{r: "P" for r in "KRH"},
+        **{r: "N" for r in "DE"},
+    },
+    default="X",
+)
+
+# energy models by name
+MODELS = {"HP": HP, "HPNX": HPNX}
+
+
+def load_matrix(path, name=None):
+    """
+    Read an energy model from a text file.
+
+    The first line lists the residue types, separated by spaces. Each
+    following line is a row of the matrix, optionally starting with its
+    residue type, either full or as the lower or upper triangle. Lines
+    starting with # are ignored. Sequences are expected in the alphabet of
+    the file, e.g. the 20 one-letter codes of the amino acids.
+
+    Parameters
+    ----------
+    path : str
+        Path of the matrix file.
+    name : str, optional
+        Name of the model, the path if None.
+
+    Returns
+    -------
+    EnergyModel
+        Energy model of the matrix.
+    """
+    with open(path, "r") as handle:
+        lines = [
+            line.split() for line in handle if line.strip() and not line.startswith("#")
+        ]
+    alphabet = "".join(lines[0])
+    size = len(alphabet)
+    # skip the residue types heading the rows
+    rows = [
+        [float(value) for value in (row[1:] if row[0].isalpha() else row)]
+        for row in lines[1:]
+    ]
+    lengths = [len(row) for row in rows]
+
+    matrix = np.zeros((size, size))
+    if lengths == [size] * size:
+        matrix[:] = rows
+    elif lengths == [i + 1 for i in range(size)]:
+        for i, row in enumerate(rows):
+            matrix[i, : i + 1] = row
+            matrix[: i + 1, i] = row
+    elif lengths == [size - i for i in range(size)]:
+        for i, row in enumerate(rows):
+            matrix[i, i:] = row
+            matrix[i:, i] = row
+    else:
+        raise ValueError(
+            f"{path} is neither a full nor a triangular matrix of {size} residue types"
+        )
+    return EnergyModel(name or path, alphabet, matrix)
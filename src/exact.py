@@ -0,0 +1,362 @@
+"""Exact ground states of short sequences by branch and bound.
+
+Self-avoiding conformations are enumerated depth first. Rotations and
+reflections are broken by fixing the first bond and the direction of the
+first turn, so that each conformation is enumerated once up to symmetry.
+A branch is pruned when the contacts already made, plus an upper bound of
+the contacts the remaining residues can make, cannot reach the best number
+of contacts found.
+
+The bound caps the contacts a residue makes with the residues before it:
+at most 2 sites are free around a residue of the chain (3 for the last
+one), and on the square lattice two residues can only be in contact if
+their indices have opposite parity and differ by at least 3. As every
+contact joins an even and an odd residue, the whole chain cannot make more
+contacts than the H residues of either parity can hold.
+
+The search is parallelized by enumerating the prefixes of the chain up to
+a given depth and spreading them across a pool of worker processes, which
+share the best number of contacts found to prune their branches.
+"""
+
+# standard library
+import os
+import multiprocessing
+
+import numpy as np
+
+# local
+from src.protein import Protein
+from src.lattice import Lattice, center_conformation
+
+# unit steps of the square lattice
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# longest sequence for which the energy cutoff is computed exactly
+MAX_EXACT_LENGTH = 25
+
+# best number of contacts and number of conformations reaching it,
+# shared by the searches of all the worker processes
+_shared_best = None
+_shared_found = None
+
+
+def contact_bounds(sequence):
+    """
+    Return the upper bounds of the contacts made by the end of a chain.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+
+    Returns
+    -------
+    list
+        Upper bound of the contacts made by the residues from each index to
+        the end of the chain with the residues before them, with one more
+        entry of 0 for the end of the chain.
+    int
+        Upper bound of the contacts of the whole chain.
+    """
+    length = len(sequence)
+
+    # every contact joins an even and an odd residue, each in at most 2
+    # contacts (3 at the ends of the chain)
+    capacity = [0, 0]
+    for i, residue in enumerate(sequence):
+        if residue == "H":
+            capacity[i % 2] += 3 if i in (0, length - 1) else 2
+
+    caps = []
+    for j, residue in enumerate(sequence):
+        if residue != "H":
+            caps.append(0)
+            continue
+        partners = sum(
+            1 for i in range(j - 2) if sequence[i] == "H" and (j - i) % 2 == 1
+        )
+        caps.append(min(3 if j == length - 1 else 2, partners))
+    bounds = [0] * (length + 1)
+    for j in range(length - 1, -1, -1):
+        bounds[j] = bounds[j + 1] + caps[j]
+    return bounds, min(min(capacity), bounds[0])
+
+
+class _BranchAndBound:
+    """
+    Depth-first branch and bound from a prefix of the chain.
+    """
+
+    def __init__(self, sequence, max_conformations):
+        self.sequence = sequence
+        self.length = len(sequence)
+        self.bounds, self.max_contacts = contact_bounds(sequence)
+        self.max_conformations = max_conformations
+        # contacts of the conformations found
+        self.level = -1
+        self.conformations = []
+        self.nodes = 0
+        self.best = -1
+        self.prune_ties = False
+        self._sync()
+
+    def run(self, chain, turned, contacts):
+        positions = {site: index for index, site in enumerate(chain)}
+        self._extend(chain, positions, turned, contacts)
+        return self.level, self.conformations, self.nodes
+
+    def _sync(self):
+        """
+        Read the best number of contacts found by all the searches.
+        """
+        self.best = max(self.best, _shared_best.value)
+        self.prune_ties = _shared_found.value >= self.max_conformations
+
+    def _record(self, chain, contacts):
+        """
+        Keep a conformation reaching the best number of contacts.
+        """
+        self._sync()
+        if contacts > self.best:
+            _shared_best.value = self.best = contacts
+            _shared_found.value = 0
+        elif contacts < self.best or self.prune_ties:
+            return
+        if contacts > self.level:
+            self.level = contacts
+            self.conformations = []
+        self.conformations.append(list(chain))
+        _shared_found.value += 1
+        self.prune_ties = _shared_found.value >= self.max_conformations
+
+    def _extend(self, chain, positions, turned, contacts):
+        index = len(chain)
+        if index == self.length:
+            self._record(chain, contacts)
+            return
+
+        self.nodes += 1
+        if self.nodes % 1024 == 0:
+            self._sync()
+        bound = min(contacts + self.bounds[index], self.max_contacts)
+        if bound < self.best or (bound == self.best and self.prune_ties):
+            return
+
+        # try the sites making the most contacts first
+        x, y = chain[-1]
+        moves = []
+        for dx, dy in DIRECTIONS:
+            # the first turn is always to the same side
+            if not turned and dx == 1:
+                continue
+            site = (x + dx, y + dy)
+            if site in positions:
+                continue
+            gained = 0
+            if self.sequence[index] == "H":
+                for ndx, ndy in DIRECTIONS:
+                    neighbor = positions.get((site[0] + ndx, site[1] + ndy))
+                    if (
+                        neighbor is not None
+                        and neighbor < index - 1
+                        and self.sequence[neighbor] == "H"
+                    ):
+                        gained += 1
+            moves.append((gained, site, dx != 0))
+        moves.sort(key=lambda move: -move[0])
+
+        for gained, site, turn in moves:
+            chain.append(site)
+            positions[site] = index
+            self._extend(chain, positions, turned or turn, contacts + gained)
+            del positions[site]
+            chain.pop()
+
+
+def _prefixes(sequence, depth):
+    """
+    Enumerate the prefixes of the chain, up to symmetry.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    depth : int
+        Number of residues of the prefixes.
+
+    Returns
+    -------
+    list
+        (chain, turned, contacts) tuples, one per self-avoiding prefix.
+    """
+    prefixes = [([(0, 0), (0, 1)], False, 0)]
+    for index in range(2, depth):
+        extended = []
+        for chain, turned, contacts in prefixes:
+            positions = {site: i for i, site in enumerate(chain)}
+            x, y = chain[-1]
+            for dx, dy in DIRECTIONS:
+                site = (x + dx, y + dy)
+                if (not turned and dx == 1) or site in positions:
+                    continue
+                gained = 0
+                if sequence[index] == "H":
+                    for ndx, ndy in DIRECTIONS:
+                        neighbor = positions.get((site[0] + ndx, site[1] + ndy))
+                        if (
+                            neighbor is not None
+                            and neighbor != index - 1
+                            and sequence[neighbor] == "H"
+                        ):
+                            gained += 1
+                extended.append((chain + [site], turned or dx != 0, contacts + gained))
+        prefixes = extended
+    return prefixes
+
+
+def _init_worker(shared_best, shared_found):
+    global _shared_best, _shared_found
+    _shared_best = shared_best
+    _shared_found = shared_found
+
+
+def _solve_prefix(task):
+    """
+    Run the branch and bound from a prefix of the chain.
+
+    Parameters
+    ----------
+    task : tuple
+        Sequence of the protein, prefix (chain, turned, contacts) and
+        maximum number of conformations.
+
+    Returns
+    -------
+    tuple
+        Number of contacts of the conformations found, -1 if none reaches
+        the best known, the conformations and the number of nodes explored.
+    """
+    sequence, (chain, turned, contacts), max_conformations = task
+    search = _BranchAndBound(sequence, max_conformations)
+    return search.run(list(chain), turned, contacts)
+
+
+def ground_states(sequence, n_workers=None, max_conformations=100, prefix_depth=None):
+    """
+    Return the ground-state energy and conformations of a sequence.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    max_conformations : int
+        Maximum number of ground-state conformations returned.
+    prefix_depth : int
+        Length of the prefixes spread across the workers, chosen from the
+        number of workers if None.
+
+    Returns
+    -------
+    int
+        Ground-state energy.
+    list
+        Ground-state conformations, as arrays of shape (length, 2), up to
+        rotations and reflections.
+    int
+        Number of nodes explored.
+    """
+    length = len(sequence)
+    if length < 3:
+        return 0, [np.array([(0, i) for i in range(length)], dtype=np.int32)], 0
+    n_workers = n_workers or os.cpu_count()
+    if prefix_depth is None:
+        # enough prefixes to balance the load of the workers
+        prefix_depth = 2
+        while (
+            prefix_depth < length - 1
+            and len(_prefixes(sequence, prefix_depth)) < 64 * n_workers
+        ):
+            prefix_depth += 1
+    prefix_depth = max(2, min(prefix_depth, length - 1))
+
+    tasks = [
+        (sequence, prefix, max_conformations)
+        for prefix in _prefixes(sequence, prefix_depth)
+    ]
+    shared = (multiprocessing.RawValue("i", -1), multiprocessing.RawValue("i", 0))
+    if n_workers > 1:
+        with multiprocessing.Pool(
+            n_workers, initializer=_init_worker, initargs=shared
+        ) as pool:
+            results = list(pool.imap_unordered(_solve_prefix, tasks))
+    else:
+        _init_worker(*shared)
+        try:
+            results = [_solve_prefix(task) for task in tasks]
+        finally:
+            _init_worker(None, None)
+
+    best = max(result[0] for result in results)
+    conformations = [
+        np.array(conformation, dtype=np.int32)
+        for contacts, found, _ in results
+        if contacts == best
+        for conformation in found
+    ][:max_conformations]
+    return -best, conformations, sum(nodes for _, _, nodes in results)
+
+
+def energy_cutoff(sequence, n_workers=None):
+    """
+    Return the lowest energy a search of a sequence can reach.
+
+    The bound of the contacts is not used beyond MAX_EXACT_LENGTH residues,
+    as it is rarely reached and a search would never stop at it.
+
+    Parameters
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    n_workers : int
+        Number of worker processes of the exact search.
+
+    Returns
+    -------
+    int
+        Ground-state energy for sequences up to MAX_EXACT_LENGTH residues,
+        None for longer ones.
+    """
+    if len(sequence) > MAX_EXACT_LENGTH:
+        return None
+    energy, _, _ = ground_states(sequence, n_workers, max_conformations=1)
+    return energy
+
+
+def EXACTsearch(n_workers, max_conformations, lattice_input):
+    """
+    Find the ground states of the protein of a lattice.
+
+    Parameters
+    ----------
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    max_conformations : int
+        Maximum number of ground-state conformations returned.
+    lattice_input : Lattice
+        Lattice of the protein to fold.
+
+    Returns
+    -------
+    Lattice
+        Lattice with the first ground-state conformation found.
+    list
+        Ground-state conformations, up to rotations and reflections.
+    """
+    sequence = lattice_input.protein.sequence
+    _, conformations, _ = ground_states(sequence, n_workers, max_conformations)
+    lattice = Lattice(Protein(sequence))
+    lattice.set_conformation(center_conformation(conformations[0], lattice.size))
+    return lattice, conformations
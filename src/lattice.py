@@ -2,14 +2,24 @@
 
 Proteins are folded into lattices. The lattice is a grid of cells.
 Each cell can contain a residue or be empty. The grid is a square.
+
+The cells are stored in a flat array, row by row, surrounded by a ring of
+BORDER cells. The four neighbors of a cell are then at constant offsets of
+its flat index, and the neighbors of a cell of the grid never need a bounds
+check: outside of the grid, they are border cells, neither empty nor
+occupied. The 2-D `grid` is a view of the inside of the ring.
 """
 
 # standard library
 from copy import deepcopy
 import numpy as np
 
-# local
-from src.residue import Residue
+# value of the empty cells of the grid
+EMPTY = -1
+# value of the ring of cells around the grid
+BORDER = -2
+# directions of the neighbors, in the order of the flat offsets
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
 
 
 class Lattice:
@@ -20,13 +30,22 @@ class Lattice:
     ----------
     size : int
         Size of the grid.
+    cells : numpy.ndarray
+        Flat array of the indices of the residues, row by row with a ring
+        of BORDER cells around the grid, EMPTY for empty cells.
+    stride : int
+        Length of a row of the flat array, the size plus the border.
+    offsets : tuple
+        Offsets of the flat indices of the four neighbors of a cell.
     grid : numpy.ndarray
-        Grid of characters.
+        View of the cells inside of the border, as a 2-D grid.
     protein : Protein
         Protein to place on the grid.
 
     Methods
     -------
+    flat_index(coords):
+        Return the index of the given coordinates in the flat cells.
     get_residue(coords):
         Return the residue at the given coordinates.
     place_residue(residue, coords):
@@ -37,6 +56,10 @@ class Lattice:
         Remove a residue from the grid.
     fill_grid(protein):
         Fill the grid with a random generated conformation.
+    get_conformation():
+        Return the coordinates of every residue as an array.
+    set_conformation(conformation):
+        Place every residue at the given coordinates.
     is_empty(coords):
         Check if the given coordinates are empty.
     neighbors(coords):
@@ -49,13 +72,12 @@ class Lattice:
         Check if the given coordinates are neighbors.
     calculate_energy():
         Calculate the energy of the lattice.
-    calculate_energy_change(residue, coords):
-        Calculate the energy change change of the lattice
-        if a residue is moved to the given coordinates.
     draw_grid():
         Draw the lattice in the terminal.
     """
 
+    __slots__ = ("size", "stride", "offsets", "cells", "grid", "protein")
+
     def __init__(self, protein, initial_placement_mode="linear"):
         """
         Initialize an empty lattice.
@@ -69,10 +91,37 @@ class Lattice:
             Either linear or random.
         """
         self.size = protein.length * 2
-        self.grid = np.ndarray(shape=(self.size, self.size), dtype=Residue)
+        self._set_cells(np.full((self.size + 2) ** 2, BORDER, dtype=np.int16))
+        self.grid[:] = EMPTY
         self.protein = protein
         self.fill_grid(initial_placement_mode)
 
+    def _set_cells(self, cells):
+        """
+        Use a flat array of cells, with the offsets of the neighbors and
+        the 2-D view of the grid inside of its border.
+        """
+        stride = self.size + 2
+        self.stride = stride
+        self.offsets = (-stride, stride, -1, 1)
+        self.cells = cells
+        self.grid = cells.reshape(stride, stride)[1:-1, 1:-1]
+
+    def flat_index(self, coords):
+        """
+        Return the index of the given coordinates in the flat cells.
+
+        Parameters
+        ----------
+        coords : tuple
+            Coordinates of the grid, or of the border ring around it.
+
+        Returns
+        -------
+        Index of the cell in the flat array.
+        """
+        return (coords[0] + 1) * self.stride + coords[1] + 1
+
     def get_residue(self, coords):
         """
         Return the residue at the given coordinates.
@@ -84,9 +133,13 @@ class Lattice:
 
         Returns
         -------
-        Residue at the given coordinates.
+        Residue at the given coordinates, None if the cell is empty or on
+        the border.
         """
-        return self.grid[coords]
+        index = self.cells.item(self.flat_index(coords))
+        if index < 0:
+            return None
+        return self.protein.residues[index]
 
     def place_residue(self, residue, coords):
         """
@@ -99,7 +152,7 @@ class Lattice:
         coords : tuple
             Coordinates of the residue.
         """
-        self.grid[coords] = residue
+        self.cells[self.flat_index(coords)] = residue.index
         residue.set_coords(coords)
 
     def move_residue(self, residue, coords):
@@ -125,16 +178,16 @@ class Lattice:
         coords : tuple
             Coordinates of the residue to remove.
         """
-        self.grid[coords] = None
+        self.cells[self.flat_index(coords)] = EMPTY
 
     def fill_grid(self, mode):
         """
-        Fill the grid with a random generated conformation.
+        Fill the grid with a linear or a random conformation.
 
         Parameters
         ----------
-        protein : Protein
-            Protein to place on the grid.
+        mode : str
+            Placement mode, either linear or random.
         """
         if mode == "linear":
             start_i = self.size // 2
@@ -146,33 +199,70 @@ class Lattice:
                 self.place_residue(self.protein.get_residue(i), (start_i, start_j + i))
 
         elif mode == "random":
-            # place the first residue in the middle of the grid
-            midpoint = (int(self.size // 2), int(self.size // 2))
-            self.place_residue(self.protein.get_residue(0), midpoint)
+            # random self-avoiding walk from the middle of the grid
+            midpoint = (self.size // 2, self.size // 2)
 
-            # place the remaining residues
-            coords = midpoint
-            dead_ends = []
-            for i in range(1, self.protein.length):
-                res = self.protein.get_residue(i)
-                empty_neighbors = self.empty_neighbors(coords)
-
-                for dead_end in dead_ends:
-                    empty_neighbors.remove(
-                        dead_end
-                    ) if dead_end in empty_neighbors else None
-
-                if len(empty_neighbors) == 0:
-                    dead_ends.append(coords)
-                    self.remove_residue(coords)
-                    coords = self.protein.get_residue(i - 1).get_coords()
-                    i -= 1
-                else:
-                    random_neighbor = empty_neighbors[
-                        np.random.choice(len(empty_neighbors))
-                    ]
-                    self.place_residue(res, random_neighbor)
-                    coords = random_neighbor
+            # a walk trapped in a pocket could backtrack for very long,
+            # it starts over after this number of placements
+            max_placements = 10 * self.protein.length
+            while not self._random_walk(midpoint, max_placements):
+                self.grid[:] = EMPTY
+
+    def _random_walk(self, start, max_placements):
+        """
+        Place the residues along a random self-avoiding walk, backtracking
+        from the dead ends, return whether the walk completed within the
+        given number of placements.
+        """
+        self.place_residue(self.protein.get_residue(0), start)
+        # positions left to try for each placed residue
+        candidates = [None] * self.protein.length
+        placements = 0
+        i = 1
+        while i < self.protein.length:
+            if placements == max_placements:
+                return False
+            if candidates[i] is None:
+                previous = self.protein.get_residue(i - 1).get_coords()
+                empty_neighbors = self.empty_neighbors(previous)
+                candidates[i] = [
+                    empty_neighbors[k] for k in np.random.permutation(len(empty_neighbors))
+                ]
+            if candidates[i]:
+                self.place_residue(self.protein.get_residue(i), candidates[i].pop())
+                placements += 1
+                i += 1
+            else:
+                # dead end, move the previous residue
+                candidates[i] = None
+                i -= 1
+                self.remove_residue(self.protein.get_residue(i).get_coords())
+        return True
+
+    def get_conformation(self):
+        """
+        Return the coordinates of every residue as an array.
+
+        Returns
+        -------
+        numpy.ndarray of shape (length, 2) with the coordinates of the residues.
+        """
+        return np.array(
+            [res.get_coords() for res in self.protein.residues], dtype=np.int32
+        )
+
+    def set_conformation(self, conformation):
+        """
+        Place every residue at the given coordinates, replacing the current conformation.
+
+        Parameters
+        ----------
+        conformation : array-like
+            Coordinates of the residues, of shape (length, 2).
+        """
+        self.grid[:] = EMPTY
+        for res, coords in zip(self.protein.residues, conformation):
+            self.place_residue(res, (int(coords[0]), int(coords[1])))
 
     def is_empty(self, coords):
         """
@@ -181,13 +271,15 @@ class Lattice:
         Parameters
         ----------
         coords : tuple
-            Coordinates to check.
+            Coordinates to check, of the grid or of the border ring around
+            it, e.g. a neighbor of a residue.
 
         Returns
         -------
-        True if the coordinates are empty, False otherwise.
+        True if the coordinates are empty, False otherwise or if they are
+        on the border.
         """
-        return self.grid[coords] is None
+        return self.cells.item(self.flat_index(coords)) == EMPTY
 
     def neighbors(self, coords):
         """
@@ -202,16 +294,18 @@ class Lattice:
         -------
         List of the neighbors around the given coordinates.
         """
-        neighbors = []
-        if coords[0] > 0:
-            neighbors.append((coords[0] - 1, coords[1]))
-        if coords[0] < self.size - 1:
-            neighbors.append((coords[0] + 1, coords[1]))
-        if coords[1] > 0:
-            neighbors.append((coords[0], coords[1] - 1))
-        if coords[1] < self.size - 1:
-            neighbors.append((coords[0], coords[1] + 1))
-        return neighbors
+        i, j = coords
+        last = self.size - 1
+        if 0 < i < last and 0 < j < last:
+            return [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]
+        # cells of the edges of the grid, some neighbors are on the border
+        position = self.flat_index(coords)
+        cells = self.cells
+        return [
+            (i + di, j + dj)
+            for (di, dj), offset in zip(DIRECTIONS, self.offsets)
+            if cells.item(position + offset) != BORDER
+        ]
 
     def empty_neighbors(self, coords):
         """
@@ -226,16 +320,20 @@ class Lattice:
         -------
         List of empty neighbors.
         """
+        i, j = coords
+        stride = self.stride
+        position = (i + 1) * stride + j + 1
+        item = self.cells.item
         neighbors = []
-        if coords[0] > 0:
-            neighbors.append((coords[0] - 1, coords[1]))
-        if coords[0] < self.size - 1:
-            neighbors.append((coords[0] + 1, coords[1]))
-        if coords[1] > 0:
-            neighbors.append((coords[0], coords[1] - 1))
-        if coords[1] < self.size - 1:
-            neighbors.append((coords[0], coords[1] + 1))
-        return [n for n in neighbors if self.is_empty(n)]
+        if item(position - stride) == EMPTY:
+            neighbors.append((i - 1, j))
+        if item(position + stride) == EMPTY:
+            neighbors.append((i + 1, j))
+        if item(position - 1) == EMPTY:
+            neighbors.append((i, j - 1))
+        if item(position + 1) == EMPTY:
+            neighbors.append((i, j + 1))
+        return neighbors
 
     def occupied_neighbors(self, coords):
         """
@@ -250,16 +348,21 @@ class Lattice:
         -------
         List of occupied neighbors.
         """
-        neighbors = []
-        if coords[0] > 0:
-            neighbors.append((coords[0] - 1, coords[1]))
-        if coords[0] < self.size - 1:
-            neighbors.append((coords[0] + 1, coords[1]))
-        if coords[1] > 0:
-            neighbors.append((coords[0], coords[1] - 1))
-        if coords[1] < self.size - 1:
-            neighbors.append((coords[0], coords[1] + 1))
-        return [self.get_residue(n) for n in neighbors if not self.is_empty(n)]
+        residues = self.protein.residues
+        stride = self.stride
+        position = (coords[0] + 1) * stride + coords[1] + 1
+        item = self.cells.item
+        # both EMPTY and BORDER are negative
+        return [
+            residues[index]
+            for index in (
+                item(position - stride),
+                item(position + stride),
+                item(position - 1),
+                item(position + 1),
+            )
+            if index >= 0
+        ]
 
     def are_neighbors(self, coords1, coords2):
         """
@@ -276,7 +379,9 @@ class Lattice:
         -------
         True if the coordinates are neighbors, False otherwise.
         """
-        return coords1 in self.neighbors(coords2) and coords2 in self.neighbors(coords1)
+        # the border columns keep the ends of two rows apart
+        distance = abs(self.flat_index(coords1) - self.flat_index(coords2))
+        return distance == 1 or distance == self.stride
 
     def calculate_energy(self):
         """
@@ -284,46 +389,32 @@ class Lattice:
 
         Returns
         -------
-        Energy of the lattice.
-        """
-        energy = 0
-
-        h_residues = self.protein.get_H_residues()
-        for res in h_residues:
-            neighbors = self.occupied_neighbors(res.get_coords())
-            for neighbor in neighbors:
-                if not res.is_consecutive(neighbor) and neighbor.typeHP == "H":
-                    energy -= 1
-        # don't count each bound twice
-        return int(energy / 2)
-
-    def calculate_energy_change(self, residue, movement):
+        Energy of the lattice, the sum of the contact energies of the
+        energy model over the pairs of neighbor non-consecutive residues.
         """
-        Calculate the energy change of a residue after a movement.
-
-        Parameters
-        ----------
-        residue : Residue
-            Residue to check.
-        movement : tuple
-            Movement to apply.
-
-        Returns
-        -------
-        Energy change of the residue after the movement.
-        """
-        energy_change = 0
-
-        initial_neighbors = self.occupied_neighbors(residue.get_coords())
-        for neighbor in initial_neighbors:
-            if not residue.is_consecutive(neighbor) and neighbor.typeHP == "H":
-                energy_change += 1
+        sequence = self.protein.hp_sequence
+        codes = sequence.codes
+        table = sequence.model.table
+        residues = self.protein.residues
+        item = self.cells.item
+        stride = self.stride
 
-        new_neighbors = self.occupied_neighbors(movement)
-        for neighbor in new_neighbors:
-            if not residue.is_consecutive(neighbor) and neighbor.typeHP == "H":
-                energy_change -= 1
-        return energy_change
+        energy = 0
+        for index in sequence.interacting:
+            residue = residues[index]
+            position = (residue.coordI + 1) * stride + residue.coordJ + 1
+            row = table[codes[index]]
+            for neighbor in (
+                item(position - stride),
+                item(position + stride),
+                item(position - 1),
+                item(position + 1),
+            ):
+                # count each contact once, from its lowest index, the empty
+                # and border cells are negative
+                if neighbor > index + 1:
+                    energy += row[codes[neighbor]]
+        return energy
 
     def is_valid(self):
         """
@@ -334,9 +425,18 @@ class Lattice:
         True if the lattice is valid, False otherwise.
         """
         residues = self.protein.residues
-        for index, res in enumerate(residues[1:]):
+        item = self.cells.item
+        stride = self.stride
+        for index in range(1, len(residues)):
+            previous = residues[index - 1]
+            position = (previous.coordI + 1) * stride + previous.coordJ + 1
             # if the residue is not in the neighbors of the previous one
-            if res not in self.occupied_neighbors(residues[index - 1].get_coords()):
+            if index not in (
+                item(position - stride),
+                item(position + stride),
+                item(position - 1),
+                item(position + 1),
+            ):
                 return False
         return True
 
@@ -356,10 +456,10 @@ class Lattice:
         for i in range(i_min, i_max):
             print("|", end="")
             for j in range(j_min, j_max):
-                if self.grid[i, j] is None:
+                if self.get_residue((i, j)) is None:
                     print(" ", end="")
                 else:
-                    print(str(self.grid[i, j]), end="")
+                    print(str(self.get_residue((i, j))), end="")
             print("|")
         print("+" + "-" * (j_max - j_min) + "+")
 
@@ -367,6 +467,37 @@ class Lattice:
         cls = self.__class__
         result = cls.__new__(cls)
         memo[id(self)] = result
-        for key, value in self.__dict__.items():
-            setattr(result, key, deepcopy(value, memo))
+        result.size = self.size
+        result._set_cells(self.cells.copy())
+        result.protein = deepcopy(self.protein, memo)
         return result
+
+    def __getstate__(self):
+        # the grid is a view of the cells, rebuilt on unpickling
+        return self.size, self.cells, self.protein
+
+    def __setstate__(self, state):
+        size, cells, protein = state
+        self.size = size
+        self._set_cells(cells)
+        self.protein = protein
+
+
+def center_conformation(conformation, size):
+    """
+    Translate a conformation to the middle of a grid.
+
+    Parameters
+    ----------
+    conformation : array-like
+        Coordinates of the residues, of shape (length, 2).
+    size : int
+        Size of the grid.
+
+    Returns
+    -------
+    numpy.ndarray with the translated coordinates.
+    """
+    conformation = np.asarray(conformation, dtype=np.int32)
+    middle = (conformation.min(axis=0) + conformation.max(axis=0)) // 2
+    return conformation - middle + size // 2
@@ -2,6 +2,19 @@ import copy
 import numpy as np
 from operator import add
 
+from src.lattice import EMPTY
+
+# rotations and reflections of a pivot movement, as 2x2 matrices
+PIVOT_SYMMETRIES = (
+    ((0, -1), (1, 0)),
+    ((-1, 0), (0, -1)),
+    ((0, 1), (-1, 0)),
+    ((1, 0), (0, -1)),
+    ((-1, 0), (0, 1)),
+    ((0, 1), (1, 0)),
+    ((0, -1), (-1, 0)),
+)
+
 
 class Movement:
     """
@@ -17,6 +30,10 @@ class Movement:
         Residue to move.
     moved : bool
         Whether the residue has been moved.
+    moved_indices : list
+        Indices of the residues moved by the movement.
+    rng : numpy.random.RandomState
+        Random stream of the movement.
 
     Methods
     -------
@@ -30,9 +47,11 @@ class Movement:
         Compute crankshaft movement.
     pull_movement()
         Compute pull movement.
+    pivot_movement()
+        Compute pivot movement.
     """
 
-    def __init__(self, movement_type, lattice, residue):
+    def __init__(self, movement_type, lattice, residue, rng=None):
         """
         Initialize a movement.
 
@@ -44,13 +63,24 @@ class Movement:
             Lattice in which to make the movement.
         residue : Residue
             Residue to move.
+        rng : numpy.random.RandomState, optional
+            Random stream of the movement, the global one if None.
         """
+        self.rng = np.random if rng is None else rng
         self.movement_type = movement_type
         self.lattice = copy.deepcopy(lattice)
         self.residue = self.lattice.protein.get_residue(residue.index)
         self.moved = False
+        self.moved_indices = []
         self.move()
 
+    def _move_residue(self, residue, coords):
+        """
+        Move a residue of the lattice and remember it has been moved.
+        """
+        self.lattice.move_residue(residue, coords)
+        self.moved_indices.append(residue.index)
+
     def move(self):
         """
         Compute movement.
@@ -63,6 +93,8 @@ class Movement:
             self.crankshaft_movement()
         elif self.movement_type == "pull":
             self.pull_movement()
+        elif self.movement_type == "pivot":
+            self.pivot_movement()
 
     def end_movement(self):
         """
@@ -83,9 +115,9 @@ class Movement:
             # if another position is available
             if empty_neighbors:
                 random_neighbor = empty_neighbors[
-                    np.random.choice(len(empty_neighbors))
+                    self.rng.choice(len(empty_neighbors))
                 ]
-                self.lattice.move_residue(self.residue, random_neighbor)
+                self._move_residue(self.residue, random_neighbor)
                 self.moved = True
 
     def corner_movement(self):
@@ -114,7 +146,7 @@ class Movement:
 
             # if the corner position is available
             if self.lattice.is_empty(corner_position):
-                self.lattice.move_residue(self.residue, corner_position)
+                self._move_residue(self.residue, corner_position)
                 self.moved = True
 
     def crankshaft_movement(self):
@@ -178,8 +210,8 @@ class Movement:
                             if self.lattice.is_empty(
                                 new_position_i
                             ) and self.lattice.is_empty(new_position_j):
-                                self.lattice.move_residue(self.residue, new_position_i)
-                                self.lattice.move_residue(other_residue, new_position_j)
+                                self._move_residue(self.residue, new_position_i)
+                                self._move_residue(other_residue, new_position_j)
                                 self.moved = True
                                 return
 
@@ -217,8 +249,8 @@ class Movement:
                     i_minus_2 = self.residue.get_coords()
                     i_minus_1 = neighbor_minus_1.get_coords()
 
-                    self.lattice.move_residue(self.residue, l)
-                    self.lattice.move_residue(neighbor_minus_1, c)
+                    self._move_residue(self.residue, l)
+                    self._move_residue(neighbor_minus_1, c)
 
                     # which way to head in the protein, either 1 or -1
                     direction = self.residue.index - neighbor_minus_1.index
@@ -234,7 +266,7 @@ class Movement:
                         i_minus_1 = next_residue.get_coords()
 
                         # move the residue
-                        self.lattice.move_residue(next_residue, new_coords)
+                        self._move_residue(next_residue, new_coords)
 
                         # check if the conformation is valid
                         if self.lattice.is_valid():
@@ -245,5 +277,51 @@ class Movement:
                                 next_residue.index + direction
                             )
 
+    def pivot_movement(self):
+        """
+        Compute pivot movement.
+
+        Rotate or reflect the shorter side of the chain around the residue,
+        with a random symmetry of the lattice. Each new position is checked
+        on the grid, from the pivot outwards where collisions are the most
+        likely, and the movement is abandoned at the first collision.
+
+        Returns
+        -------
+        tuple of coordinates of the new positions of the residues
+        """
+        protein = self.lattice.protein
+        pivot = self.residue.index
+        if pivot < protein.length - 1 - pivot:
+            moving = range(pivot - 1, -1, -1)
+        else:
+            moving = range(pivot + 1, protein.length)
+        if not moving:
+            return
+
+        (a, b), (c, d) = PIVOT_SYMMETRIES[self.rng.randint(len(PIVOT_SYMMETRIES))]
+        pivot_i, pivot_j = self.residue.get_coords()
+        size = self.lattice.size
+
+        new_positions = []
+        for index in moving:
+            i, j = protein.residues[index].get_coords()
+            i, j = i - pivot_i, j - pivot_j
+            new_position = (pivot_i + a * i + b * j, pivot_j + c * i + d * j)
+            if not (0 <= new_position[0] < size and 0 <= new_position[1] < size):
+                return
+            # cells of the moving side are freed by the movement
+            occupant = int(self.lattice.grid[new_position])
+            if occupant != EMPTY and occupant not in moving:
+                return
+            new_positions.append(new_position)
+
+        for index in moving:
+            self.lattice.remove_residue(protein.residues[index].get_coords())
+        for index, new_position in zip(moving, new_positions):
+            self.lattice.place_residue(protein.residues[index], new_position)
+        self.moved_indices.extend(moving)
+        self.moved = True
+
     def __str__(self):
         return f"{self.movement_type} movement of {self.residue}"
@@ -0,0 +1,181 @@
+"""Independent restarts of the MC and REMC searches across a process pool.
+
+Each restart runs the search with its own random seed from its own starting
+conformation, a random walk or one of the stored conformations. The workers
+stream their new lowest energies to the parent through a shared queue, and
+the first restart to reach the energy cutoff sets a shared event, on which
+the running restarts stop and the pending ones are skipped.
+"""
+
+import os
+import time
+import queue
+import multiprocessing
+
+import numpy as np
+
+from src.protein import Protein
+from src.lattice import Lattice
+from src.runner import run_search
+
+# seconds between two checks of the results while waiting for the progress
+POLL_INTERVAL = 0.1
+
+
+def _init_worker(stop, progress):
+    global _stop, _progress
+    _stop = stop
+    _progress = progress
+
+
+def _run_restart(task):
+    """
+    Run one seeded restart of the search.
+
+    Parameters
+    ----------
+    task : tuple
+        Index of the restart, search to run, parameters of the search,
+        sequence and energy model of the protein, starting lattice (a random
+        walk if None) and seed.
+
+    Returns
+    -------
+    dict
+        Index, seed, lowest energy lattice, energy of the last step, lowest
+        energy reached, CPU time of the restart and whether it was
+        cancelled. The lattice and energies are None if the restart was
+        cancelled before it started.
+    """
+    restart, sub_command, params, sequence, model, lattice, seed = task
+    result = {
+        "restart": restart,
+        "seed": seed,
+        "lattice": None,
+        "energy": None,
+        "lowest_energy": None,
+        "cpu": 0.0,
+        "cancelled": True,
+    }
+    if _stop.is_set():
+        return result
+
+    start = time.process_time()
+    np.random.seed(seed)
+    if lattice is None:
+        lattice = Lattice(Protein(sequence, model), "random")
+    cutoff = params.get("energy_cutoff")
+    best = last = lattice.calculate_energy()
+    _progress.put((restart, best))
+
+    def callback(step, energy):
+        nonlocal best, last
+        last = energy
+        if energy < best:
+            best = energy
+            _progress.put((restart, energy))
+            if cutoff is not None and energy <= cutoff:
+                _stop.set()
+        return not _stop.is_set()
+
+    lowest_lattice = run_search(sub_command, params, lattice, callback, lowest=True)
+    # the quench may lower the energy of the lowest lattice further
+    lowest = lowest_lattice.calculate_energy()
+    reached = cutoff is not None and lowest <= cutoff
+    if reached:
+        _stop.set()
+    result.update(
+        lattice=lowest_lattice,
+        energy=last,
+        lowest_energy=lowest,
+        cpu=time.process_time() - start,
+        cancelled=_stop.is_set() and not reached,
+    )
+    return result
+
+
+def multistart(
+    sub_command,
+    params,
+    sequence,
+    n_restarts,
+    n_workers=None,
+    lattices=None,
+    progress=None,
+    model=None,
+):
+    """
+    Run independently seeded restarts of the MC or REMC search.
+
+    Parameters
+    ----------
+    sub_command : str
+        Search to run, either MC or REMC.
+    params : dict
+        Parameters of the search, as parsed from the sub-command. The
+        restarts stop once one of them reaches the energy cutoff, if any.
+    sequence : str
+        Sequence of the protein.
+    n_restarts : int
+        Number of restarts.
+    n_workers : int
+        Number of worker processes, all the available CPUs if None.
+    lattices : list, optional
+        Starting lattices, given to the restarts in turn, each restart starts
+        from a random walk if None.
+    progress : callable, optional
+        Called in the parent with the index of a restart and its new lowest
+        energy, as the restarts find them.
+    model : EnergyModel, optional
+        Energy model of the protein, HP if None.
+
+    Returns
+    -------
+    Lattice
+        Lowest energy lattice of the restarts.
+    list
+        Result of each restart, by index, see `_run_restart`.
+    """
+    n_workers = min(n_workers or os.cpu_count(), n_restarts)
+    # drawn from the global stream, so that a seeded run is reproducible
+    seeds = np.random.randint(2**31, size=n_restarts)
+    tasks = [
+        (
+            restart,
+            sub_command,
+            params,
+            sequence,
+            model,
+            lattices[restart % len(lattices)] if lattices else None,
+            int(seeds[restart]),
+        )
+        for restart in range(n_restarts)
+    ]
+
+    stop = multiprocessing.Event()
+    energies = multiprocessing.Queue()
+
+    def report(restart, energy):
+        if progress is not None:
+            progress(restart, energy)
+
+    with multiprocessing.Pool(
+        n_workers, initializer=_init_worker, initargs=(stop, energies)
+    ) as pool:
+        pending = pool.map_async(_run_restart, tasks, chunksize=1)
+        while not pending.ready():
+            try:
+                report(*energies.get(timeout=POLL_INTERVAL))
+            except queue.Empty:
+                continue
+        results = pending.get()
+        # energies sent by the last restarts before they returned
+        while True:
+            try:
+                report(*energies.get(timeout=POLL_INTERVAL))
+            except queue.Empty:
+                break
+
+    finished = [result for result in results if result["lattice"] is not None]
+    best = min(finished, key=lambda result: result["lowest_energy"])
+    return best["lattice"], results
@@ -1,5 +1,7 @@
 import argparse
 
+from src.autotune import DEFAULT_PROFILES
+
 
 class MyArgumentParser(argparse.ArgumentParser):
     """
@@ -33,6 +35,28 @@ class MyArgumentParser(argparse.ArgumentParser):
         print(help_text)
 
 
+# defaults of the REMC options that a tuned profile sets when they are not given
+REMC_DEFAULTS = {
+    "n_replica": 5,
+    "local_steps": 100,
+    "temperature_min": 160.0,
+    "temperature_max": 220.0,
+    "exchange_interval": 1,
+}
+
+
+def energy_cutoff(value):
+    """
+    Parse an energy cutoff, either an integer or auto.
+    """
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid energy cutoff: '{value}'")
+
+
 def parse_args(args):
     parser = MyArgumentParser()
 
@@ -46,8 +70,40 @@ def parse_args(args):
         "-f", "--file", help="input file containing the protein sequence"
     )
 
-    parser.add_argument("-i", "--initial-lattice", choices=["linear", "random"], default="linear",
-                        help="initial lattice placement type, either in linear or using random walk")
+    parser.add_argument("-i", "--initial-lattice", choices=["linear", "random", "stored"], default="linear",
+                        help="initial lattice placement type, either in linear, using random walk or from the best conformations of the result store")
+
+    # energy model of the contacts between residues
+    parser.add_argument("--energy-model", choices=["HP", "HPNX"], default="HP",
+                        help="residue alphabet and contact energies, amino acid sequences are converted to the alphabet")
+    parser.add_argument("--energy-matrix", default=None,
+                        help="file of a contact energy matrix over its own alphabet, such as the Miyazawa-Jernigan potentials, replacing the energy model")
+
+    # persistent store of the best conformations
+    parser.add_argument("--store", default=None,
+                        help="SQLite result store in which to keep the best conformations of each sequence")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES,
+                        help="JSON file of the tuned REMC profiles, giving the REMC options left out for the length of the sequence")
+    parser.add_argument("--store-size", type=int, default=10,
+                        help="number of distinct conformations kept for each sequence in the result store")
+
+    # live telemetry of the search
+    parser.add_argument("--telemetry", default=None,
+                        help="metrics file in which to write the progress of the MC, REMC and DC searches")
+    parser.add_argument("--telemetry-format", choices=["jsonl", "prometheus"], default="jsonl",
+                        help="format of the metrics file, JSON lines or Prometheus text format")
+    parser.add_argument("--telemetry-interval", type=float, default=1.0,
+                        help="time in seconds between two writes of the metrics file")
+
+    # streaming statistics of the sampled conformations
+    parser.add_argument("--ensemble-stats", default=None,
+                        help="npz file in which to write the contact, energy and radius of gyration statistics of the MC and REMC searches")
+
+    # independent restarts of the MC and REMC searches
+    parser.add_argument("--restarts", type=int, default=None,
+                        help="number of independently seeded MC or REMC runs from random conformations, stopped once one reaches the energy cutoff")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes of the restarts, all the CPUs by default")
 
     # create the parser for the Monte-Carlo command
     parser_MC = subparsers.add_parser(
@@ -56,22 +112,180 @@ def parse_args(args):
                            help="number of iterations in the search")
     parser_MC.add_argument("-t", "--temperature", type=float, default=200.0,
                            help="temperature of the search, higher temperatures will lead to more random movements")
+    parser_MC.add_argument("-a", "--adaptive-burn-in", type=int, default=None,
+                           help="learn the movement type weights during this number of steps, then bias the proposals")
+    parser_MC.add_argument("-e", "--energy-cutoff", type=energy_cutoff, default=None,
+                           help="energy at which the search stops, auto to compute it with the exact solver")
+    parser_MC.add_argument("-v", "--pivot-probability", type=float, default=0.0,
+                           help="probability of a step to be a pivot movement of one side of the chain")
+    parser_MC.add_argument("-s", "--schedule", choices=["linear", "geometric", "acceptance", "specific-heat"],
+                           default=None, help="anneal from the temperature with this cooling schedule")
+    parser_MC.add_argument("-tend", "--temperature-end", type=float, default=50.0,
+                           help="final temperature of the annealing")
+    parser_MC.add_argument("-r", "--stagnation", type=int, default=None,
+                           help="reheat the annealing after this number of steps without improvement")
+    parser_MC.add_argument("--reheat-factor", type=float, default=2.0,
+                           help="factor by which the temperature is raised when reheating")
+    parser_MC.add_argument("-q", "--quench", action="store_true",
+                           help="quench the final conformation to a local minimum by steepest descent")
 
     # create the parser for the Replica Exchange Monte-Carlo command
     parser_REMC = subparsers.add_parser(
         "REMC", help="Run the Replica Exchange Monte Carlo algorithm"
     )
     parser_REMC.add_argument("-n", "--n-replica", type=int,
-                             default=5, help="number of replicas to use")
-    parser_REMC.add_argument("-e", "--energy-cutoff", type=int, default=-10,
-                             help="optimal energy to reach")
+                             default=None, help="number of replicas to use")
+    parser_REMC.add_argument("-e", "--energy-cutoff", type=energy_cutoff, default=-10,
+                             help="optimal energy to reach, auto to compute it with the exact solver")
     parser_REMC.add_argument("-m", "--max-steps", type=int, default=1000,
                              help="maximum number of steps to perform if the energy cutoff is not reached")
-    parser_REMC.add_argument("-l", "--local-steps", type=int, default=100,
+    parser_REMC.add_argument("-l", "--local-steps", type=int, default=None,
                              help="number of steps to perform for each MC search")
     parser_REMC.add_argument("-tmin", "--temperature-min", type=float,
-                             default=160.0, help="temperature of the first replica")
+                             default=None, help="temperature of the first replica")
     parser_REMC.add_argument("-tmax", "--temperature-max", type=float,
-                             default=220.0, help="temperature of the last replica")
+                             default=None, help="temperature of the last replica")
+    parser_REMC.add_argument("-x", "--exchange-interval", type=int, default=None,
+                             help="number of exchange steps between two attempts to exchange the temperatures")
+    parser_REMC.add_argument("-a", "--adaptive-burn-in", type=int, default=None,
+                             help="learn the movement type weights of each replica during this number of steps")
+    parser_REMC.add_argument("-v", "--pivot-probability", type=float, default=0.0,
+                             help="probability of a step to be a pivot movement of one side of the chain")
+    parser_REMC.add_argument("-q", "--quench", action="store_true",
+                             help="quench the final conformation to a local minimum by steepest descent")
+    parser_REMC.add_argument("--quench-interval", type=int, default=None,
+                             help="quench the conformation of every replica after this number of exchange steps, keeping the local minima as their lowest energy lattices")
+    parser_REMC.add_argument("-b", "--backend", choices=["serial", "threads", "processes"], default="serial",
+                             help="run the replicas one after the other, on a thread pool or in worker processes")
+    parser_REMC.add_argument("-w", "--n-workers", type=int, default=None,
+                             help="number of threads or worker processes of the backend, one per replica or all the CPUs by default")
+
+    # create the parser for the tabu search command
+    parser_TABU = subparsers.add_parser(
+        "TABU", help="Run the tabu search over the local movements"
+    )
+    parser_TABU.add_argument("-n", "--n-steps", type=int, default=1000,
+                             help="number of movements of the search")
+    parser_TABU.add_argument("-m", "--tenure", type=int, default=100,
+                             help="number of visited conformations kept in the tabu memory")
+    parser_TABU.add_argument("--eviction", choices=["fifo", "lru"], default="fifo",
+                             help="evict the oldest or the least recently visited conformation from the full tabu memory")
+    parser_TABU.add_argument("-r", "--stagnation", type=int, default=200,
+                             help="restart from the perturbed best conformation after this number of steps without improvement")
+    parser_TABU.add_argument("-k", "--perturbation", type=int, default=3,
+                             help="number of random pivot movements applied to the best conformation on a restart")
+    parser_TABU.add_argument("-e", "--energy-cutoff", type=energy_cutoff, default=None,
+                             help="energy at which the search stops, auto to compute it with the exact solver")
+
+    # create the parser for the genetic algorithm command
+    parser_GA = subparsers.add_parser(
+        "GA", help="Run the genetic algorithm on direction-encoded conformations"
+    )
+    parser_GA.add_argument("-n", "--population-size", type=int, default=200,
+                           help="number of individuals, split evenly among the islands")
+    parser_GA.add_argument("-g", "--n-generations", type=int, default=200,
+                           help="number of generations")
+    parser_GA.add_argument("-c", "--crossover-rate", type=float, default=0.9,
+                           help="probability of a child to be the crossover of two parents")
+    parser_GA.add_argument("-u", "--mutation-rate", type=float, default=0.2,
+                           help="probability of a child to be mutated by a random movement")
+    parser_GA.add_argument("-k", "--elite", type=int, default=2,
+                           help="number of the best individuals of each island kept unchanged")
+    parser_GA.add_argument("-i", "--n-islands", type=int, default=None,
+                           help="number of islands, one per worker process by default, at most population size / (elite + 2)")
+    parser_GA.add_argument("-m", "--migration-interval", type=int, default=10,
+                           help="number of generations between two migrations")
+    parser_GA.add_argument("--n-migrants", type=int, default=2,
+                           help="number of individuals migrating from each island to the next one")
+    parser_GA.add_argument("-e", "--energy-cutoff", type=energy_cutoff, default=None,
+                           help="energy at which the search stops, auto to compute it with the exact solver")
+    parser_GA.add_argument("-w", "--n-workers", type=int, default=None,
+                           help="number of worker processes, all the CPUs by default")
+
+    # create the parser for the Population Annealing command
+    parser_PA = subparsers.add_parser(
+        "PA", help="Run the Population Annealing algorithm"
+    )
+    parser_PA.add_argument("-n", "--population-size", type=int, default=1000,
+                           help="number of conformations in the population")
+    parser_PA.add_argument("-s", "--n-sweeps", type=int, default=5,
+                           help="number of MC sweeps per member at each temperature")
+    parser_PA.add_argument("-k", "--n-temperatures", type=int, default=20,
+                           help="number of temperatures in the cooling schedule")
+    parser_PA.add_argument("-tmax", "--temperature-max", type=float,
+                           default=400.0, help="starting temperature of the schedule")
+    parser_PA.add_argument("-tmin", "--temperature-min", type=float,
+                           default=160.0, help="final temperature of the schedule")
+    parser_PA.add_argument("-w", "--n-workers", type=int, default=None,
+                           help="number of worker processes, all the CPUs by default")
+
+    # create the parser for the divide-and-conquer command
+    parser_DC = subparsers.add_parser(
+        "DC", help="Fold overlapping segments in parallel, assemble and refine them with REMC"
+    )
+    parser_DC.add_argument("-s", "--segment-length", type=int, default=40,
+                           help="maximum number of residues of a segment")
+    parser_DC.add_argument("-o", "--overlap", type=int, default=8,
+                           help="number of residues shared by two consecutive segments")
+    parser_DC.add_argument("-g", "--segment-steps", type=int, default=100,
+                           help="number of exchange steps of the REMC search of each segment")
+    parser_DC.add_argument("-r", "--refine-steps", type=int, default=200,
+                           help="number of exchange steps of the REMC refinement of the full chain")
+    parser_DC.add_argument("-n", "--n-replica", type=int,
+                           default=5, help="number of replicas of the REMC searches")
+    parser_DC.add_argument("-l", "--local-steps", type=int, default=100,
+                           help="number of steps to perform for each MC search")
+    parser_DC.add_argument("-tmin", "--temperature-min", type=float,
+                           default=160.0, help="temperature of the first replica")
+    parser_DC.add_argument("-tmax", "--temperature-max", type=float,
+                           default=220.0, help="temperature of the last replica")
+    parser_DC.add_argument("-e", "--energy-cutoff", type=int, default=None,
+                           help="energy at which the refinement stops")
+    parser_DC.add_argument("-w", "--n-workers", type=int, default=None,
+                           help="number of worker processes, all the CPUs by default")
+
+    # create the parser for the exact solver command
+    parser_EXACT = subparsers.add_parser(
+        "EXACT", help="Find the ground states of a short sequence by branch and bound"
+    )
+    parser_EXACT.add_argument("-c", "--max-conformations", type=int, default=10,
+                              help="maximum number of ground-state conformations to find")
+    parser_EXACT.add_argument("-w", "--n-workers", type=int, default=None,
+                              help="number of worker processes, all the CPUs by default")
 
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    if parsed.subparser_name == "REMC":
+        # options left to a tuned profile, or to their defaults
+        parsed.tunable = [name for name in REMC_DEFAULTS if getattr(parsed, name) is None]
+        for name in parsed.tunable:
+            setattr(parsed, name, REMC_DEFAULTS[name])
+    if parsed.initial_lattice == "stored" and parsed.store is None:
+        parser.error("--initial-lattice stored requires --store")
+    if parsed.energy_model != "HP" or parsed.energy_matrix:
+        if parsed.subparser_name in ("DC", "EXACT"):
+            parser.error(f"the {parsed.subparser_name} sub-command requires the HP energy model")
+        if parsed.ensemble_stats:
+            parser.error("--ensemble-stats requires the HP energy model")
+        if getattr(parsed, "energy_cutoff", None) == "auto":
+            parser.error("--energy-cutoff auto requires the HP energy model")
+    if parsed.ensemble_stats and parsed.subparser_name not in ("MC", "REMC"):
+        parser.error("--ensemble-stats requires the MC or REMC sub-command")
+    if parsed.telemetry and parsed.subparser_name not in ("MC", "REMC", "DC"):
+        parser.error("--telemetry requires the MC, REMC or DC sub-command")
+    backend = getattr(parsed, "backend", "serial")
+    if backend != "serial" and parsed.telemetry:
+        parser.error("--telemetry requires the serial backend")
+    if backend == "processes":
+        if parsed.ensemble_stats or parsed.adaptive_burn_in is not None:
+            parser.error("the processes backend supports neither --ensemble-stats nor --adaptive-burn-in")
+        if parsed.restarts is not None:
+            parser.error("--restarts cannot run the processes backend inside its worker processes")
+    if getattr(parsed, "schedule", None) and parsed.ensemble_stats:
+        # an annealed search samples a new temperature at every step
+        parser.error("--ensemble-stats cannot be used with --schedule")
+    if parsed.restarts is not None:
+        if parsed.subparser_name not in ("MC", "REMC"):
+            parser.error("--restarts requires the MC or REMC sub-command")
+        if parsed.telemetry or parsed.ensemble_stats:
+            parser.error("--restarts cannot be used with --telemetry or --ensemble-stats")
+    return parsed
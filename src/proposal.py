@@ -0,0 +1,116 @@
+"""Adaptive choice of the movement types of the Monte Carlo steps.
+
+During a burn-in, movement types are proposed uniformly and their
+acceptance rates are measured. The proposal weights are then frozen,
+proportionally to these rates, so that the search spends its steps on the
+movement types that actually move the protein at its temperature.
+
+The type of a step is drawn before its residue, which is drawn uniformly
+among the residues the type applies to (ends for end movements, the other
+residues for the others). These probabilities do not depend on the
+conformation, and every movement type is its own reverse, so the proposal
+is symmetric and the Metropolis criterion needs no correction.
+"""
+
+import numpy as np
+
+# movement types that can be proposed
+MOVE_TYPES = ("end", "corner", "crankshaft", "pull")
+
+
+class AdaptiveProposal:
+    """
+    Learn the proposal weights of the movement types of a search.
+
+    Attributes
+    ----------
+    burn_in : int
+        Number of steps after which the weights are frozen.
+    min_weight : float
+        Lowest weight of a movement type, keeps every type proposed.
+    weights : dict
+        Proposal probability of each movement type.
+    attempts : dict
+        Number of proposals of each movement type.
+    accepts : dict
+        Number of accepted movements of each movement type.
+    frozen : bool
+        Whether the burn-in is over.
+
+    Methods
+    -------
+    choose(rng):
+        Draw the movement type of a step.
+    update(movement_type, accepted):
+        Count the outcome of a step.
+    freeze():
+        Set the weights from the acceptance rates and stop learning.
+    """
+
+    def __init__(self, burn_in, min_weight=0.05):
+        """
+        Initialize uniform proposal weights.
+
+        Parameters
+        ----------
+        burn_in : int
+            Number of steps after which the weights are frozen.
+        min_weight : float
+            Lowest weight of a movement type.
+        """
+        self.burn_in = burn_in
+        self.min_weight = min_weight
+        self.weights = {move: 1 / len(MOVE_TYPES) for move in MOVE_TYPES}
+        self.attempts = {move: 0 for move in MOVE_TYPES}
+        self.accepts = {move: 0 for move in MOVE_TYPES}
+        self.frozen = False
+
+    def choose(self, rng=None):
+        """
+        Draw the movement type of a step.
+
+        Parameters
+        ----------
+        rng : numpy.random.RandomState, optional
+            Random stream of the search, the global one if None.
+
+        Returns
+        -------
+        Movement type.
+        """
+        probabilities = [self.weights[move] for move in MOVE_TYPES]
+        rng = np.random if rng is None else rng
+        return MOVE_TYPES[rng.choice(len(MOVE_TYPES), p=probabilities)]
+
+    def update(self, movement_type, accepted):
+        """
+        Count the outcome of a step, invalid movements count as rejected.
+
+        Parameters
+        ----------
+        movement_type : str
+            Movement type of the step.
+        accepted : bool
+            Whether the movement was valid and accepted.
+        """
+        if self.frozen:
+            return
+        self.attempts[movement_type] += 1
+        self.accepts[movement_type] += accepted
+        if sum(self.attempts.values()) >= self.burn_in:
+            self.freeze()
+
+    def freeze(self):
+        """
+        Set the weights from the acceptance rates and stop learning.
+        """
+        rates = {
+            move: self.accepts[move] / self.attempts[move] if self.attempts[move] else 0
+            for move in MOVE_TYPES
+        }
+        total = sum(rates.values())
+        if total > 0:
+            weights = {move: max(rates[move] / total, self.min_weight) for move in MOVE_TYPES}
+            norm = sum(weights.values())
+            self.weights = {move: weight / norm for move, weight in weights.items()}
+        self.frozen = True
@@ -2,6 +2,8 @@
 
 Simple class for handling proteins as chains of HP residues.
 See the `Residue` class for more information on HP residues.
+The sequence itself is held by a `Sequence` object shared by every copy
+of the protein.
 """
 
 # standard library
@@ -10,6 +12,7 @@ import math
 
 # local
 from src.residue import Residue
+from src.sequence import Sequence
 
 
 class Protein:
@@ -18,6 +21,8 @@ class Protein:
 
     Attributes
     ----------
+    hp_sequence : Sequence
+        Immutable sequence data, shared between copies.
     length : int
         Length of the protein.
     sequence : str
@@ -39,18 +44,31 @@ class Protein:
         Check if the residue is in a corner of the protein.
     """
 
-    def __init__(self, sequence):
+    __slots__ = ("hp_sequence", "residues")
+
+    def __init__(self, sequence, model=None):
         """
         create Protein object
 
         Parameters
         ----------
-        sequence : str
+        sequence : str or Sequence
             sequence of residues
+        model : EnergyModel
+            energy model of a sequence given as a string, HP if None
         """
-        self.length = len(sequence)
-        self.sequence = sequence
-        self.residues = [Residue(i, sequence[i]) for i in range(self.length)]
+        if not isinstance(sequence, Sequence):
+            sequence = Sequence(sequence, model)
+        self.hp_sequence = sequence
+        self.residues = [Residue(i, r) for i, r in enumerate(sequence.hp)]
+
+    @property
+    def length(self):
+        return self.hp_sequence.length
+
+    @property
+    def sequence(self):
+        return self.hp_sequence.hp
 
     def get_residue(self, index):
         """
@@ -77,7 +95,7 @@ class Protein:
         -------
         List of hydrophobic residues.
         """
-        return [residue for residue in self.residues if residue.typeHP == "H"]
+        return [self.residues[i] for i in self.hp_sequence.h_indices]
 
     def get_consecutive(self, residue):
         """
@@ -166,6 +184,7 @@ class Protein:
         cls = self.__class__
         result = cls.__new__(cls)
         memo[id(self)] = result
-        for key, value in self.__dict__.items():
-            setattr(result, key, deepcopy(value, memo))
+        # the sequence is shared, only the residues are copied
+        result.hp_sequence = self.hp_sequence
+        result.residues = deepcopy(self.residues, memo)
         return result
@@ -0,0 +1,225 @@
+"""Steepest-descent quench of a conformation.
+
+The quench enumerates every valid end, corner, crankshaft and pull movement
+of the current conformation, scores the energy change of all of them at
+once, and applies the one that lowers the energy the most. It repeats until
+no movement lowers the energy, i.e. until a local minimum of the movement
+set. Ties are broken by the order of enumeration, so the quench is
+deterministic.
+
+The movements are enumerated on the coordinates of the residues, as the
+residues they move and their new positions, without copying the lattice.
+Their energy changes are then computed in one vectorized pass: the contacts
+between a moved residue and the residues that stay in place are read from
+the flat cells around its old and new positions, and the contacts between two
+residues moved by the same movement are compared pairwise.
+"""
+
+import copy
+import numpy as np
+
+from src.lattice import DIRECTIONS
+
+
+def _adjacent(first, second):
+    return abs(first[0] - second[0]) + abs(first[1] - second[1]) == 1
+
+
+def enumerate_movements(lattice):
+    """
+    Return every valid end, corner, crankshaft and pull movement of a lattice.
+
+    Parameters
+    ----------
+    lattice : Lattice
+        Lattice of the conformation.
+
+    Returns
+    -------
+    list
+        Movements as lists of (index, new coordinates) pairs, in the order
+        in which the residues are to be moved.
+    """
+    coords = [residue.get_coords() for residue in lattice.protein.residues]
+    length = len(coords)
+    is_empty = lattice.is_empty
+    movements = []
+    if length < 2:
+        return movements
+
+    # end movements, around the second and the second to last residues
+    for end, anchor in ((0, 1), (length - 1, length - 2)):
+        i, j = coords[anchor]
+        for di, dj in DIRECTIONS:
+            if is_empty((i + di, j + dj)):
+                movements.append([(end, (i + di, j + dj))])
+
+    for index in range(1, length - 1):
+        (pi, pj), (i, j), (ni, nj) = coords[index - 1], coords[index], coords[index + 1]
+
+        # corner movement, across the square of the corner
+        if pi != ni and pj != nj:
+            corner = (pi + ni - i, pj + nj - j)
+            if is_empty(corner):
+                movements.append([(index, corner)])
+
+        # crankshaft movement, flip of the U formed with the next residue
+        if index < length - 2:
+            qi, qj = coords[index + 2]
+            di, dj = i - pi, j - pj
+            if (
+                _adjacent((pi, pj), (qi, qj))
+                and coords[index + 1] == (qi + di, qj + dj)
+                and is_empty((pi - di, pj - dj))
+                and is_empty((qi - di, qj - dj))
+            ):
+                movements.append(
+                    [(index, (pi - di, pj - dj)), (index + 1, (qi - di, qj - dj))]
+                )
+
+        # pull movements, towards each of the consecutive residues
+        for anchor, step in ((index + 1, -1), (index - 1, 1)):
+            ai, aj = coords[anchor]
+            for di, dj in (DIRECTIONS[:2] if ai == i else DIRECTIONS[2:]):
+                pulled = (ai + di, aj + dj)
+                follower = (i + di, j + dj)
+                if not (is_empty(pulled) and is_empty(follower)):
+                    continue
+                movement = [(index, pulled), (index + step, follower)]
+                # the rest of the chain follows until it is connected again
+                previous = follower
+                k = index + 2 * step
+                while 0 <= k < length and not _adjacent(coords[k], previous):
+                    previous = coords[k - 2 * step]
+                    movement.append((k, previous))
+                    k += step
+                movements.append(movement)
+    return movements
+
+
+def energy_changes(lattice, movements):
+    """
+    Return the energy changes of movements of a lattice.
+
+    Parameters
+    ----------
+    lattice : Lattice
+        Lattice of the conformation.
+    movements : list
+        Movements as lists of (index, new coordinates) pairs.
+
+    Returns
+    -------
+    numpy.ndarray
+        Energy change of each movement.
+    """
+    sequence = lattice.protein.hp_sequence
+    matrix = sequence.model.matrix
+    codes = np.array(sequence.codes)
+    n_movements = len(movements)
+    if not n_movements:
+        return np.zeros(0, dtype=matrix.dtype)
+
+    # one entry per moved residue of each movement
+    sizes = np.array([len(movement) for movement in movements])
+    movement_ids = np.repeat(np.arange(n_movements), sizes)
+    indices = np.array([index for movement in movements for index, _ in movement])
+    new = np.array([coords for movement in movements for _, coords in movement])
+    old = lattice.get_conformation()[indices]
+
+    moved = np.zeros((n_movements, lattice.protein.length), dtype=bool)
+    moved[movement_ids, indices] = True
+
+    # contacts with the residues that stay in place, read from the flat
+    # cells around each position, the border cells are negative like the
+    # empty ones
+    offsets = np.array(lattice.offsets)
+    stride = np.array((lattice.stride, 1))
+    entry_changes = np.zeros(len(indices), dtype=matrix.dtype)
+    for positions, sign in ((new, 1), (old, -1)):
+        around = ((positions + 1) @ stride)[:, None] + offsets[None, :]
+        neighbors = lattice.cells[around].astype(np.intp)
+        occupied = np.maximum(neighbors, 0)
+        valid = (
+            (neighbors >= 0)
+            & (np.abs(neighbors - indices[:, None]) > 1)
+            & ~moved[movement_ids[:, None], occupied]
+        )
+        energies = matrix[codes[indices][:, None], codes[occupied]]
+        entry_changes += sign * np.where(valid, energies, 0).sum(axis=1)
+    changes = np.bincount(movement_ids, entry_changes, n_movements)
+
+    # contacts between the residues moved by the same movement, as pairs
+    # of an entry with each of the next entries of its movement
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    slots = np.arange(len(indices)) - np.repeat(starts, sizes)
+    n_partners = np.repeat(sizes, sizes) - 1 - slots
+    first = np.repeat(np.arange(len(indices)), n_partners)
+    second = (
+        first
+        + 1
+        + np.arange(len(first))
+        - np.repeat(np.cumsum(n_partners) - n_partners, n_partners)
+    )
+    first_indices = indices[first]
+    second_indices = indices[second]
+    energies = np.where(
+        np.abs(first_indices - second_indices) > 1,
+        matrix[codes[first_indices], codes[second_indices]],
+        0,
+    )
+    pair_changes = np.zeros(len(first), dtype=matrix.dtype)
+    for positions, sign in ((new, 1), (old, -1)):
+        distance = np.abs(positions[first] - positions[second]).sum(axis=1)
+        pair_changes += sign * np.where(distance == 1, energies, 0)
+    changes += np.bincount(movement_ids[first], pair_changes, n_movements)
+    return changes.astype(matrix.dtype)
+
+
+def apply_movement(lattice, movement):
+    """
+    Apply a movement to a lattice, in place.
+
+    Parameters
+    ----------
+    lattice : Lattice
+        Lattice of the conformation.
+    movement : list
+        Movement as a list of (index, new coordinates) pairs.
+    """
+    residues = lattice.protein.residues
+    # free every old position before filling the new ones
+    for index, _ in movement:
+        lattice.remove_residue(residues[index].get_coords())
+    for index, coords in movement:
+        lattice.place_residue(residues[index], coords)
+
+
+def quench(lattice_input, max_moves=None):
+    """
+    Apply the best improving movement until a local minimum is reached.
+
+    Parameters
+    ----------
+    lattice_input : Lattice
+        Lattice to quench, not modified.
+    max_moves : int, optional
+        Maximum number of movements to apply, no limit if None.
+
+    Returns
+    -------
+    Lattice
+        Lattice at a local minimum of the movement set.
+    int
+        Number of movements applied.
+    """
+    lattice = copy.deepcopy(lattice_input)
+    n_moves = 0
+    while max_moves is None or n_moves < max_moves:
+        movements = enumerate_movements(lattice)
+        changes = energy_changes(lattice, movements)
+        if not len(changes) or changes.min() >= 0:
+            break
+        apply_movement(lattice, movements[int(np.argmin(changes))])
+        n_moves += 1
+    return lattice, n_moves
@@ -0,0 +1,391 @@
+"""Executor backends running the replicas of the REMC search.
+
+The state the exchanges need, the temperature rung, current energy and
+lowest energy of each replica, is kept in preallocated arrays indexed by
+replica. A round runs every replica for some steps at the temperature of
+its rung, then writes its energies to its own slot of the arrays, under the
+lock of the state. The exchanges only read the energies and swap rungs, so
+the samplers never move between workers.
+
+The conformations are not in the arrays, each sampler keeps its own. A
+sampler never changes a conformation in place: every movement works on a
+copy of the lattice, which replaces the current one once accepted, while
+the previous lattices live on as the lowest energy lattice and in the
+statistics tracker. A preallocated row per replica would need movements
+applied in place and undone when rejected. Nothing outside of a replica
+reads its conformation between rounds either, since the exchanges swap
+rungs and not conformations.
+
+- serial: the replicas run one after the other in the calling thread.
+- threads: the replicas run concurrently on a thread pool, sharing the
+  arrays by reference. Each sampler draws from its own random stream, and
+  the steps of the replicas only touch their own conformations, proposals
+  and statistics accumulators. Worth it on free-threaded builds of Python,
+  where the steps do not hold a global lock.
+- processes: each worker process owns a share of the samplers for the
+  whole search, and the arrays are in shared memory, so that a round only
+  sends a command to each worker instead of pickling the samplers.
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ReplicaState:
+    """
+    Temperature rung and energies of the replicas, in preallocated arrays.
+
+    The conformations stay in the lattices of the samplers, see the module
+    docstring.
+
+    Attributes
+    ----------
+    ladder : numpy.ndarray
+        Index of the temperature of each replica.
+    energies : numpy.ndarray
+        Current energy of each replica.
+    best_energies : numpy.ndarray
+        Lowest energy visited by each replica.
+    lock : Lock
+        Lock of the arrays, held to write a replica or exchange rungs.
+
+    Methods
+    -------
+    update(slot, sampler):
+        Write the energies of a sampler.
+    owners():
+        Return the replica at each temperature rung.
+    """
+
+    def __init__(self, n_replica, dtype, shared=False, buffers=None, lock=None):
+        """
+        Allocate the arrays of the replicas, each one on its own rung.
+
+        Parameters
+        ----------
+        n_replica : int
+            Number of replicas.
+        dtype : numpy.dtype
+            Type of the energies.
+        shared : bool
+            Allocate the arrays in shared memory, for worker processes.
+        buffers : tuple, optional
+            Shared buffers of an existing state, attached to instead of
+            allocating new arrays.
+        lock : Lock, optional
+            Lock of an existing state.
+        """
+        dtype = np.dtype(dtype)
+        if buffers is None:
+            if shared:
+                energy_type = np.ctypeslib.as_ctypes_type(dtype)
+                buffers = (
+                    multiprocessing.RawArray("q", n_replica),
+                    multiprocessing.RawArray(energy_type, n_replica),
+                    multiprocessing.RawArray(energy_type, n_replica),
+                )
+                lock = multiprocessing.Lock()
+            else:
+                buffers = (
+                    np.zeros(n_replica, dtype=np.int64),
+                    np.zeros(n_replica, dtype=dtype),
+                    np.zeros(n_replica, dtype=dtype),
+                )
+                lock = threading.Lock()
+            ladder = np.frombuffer(buffers[0], dtype=np.int64)
+            ladder[:] = np.arange(n_replica)
+        self.buffers = buffers
+        self.lock = lock
+        self.ladder = np.frombuffer(buffers[0], dtype=np.int64)
+        self.energies = np.frombuffer(buffers[1], dtype=dtype)
+        self.best_energies = np.frombuffer(buffers[2], dtype=dtype)
+
+    def update(self, slot, sampler):
+        """
+        Write the energies of a sampler.
+
+        Parameters
+        ----------
+        slot : int
+            Index of the replica of the sampler.
+        sampler : Sampler
+            Sampler of the replica.
+        """
+        with self.lock:
+            self.energies[slot] = sampler.energy
+            self.best_energies[slot] = sampler.best_energy
+
+    def owners(self):
+        """
+        Return the replica at each temperature rung.
+
+        Returns
+        -------
+        numpy.ndarray
+            Index of the replica at each rung, by increasing temperature.
+        """
+        return np.argsort(self.ladder)
+
+
+def _configure(sampler, slot, state, temperatures, proposals):
+    """
+    Set up a sampler for the temperature rung of its replica, with the
+    replica index and the adaptive proposal of the rung.
+    """
+    rung = int(state.ladder[slot])
+    sampler.set_temperature(temperatures[rung])
+    sampler.replica = rung
+    if proposals:
+        sampler.proposal = proposals[rung]
+
+
+class SerialBackend:
+    """
+    Replicas run one after the other in the calling thread.
+
+    Methods
+    -------
+    run(n_steps):
+        Run every replica for some steps.
+    quench():
+        Quench the conformation of every replica.
+    close():
+        Stop the replicas and return the lowest energy lattice.
+    """
+
+    def __init__(self, samplers, state, temperatures, proposals=None, n_workers=None):
+        """
+        Initialize the backend on the samplers of the replicas.
+
+        Parameters
+        ----------
+        samplers : list
+            Sampler of each replica.
+        state : ReplicaState
+            Rungs and energies of the replicas.
+        temperatures : numpy.ndarray
+            Temperature of each rung.
+        proposals : list, optional
+            Adaptive proposal of each rung.
+        n_workers : int, optional
+            Number of workers, unused.
+        """
+        self.samplers = samplers
+        self.state = state
+        self.temperatures = temperatures
+        self.proposals = proposals
+        for slot, sampler in enumerate(samplers):
+            state.update(slot, sampler)
+
+    def _map(self, function):
+        for slot in range(len(self.samplers)):
+            function(slot)
+
+    def _run(self, slot, n_steps):
+        sampler = self.samplers[slot]
+        sampler.run(n_steps)
+        self.state.update(slot, sampler)
+
+    def _quench(self, slot):
+        sampler = self.samplers[slot]
+        sampler.quench()
+        self.state.update(slot, sampler)
+
+    def run(self, n_steps):
+        """
+        Run every replica for some steps at the temperature of its rung.
+
+        Parameters
+        ----------
+        n_steps : int
+            Number of steps of each replica.
+        """
+        for slot, sampler in enumerate(self.samplers):
+            _configure(sampler, slot, self.state, self.temperatures, self.proposals)
+        self._map(lambda slot: self._run(slot, n_steps))
+
+    def quench(self):
+        """
+        Quench the conformation of every replica into its lowest energy
+        lattice.
+        """
+        self._map(self._quench)
+
+    def close(self):
+        """
+        Stop the replicas.
+
+        Returns
+        -------
+        Lattice
+            Lowest energy lattice visited by the replicas.
+        """
+        for sampler in self.samplers:
+            sampler.close()
+        return min(self.samplers, key=lambda sampler: sampler.best_energy).best_lattice
+
+
+class ThreadBackend(SerialBackend):
+    """
+    Replicas run concurrently on a pool of threads.
+    """
+
+    def __init__(self, samplers, state, temperatures, proposals=None, n_workers=None):
+        super().__init__(samplers, state, temperatures, proposals)
+        self._executor = ThreadPoolExecutor(n_workers or len(samplers))
+
+    def _map(self, function):
+        # propagate the exceptions of the replicas
+        for _ in self._executor.map(function, range(len(self.samplers))):
+            pass
+
+    def close(self):
+        self._executor.shutdown()
+        return super().close()
+
+
+def _serve(connection, slots, samplers, buffers, lock, dtype, temperatures):
+    """
+    Run the commands of the parent on the samplers of a worker process.
+    """
+    state = ReplicaState(len(temperatures), dtype, buffers=buffers, lock=lock)
+    while True:
+        command, argument = connection.recv()
+        try:
+            if command == "run":
+                for slot, sampler in zip(slots, samplers):
+                    _configure(sampler, slot, state, temperatures, None)
+                    sampler.run(argument)
+                    state.update(slot, sampler)
+            elif command == "quench":
+                for slot, sampler in zip(slots, samplers):
+                    sampler.quench()
+                    state.update(slot, sampler)
+            elif command == "close":
+                for sampler in samplers:
+                    sampler.close()
+                best = min(samplers, key=lambda sampler: sampler.best_energy)
+                connection.send((best.best_energy, best.best_lattice))
+                return
+            connection.send(None)
+        except Exception as error:
+            connection.send(error)
+            return
+
+
+class ProcessBackend:
+    """
+    Replicas run in worker processes, which own their samplers.
+
+    Methods
+    -------
+    run(n_steps):
+        Run every replica for some steps.
+    quench():
+        Quench the conformation of every replica.
+    close():
+        Stop the workers and return the lowest energy lattice.
+    """
+
+    def __init__(self, samplers, state, temperatures, proposals=None, n_workers=None):
+        """
+        Start the workers, each one with a share of the samplers.
+
+        Parameters
+        ----------
+        samplers : list
+            Sampler of each replica.
+        state : ReplicaState
+            Rungs and energies of the replicas, in shared memory.
+        temperatures : numpy.ndarray
+            Temperature of each rung.
+        proposals : list, optional
+            Adaptive proposals, not supported by the worker processes.
+        n_workers : int, optional
+            Number of worker processes, all the available CPUs if None.
+        """
+        if proposals:
+            raise ValueError("the processes backend does not support adaptive proposals")
+        for slot, sampler in enumerate(samplers):
+            state.update(slot, sampler)
+        n_workers = min(n_workers or os.cpu_count(), len(samplers))
+        self._connections = []
+        self._workers = []
+        for worker in range(n_workers):
+            slots = list(range(worker, len(samplers), n_workers))
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve,
+                args=(
+                    child,
+                    slots,
+                    [samplers[slot] for slot in slots],
+                    state.buffers,
+                    state.lock,
+                    state.energies.dtype,
+                    temperatures,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._connections.append(parent)
+            self._workers.append(process)
+
+    def _command(self, command, argument=None):
+        for connection in self._connections:
+            connection.send((command, argument))
+        replies = [connection.recv() for connection in self._connections]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                self._stop()
+                raise reply
+        return replies
+
+    def _stop(self):
+        for process in self._workers:
+            process.terminate()
+            process.join()
+        self._workers = []
+
+    def run(self, n_steps):
+        """
+        Run every replica for some steps at the temperature of its rung.
+
+        Parameters
+        ----------
+        n_steps : int
+            Number of steps of each replica.
+        """
+        self._command("run", n_steps)
+
+    def quench(self):
+        """
+        Quench the conformation of every replica into its lowest energy
+        lattice.
+        """
+        self._command("quench")
+
+    def close(self):
+        """
+        Stop the workers.
+
+        Returns
+        -------
+        Lattice
+            Lowest energy lattice visited by the replicas, None if the
+            workers were stopped by an error.
+        """
+        if not self._workers:
+            return None
+        replies = self._command("close")
+        for process in self._workers:
+            process.join()
+        return min(replies, key=lambda reply: reply[0])[1]
+
+
+# executor backends by name
+BACKENDS = {"serial": SerialBackend, "threads": ThreadBackend, "processes": ProcessBackend}
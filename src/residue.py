@@ -4,8 +4,6 @@ Simple class for handling HP residues. HP residues are a simplification of
 protein residues, classified as either hydrophobic (H) or polar (P).
 """
 
-from copy import deepcopy
-
 
 class Residue:
     """
@@ -32,6 +30,9 @@ class Residue:
         Check if two residues are consecutive.
     """
 
+    # only the coordinates change between the copies of a residue
+    __slots__ = ("index", "typeHP", "coordI", "coordJ")
+
     def __init__(self, input_index, input_type):
         """
         create Residue object
@@ -87,8 +88,11 @@ class Residue:
         cls = self.__class__
         result = cls.__new__(cls)
         memo[id(self)] = result
-        for key, value in self.__dict__.items():
-            setattr(result, key, deepcopy(value, memo))
+        # index and type are immutable and shared with the copy
+        result.index = self.index
+        result.typeHP = self.typeHP
+        result.coordI = self.coordI
+        result.coordJ = self.coordJ
         return result
 
     def __str__(self):
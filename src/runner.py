@@ -0,0 +1,373 @@
+"""Shared helpers to run a folding job from parsed arguments.
+
+Used by the `fold.py` command line and by the folding server, so that both
+accept the same parameters and behave the same way. The server rejects the
+global options it cannot honor, see `server.UNSUPPORTED_OPTIONS`.
+"""
+
+# local
+from src.protein import Protein
+from src.lattice import Lattice
+from src.MCsearch import MCsearch
+from src.REMCsearch import REMCsearch
+from src.quench import quench
+from src.proposal import AdaptiveProposal
+from src.schedules import SCHEDULES
+from src.store import ResultStore
+from src.exact import energy_cutoff
+from src.energy import HP, MODELS, load_matrix
+from src.autotune import load_profile, length_bucket
+
+# arguments of the main parser, that are not parameters of the searches
+GLOBAL_ARGS = (
+    "protein",
+    "file",
+    "initial_lattice",
+    "energy_model",
+    "energy_matrix",
+    "telemetry",
+    "telemetry_format",
+    "telemetry_interval",
+    "store",
+    "store_size",
+    "ensemble_stats",
+    "restarts",
+    "workers",
+    "profiles",
+    "tunable",
+    "subparser_name",
+)
+
+
+def split_args(args):
+    """
+    Split parsed arguments into global options and search parameters.
+
+    Parameters
+    ----------
+    args : argparse.Namespace or dict
+        Parsed arguments.
+
+    Returns
+    -------
+    dict
+        Global options, see GLOBAL_ARGS.
+    dict
+        Parameters of the search.
+    """
+    params = dict(vars(args) if not isinstance(args, dict) else args)
+    options = {key: params.pop(key, None) for key in GLOBAL_ARGS}
+    return options, params
+
+
+def make_energy_model(energy_model="HP", energy_matrix=None):
+    """
+    Return the energy model requested by the global options.
+
+    Parameters
+    ----------
+    energy_model : str
+        Name of a built-in energy model.
+    energy_matrix : str, optional
+        Path of a contact energy matrix file, replacing the built-in model.
+
+    Returns
+    -------
+    EnergyModel
+        Energy model of the protein.
+    """
+    if energy_matrix:
+        return load_matrix(energy_matrix)
+    return MODELS[energy_model or "HP"]
+
+
+def read_sequence(protein=None, file=None, model=None):
+    """
+    Read the protein sequence and convert it to the alphabet of the energy
+    model if needed.
+
+    Parameters
+    ----------
+    protein : str
+        Protein sequence given directly.
+    file : str
+        Path to a fasta file containing the protein sequence.
+    model : EnergyModel
+        Energy model of the protein, HP if None.
+
+    Returns
+    -------
+    Sequence of the protein in the alphabet of the energy model.
+    """
+    if protein:
+        sequence = protein
+    elif file:
+        with open(file, "r") as handle:
+            sequence = ""
+            # read fasta file without header
+            for line in handle:
+                if line.startswith(">"):
+                    continue
+                else:
+                    sequence += line.strip()
+
+    # if sequence is not in the alphabet of the model, convert it
+    return (model or HP).convert(sequence)
+
+
+def make_proposals(sub_command, params):
+    """
+    Create the adaptive proposals requested by the search parameters.
+
+    Parameters
+    ----------
+    sub_command : str
+        Search to run, either MC or REMC.
+    params : dict
+        Parameters of the search, the adaptive_burn_in entry is removed.
+
+    Returns
+    -------
+    list
+        One AdaptiveProposal per replica, None if not requested.
+    """
+    burn_in = params.pop("adaptive_burn_in", None)
+    if not burn_in:
+        return None
+    n_proposals = params["n_replica"] if sub_command == "REMC" else 1
+    return [AdaptiveProposal(burn_in) for _ in range(n_proposals)]
+
+
+def make_schedule(params):
+    """
+    Create the cooling schedule requested by the MC search parameters.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters of the search, the entries of the schedule are removed.
+
+    Returns
+    -------
+    Schedule
+        Cooling schedule of the search, None if not requested.
+    """
+    name = params.pop("schedule", None)
+    temperature_end = params.pop("temperature_end", None)
+    stagnation = params.pop("stagnation", None)
+    reheat_factor = params.pop("reheat_factor", None)
+    if name is None:
+        return None
+    return SCHEDULES[name](
+        params["temperature"],
+        temperature_end,
+        params["n_steps"],
+        stagnation=stagnation,
+        reheat_factor=reheat_factor,
+    )
+
+
+def apply_profile(params, tunable, path, sequence):
+    """
+    Set the REMC options left out from the tuned profile of a sequence.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters of the REMC search, updated in place.
+    tunable : list
+        Options left out on the command line.
+    path : str
+        Path of the JSON file of the profiles.
+    sequence : str
+        Sequence of the protein.
+
+    Returns
+    -------
+    str
+        Length bucket of the profile applied, None if no profile applies.
+    """
+    profile = load_profile(path, len(sequence))
+    if not tunable or profile is None:
+        return None
+    for name in tunable:
+        params[name] = profile[name]
+    return length_bucket(len(sequence))
+
+
+def resolve_energy_cutoff(params, sequence):
+    """
+    Replace an automatic energy cutoff by the ground-state energy.
+
+    Sequences too long for the exact solver get no cutoff, and their search
+    runs all its steps.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters of the search, updated in place.
+    sequence : str
+        HP sequence of the protein.
+
+    Returns
+    -------
+    bool
+        Whether the cutoff was set to the ground-state energy, None if the
+        cutoff was not automatic.
+    """
+    if params.get("energy_cutoff") != "auto":
+        return None
+    params["energy_cutoff"] = energy_cutoff(sequence)
+    return params["energy_cutoff"] is not None
+
+
+def run_search(
+    sub_command,
+    params,
+    lattice,
+    callback=None,
+    telemetry=None,
+    proposals=None,
+    statistics=None,
+    schedule=None,
+    lowest=False,
+):
+    """
+    Run the MC or REMC search on a lattice.
+
+    Parameters
+    ----------
+    sub_command : str
+        Search to run, either MC or REMC.
+    params : dict
+        Parameters of the search, as parsed from the sub-command.
+    lattice : Lattice or list
+        Initial lattice of the search, or initial lattices of its replicas.
+        MC starts from the first one.
+    callback : callable, optional
+        Progress callback given to the search.
+    telemetry : Telemetry, optional
+        Telemetry in which the search records its steps.
+    proposals : list, optional
+        Adaptive proposals of the search, created from the parameters if None.
+    statistics : EnsembleStatistics, optional
+        Statistics in which the search records its samples.
+    schedule : Schedule, optional
+        Cooling schedule of the MC search, created from the parameters if None.
+    lowest : bool
+        Return the lowest energy lattice of the MC search instead of its
+        final one, the REMC search always returns its lowest energy lattice.
+
+    Returns
+    -------
+    Lattice
+        Final lattice of the search, quenched to a local minimum if the
+        quench parameter is set.
+    """
+    params = dict(params)
+    first = lattice[0] if isinstance(lattice, list) else lattice
+    resolve_energy_cutoff(params, first.protein.sequence)
+    if proposals is None:
+        proposals = make_proposals(sub_command, params)
+    else:
+        params.pop("adaptive_burn_in", None)
+    final_quench = params.pop("quench", False)
+
+    if sub_command == "MC":
+        if schedule is None:
+            schedule = make_schedule(params)
+        else:
+            make_schedule(params)
+        if isinstance(lattice, list):
+            lattice = lattice[0]
+        final_lattice = MCsearch(
+            **params,
+            lattice_input=lattice,
+            callback=callback,
+            telemetry=telemetry,
+            proposal=proposals[0] if proposals else None,
+            statistics=statistics,
+            schedule=schedule,
+            lowest=lowest,
+        )
+    elif sub_command == "REMC":
+        final_lattice = REMCsearch(
+            **params,
+            lattice_input=lattice,
+            callback=callback,
+            telemetry=telemetry,
+            proposals=proposals,
+            statistics=statistics,
+        )
+    else:
+        raise ValueError(f"unknown search {sub_command}")
+
+    if final_quench:
+        final_lattice, _ = quench(final_lattice)
+    return final_lattice
+
+
+def build_lattice(sequence, initial_lattice, store=None, model=None):
+    """
+    Create the initial lattice of a protein sequence.
+
+    Parameters
+    ----------
+    sequence : str
+        Sequence of the protein.
+    initial_lattice : str
+        Initial placement mode, either linear, random or stored.
+    store : str, optional
+        Path of the result store, needed by the stored placement mode.
+    model : EnergyModel, optional
+        Energy model of the protein, HP if None.
+
+    Returns
+    -------
+    Lattice or list
+        Lattice with the protein placed on it, or the lattices of the best
+        stored conformations, by increasing energy, in the stored mode. A
+        linear lattice is used when nothing is stored for the sequence.
+    """
+    if initial_lattice == "stored":
+        if store is None:
+            raise ValueError("the stored initial lattice needs a result store")
+        with ResultStore(store) as results:
+            lattices = results.load_lattices(sequence, model=model)
+        if lattices:
+            return lattices
+        initial_lattice = "linear"
+    return Lattice(Protein(sequence, model), initial_lattice)
+
+
+def save_result(store, store_size, sequence, lattice, metadata, model=None):
+    """
+    Add the final lattice of a search to a result store.
+
+    Parameters
+    ----------
+    store : str
+        Path of the result store.
+    store_size : int
+        Number of conformations kept for each sequence.
+    sequence : str
+        Sequence of the protein.
+    lattice : Lattice
+        Final lattice of the search.
+    metadata : dict
+        Description of the run.
+    model : EnergyModel, optional
+        Energy model of the protein, HP if None.
+
+    Returns
+    -------
+    True if the conformation is among the best stored ones.
+    """
+    with ResultStore(store, store_size) as results:
+        return results.add(
+            sequence,
+            lattice.get_conformation(),
+            lattice.calculate_energy(),
+            metadata,
+            model,
+        )
@@ -0,0 +1,291 @@
+"""Resumable Metropolis sampler of the conformations of a protein.
+
+A sampler owns its current conformation and energy, its random stream and
+its counters, so that a search can run it for some steps, change its
+temperature and run it again without copying the conformation or
+recomputing its energy. The MC search runs a single sampler, and the REMC
+search keeps one sampler per replica and exchanges their temperatures.
+"""
+
+import copy
+import numpy as np
+
+from src.movement import Movement
+from src.quench import quench
+
+# Boltzmann constant
+K_b = 0.0019872041
+
+
+class Sampler:
+    """
+    Metropolis sampler of the conformations of a protein at a temperature.
+
+    Attributes
+    ----------
+    lattice : Lattice
+        Current lattice, not modified once accepted.
+    energy : int
+        Energy of the current lattice.
+    best_lattice : Lattice
+        Lowest energy lattice visited.
+    best_energy : int
+        Energy of the lowest energy lattice.
+    temperature : float
+        Temperature of the next step.
+    rng : numpy.random.RandomState
+        Random stream of the sampler.
+    proposal : AdaptiveProposal
+        Adaptive choice of the movement types, None for uniform choices.
+    pivot_probability : float
+        Probability of a step to be a pivot movement.
+    replica : int
+        Index under which the steps are recorded in the telemetry.
+    schedule : Schedule
+        Cooling schedule setting the temperature of each step, if any.
+    steps : int
+        Number of steps performed.
+    accepted : int
+        Number of accepted movements.
+
+    Methods
+    -------
+    run(n_steps, callback, energy_cutoff):
+        Perform steps from the current conformation.
+    step():
+        Perform one step.
+    set_temperature(temperature):
+        Change the temperature of the next steps.
+    quench():
+        Quench the current conformation into the lowest energy lattice.
+    close():
+        Stop recording the samples in the statistics.
+    """
+
+    def __init__(
+        self,
+        lattice_input,
+        temperature,
+        seed=None,
+        proposal=None,
+        pivot_probability=0.0,
+        telemetry=None,
+        replica=0,
+        statistics=None,
+        schedule=None,
+    ):
+        """
+        Initialize the sampler on a copy of a lattice.
+
+        Parameters
+        ----------
+        lattice_input : Lattice
+            Initial lattice, copied.
+        temperature : float
+            Temperature of the steps, replaced at each step by the one of
+            the schedule if given.
+        seed : int, optional
+            Seed of the random stream, drawn from the global one if None.
+        proposal : AdaptiveProposal, optional
+            Adaptive choice of the movement types, by default every valid
+            movement of a random residue is equally likely.
+        pivot_probability : float
+            Probability of a step to be a pivot movement around a random
+            residue, instead of a local movement.
+        telemetry : Telemetry, optional
+            Telemetry in which each step is recorded.
+        replica : int
+            Index of the replica under which the steps are recorded.
+        statistics : EnsembleStatistics, optional
+            Statistics in which each step is recorded as a sample, not
+            supported with a schedule.
+        schedule : Schedule, optional
+            Cooling schedule of a simulated annealing search.
+        """
+        if statistics is not None and schedule is not None:
+            # the samples are binned by fixed temperature
+            raise ValueError("the ensemble statistics do not support a cooling schedule")
+        if seed is None:
+            seed = np.random.randint(2**31)
+        self.rng = np.random.RandomState(seed)
+        self.lattice = copy.deepcopy(lattice_input)
+        self.energy = self.lattice.calculate_energy()
+        self.best_lattice = self.lattice
+        self.best_energy = self.energy
+        self.temperature = temperature
+        self.proposal = proposal
+        self.pivot_probability = pivot_probability
+        self.telemetry = telemetry
+        self.replica = replica
+        self.schedule = schedule
+        self.steps = 0
+        self.accepted = 0
+
+        self._tracker = None
+        if statistics is not None:
+            self._tracker = statistics.tracker(self.lattice, temperature)
+
+    def _propose(self):
+        """
+        Draw the movements of a step.
+
+        Returns
+        -------
+        tuple
+            Valid movements and movement type drawn (None if uniform).
+        """
+        rng = self.rng
+        lattice = self.lattice
+        protein = lattice.protein
+
+        if self.pivot_probability and rng.random_sample() < self.pivot_probability:
+            residue = protein.residues[rng.randint(protein.length)]
+            movement = Movement("pivot", lattice, residue, rng)
+            return [movement] if movement.moved else [], "pivot"
+
+        if self.proposal is not None:
+            # choose the movement type, then a residue it applies to
+            movement_type = self.proposal.choose(rng)
+            if movement_type == "end":
+                index = (0, protein.length - 1)[rng.randint(2)]
+            else:
+                index = rng.randint(1, protein.length - 1)
+            movement = Movement(movement_type, lattice, protein.get_residue(index), rng)
+            return [movement] if movement.moved else [], movement_type
+
+        # choose a random residue
+        residue = protein.residues[rng.randint(protein.length)]
+
+        # compute the movement
+        movements = []
+        if protein.is_end(residue):
+            movements.append(Movement("end", lattice, residue, rng))
+        else:
+            if protein.is_corner(residue):
+                movements.append(Movement("corner", lattice, residue, rng))
+                movements.append(Movement("crankshaft", lattice, residue, rng))
+            movements.append(Movement("pull", lattice, residue, rng))
+
+        # filter movements
+        return [m for m in movements if m.moved], None
+
+    def step(self):
+        """
+        Perform one step.
+
+        Returns
+        -------
+        True if the movement of the step was accepted.
+        """
+        if self.schedule is not None:
+            self.temperature = self.schedule.temperature
+        temperature = self.temperature
+
+        accepted = False
+        movements, movement_type = self._propose()
+        if movements:
+            movement = movements[self.rng.randint(len(movements))]
+            new_energy = movement.lattice.calculate_energy()
+
+            # if the new energy is lower or if the Boltzmann condition is met
+            if new_energy <= self.energy or self.rng.random_sample() < np.exp(
+                -(new_energy - self.energy) / (temperature * K_b)
+            ):
+                if self._tracker is not None:
+                    self._tracker.move(
+                        self.lattice, movement.lattice, movement.moved_indices
+                    )
+                self.lattice = movement.lattice
+                self.energy = new_energy
+                self.accepted += 1
+                accepted = True
+
+                if new_energy < self.best_energy:
+                    self.best_lattice = movement.lattice
+                    self.best_energy = new_energy
+
+        if self.proposal is not None and movement_type != "pivot":
+            self.proposal.update(movement_type, accepted)
+
+        if self.telemetry is not None:
+            self.telemetry.record(self.replica, temperature, self.energy, accepted)
+
+        if self._tracker is not None:
+            self._tracker.record(self.energy)
+
+        if self.schedule is not None:
+            self.schedule.update(self.steps, self.energy, accepted)
+
+        self.steps += 1
+        return accepted
+
+    def run(self, n_steps, callback=None, energy_cutoff=None):
+        """
+        Perform steps from the current conformation.
+
+        Parameters
+        ----------
+        n_steps : int
+            Maximum number of steps to perform.
+        callback : callable, optional
+            Called after each step with the index of the step in this run
+            and the current energy, the run stops if it returns False.
+        energy_cutoff : int, optional
+            Energy at which the run stops.
+
+        Returns
+        -------
+        int
+            Number of steps performed.
+        """
+        for step in range(n_steps):
+            self.step()
+
+            if callback is not None and callback(step, self.energy) is False:
+                return step + 1
+
+            if energy_cutoff is not None and self.energy <= energy_cutoff:
+                return step + 1
+        return n_steps
+
+    def set_temperature(self, temperature):
+        """
+        Change the temperature of the next steps.
+
+        Parameters
+        ----------
+        temperature : float
+            New temperature.
+        """
+        if temperature == self.temperature:
+            return
+        self.temperature = temperature
+        if self._tracker is not None:
+            self._tracker.set_temperature(temperature)
+
+    def quench(self):
+        """
+        Quench a copy of the current conformation to a local minimum, and
+        keep it as the lowest energy lattice if it is lower. The current
+        conformation is not changed, so the sampled distribution is not
+        biased by the quench.
+
+        Returns
+        -------
+        int
+            Energy of the quenched conformation.
+        """
+        lattice, _ = quench(self.lattice)
+        energy = lattice.calculate_energy()
+        if energy < self.best_energy:
+            self.best_lattice = lattice
+            self.best_energy = energy
+        return energy
+
+    def close(self):
+        """
+        Stop recording the samples in the statistics.
+        """
+        if self._tracker is not None:
+            self._tracker.close()
+            self._tracker = None
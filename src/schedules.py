@@ -0,0 +1,254 @@
+"""Cooling schedules of the simulated annealing mode of the MC search.
+
+A schedule gives the temperature of each step of the search and is updated
+with the outcome of the step. The linear and geometric schedules cool down
+from a starting to a final temperature over the steps of the search. The
+adaptive schedules adjust the temperature from the measurements of the last
+window of steps: the acceptance rate, driven towards a target decreasing
+over the search, or the spread of the energy, which cools down more slowly
+where the specific heat is high.
+
+Every schedule keeps track of the lowest energy reached and, when given a
+stagnation length, reheats once that many steps pass without improvement.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from src.sampler import K_b
+
+
+class Schedule(ABC):
+    """
+    Base class of the cooling schedules.
+
+    Attributes
+    ----------
+    temperature_start : float
+        Starting temperature.
+    temperature_end : float
+        Final temperature.
+    n_steps : int
+        Number of steps of the search.
+    stagnation : int
+        Number of steps without improvement after which the search is
+        reheated, None to never reheat.
+    reheat_factor : float
+        Factor by which the temperature is raised when reheating, up to the
+        starting temperature.
+    temperature : float
+        Temperature of the current step.
+    best_energy : int
+        Lowest energy reached.
+    n_reheats : int
+        Number of reheats.
+
+    Methods
+    -------
+    update(step, energy, accepted):
+        Record the outcome of a step and set the next temperature.
+    reheat(step):
+        Raise the temperature and cool down again from there.
+    """
+
+    def __init__(
+        self,
+        temperature_start,
+        temperature_end,
+        n_steps,
+        stagnation=None,
+        reheat_factor=2.0,
+    ):
+        """
+        Initialize the schedule at its starting temperature.
+
+        Parameters
+        ----------
+        temperature_start : float
+            Starting temperature.
+        temperature_end : float
+            Final temperature.
+        n_steps : int
+            Number of steps of the search.
+        stagnation : int
+            Number of steps without improvement before reheating.
+        reheat_factor : float
+            Factor by which the temperature is raised when reheating.
+        """
+        self.temperature_start = temperature_start
+        self.temperature_end = temperature_end
+        self.n_steps = n_steps
+        self.stagnation = stagnation
+        self.reheat_factor = reheat_factor
+        self.temperature = temperature_start
+        self.best_energy = None
+        self.n_reheats = 0
+        self._last_improvement = 0
+        # step and temperature from which the schedule cools down
+        self._anchor_step = 0
+        self._anchor_temperature = temperature_start
+
+    def update(self, step, energy, accepted):
+        """
+        Record the outcome of a step and set the next temperature.
+
+        Parameters
+        ----------
+        step : int
+            Index of the step.
+        energy : int
+            Energy after the step.
+        accepted : bool
+            Whether the movement of the step was accepted.
+        """
+        if self.best_energy is None or energy < self.best_energy:
+            self.best_energy = energy
+            self._last_improvement = step
+        if self.stagnation and step - self._last_improvement >= self.stagnation:
+            self.reheat(step)
+        else:
+            self._cool(step, energy, accepted)
+
+    def reheat(self, step):
+        """
+        Raise the temperature and cool down again from there.
+
+        Parameters
+        ----------
+        step : int
+            Index of the step.
+        """
+        self.temperature = min(
+            self.temperature * self.reheat_factor, self.temperature_start
+        )
+        self._anchor_step = step
+        self._anchor_temperature = self.temperature
+        self._last_improvement = step
+        self.n_reheats += 1
+
+    def _progress(self, step):
+        """
+        Fraction of the cooling done, from the last anchor to the last step.
+        """
+        remaining = self.n_steps - 1 - self._anchor_step
+        if remaining <= 0:
+            return 1.0
+        return min((step + 1 - self._anchor_step) / remaining, 1.0)
+
+    @abstractmethod
+    def _cool(self, step, energy, accepted):
+        """
+        Set the temperature of the next step while cooling down.
+
+        Parameters
+        ----------
+        step : int
+            Index of the step.
+        energy : int
+            Energy after the step.
+        accepted : bool
+            Whether the movement of the step was accepted.
+        """
+
+
+class LinearSchedule(Schedule):
+    """
+    Cool down linearly to the final temperature.
+    """
+
+    def _cool(self, step, energy, accepted):
+        progress = self._progress(step)
+        self.temperature = self._anchor_temperature + progress * (
+            self.temperature_end - self._anchor_temperature
+        )
+
+
+class GeometricSchedule(Schedule):
+    """
+    Cool down by a constant factor per step to the final temperature.
+    """
+
+    def _cool(self, step, energy, accepted):
+        progress = self._progress(step)
+        self.temperature = self._anchor_temperature * (
+            self.temperature_end / self._anchor_temperature
+        ) ** progress
+
+
+class AcceptanceSchedule(Schedule):
+    """
+    Drive the acceptance rate towards a target decreasing over the search.
+
+    At the end of each window of steps, the temperature is lowered if more
+    movements than targeted were accepted, and raised otherwise. The target
+    decreases linearly from `target_start` to 0 over the search. By default,
+    the search is split into 200 windows.
+    """
+
+    def __init__(self, *args, window=None, target_start=0.5, factor=0.95, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window = window or max(self.n_steps // 200, 20)
+        self.target_start = target_start
+        self.factor = factor
+        self._accepted = 0
+        self._steps = 0
+
+    def _cool(self, step, energy, accepted):
+        self._accepted += accepted
+        self._steps += 1
+        if self._steps < self.window:
+            return
+        target = self.target_start * (1 - self._progress(step))
+        if self._accepted / self._steps > target:
+            self.temperature *= self.factor
+        else:
+            self.temperature /= self.factor
+        self.temperature = min(
+            max(self.temperature, self.temperature_end), self.temperature_start
+        )
+        self._accepted = 0
+        self._steps = 0
+
+
+class SpecificHeatSchedule(Schedule):
+    """
+    Cool down more slowly where the specific heat is high.
+
+    At the end of each window of steps, the thermal energy is lowered to
+    kT / (1 + kT ln(1 + delta) / (3 sigma)), where sigma is the standard
+    deviation of the energy over the window (Aarts and van Laarhoven),
+    so that the energy distributions of two successive temperatures
+    overlap. A window with a constant energy cools down by `factor`. By
+    default, the search is split into 100 windows.
+    """
+
+    def __init__(self, *args, window=None, delta=0.1, factor=0.9, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window = window or max(self.n_steps // 100, 20)
+        self.delta = delta
+        self.factor = factor
+        self._energies = []
+
+    def _cool(self, step, energy, accepted):
+        self._energies.append(energy)
+        if len(self._energies) < self.window:
+            return
+        sigma = np.std(self._energies)
+        if sigma > 0:
+            thermal = K_b * self.temperature
+            thermal /= 1 + thermal * np.log(1 + self.delta) / (3 * sigma)
+            self.temperature = thermal / K_b
+        else:
+            self.temperature *= self.factor
+        self.temperature = max(self.temperature, self.temperature_end)
+        self._energies = []
+
+
+# cooling schedules by name
+SCHEDULES = {
+    "linear": LinearSchedule,
+    "geometric": GeometricSchedule,
+    "acceptance": AcceptanceSchedule,
+    "specific-heat": SpecificHeatSchedule,
+}
@@ -0,0 +1,85 @@
+"""Immutable sequence data of a protein.
+
+The sequence of a protein never changes during a search, only the
+coordinates of its residues do. A single `Sequence` object is shared by
+every copy of a protein, so copying a lattice only copies its conformation.
+It holds the residues encoded for the energy model of the protein.
+"""
+
+import numpy as np
+
+from src.energy import HP
+
+
+class Sequence:
+    """
+    Immutable sequence shared between the copies of a protein.
+
+    Attributes
+    ----------
+    hp : str
+        Sequence of the protein, in the alphabet of its energy model.
+    length : int
+        Length of the sequence.
+    model : EnergyModel
+        Energy model of the contacts between residues.
+    codes : tuple
+        Index of each residue in the alphabet of the energy model.
+    interacting : tuple
+        Indices of the residues with non-zero contact energies.
+    h_mask : numpy.ndarray
+        Read-only boolean mask of the hydrophobic residues.
+    h_indices : tuple
+        Indices of the hydrophobic residues.
+    """
+
+    __slots__ = ("hp", "length", "model", "codes", "interacting", "h_mask", "h_indices")
+
+    def __init__(self, hp, model=None):
+        """
+        create Sequence object
+
+        Parameters
+        ----------
+        hp : str
+            sequence of the protein
+        model : EnergyModel
+            energy model of the protein, HP if None
+        """
+        model = model or HP
+        codes = model.encode(hp)
+        h_mask = np.array([r == "H" for r in hp], dtype=bool)
+        h_mask.flags.writeable = False
+
+        object.__setattr__(self, "hp", hp)
+        object.__setattr__(self, "length", len(hp))
+        object.__setattr__(self, "model", model)
+        object.__setattr__(self, "codes", codes)
+        object.__setattr__(
+            self,
+            "interacting",
+            tuple(i for i, code in enumerate(codes) if code in model.interacting),
+        )
+        object.__setattr__(self, "h_mask", h_mask)
+        object.__setattr__(self, "h_indices", tuple(np.flatnonzero(h_mask).tolist()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Sequence objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Sequence objects are immutable")
+
+    def __reduce__(self):
+        return (self.__class__, (self.hp, self.model))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self.hp
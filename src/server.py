@@ -0,0 +1,335 @@
+"""Long-lived folding server.
+
+The server keeps the interpreter, NumPy and a pool of worker processes alive,
+and accepts folding jobs over a Unix socket or a localhost TCP port.
+Messages are JSON objects, one per line.
+
+Requests sent by the client:
+
+    {"op": "submit", "args": ["-p", "HPPH", "MC", "-n", "500"], "timeout": 60}
+    {"op": "cancel", "job": 3}
+
+`args` are the same command line arguments as `fold.py`, restricted to the
+MC and REMC sub-commands and without the global options listed in
+UNSUPPORTED_OPTIONS. Events sent back by the server:
+
+    {"event": "queued", "job": 3}
+    {"event": "progress", "job": 3, "step": 120, "energy": -4}
+    {"event": "result", "job": 3, "sequence": "HPPH", "energy": -1, "conformation": [[...]]}
+    {"event": "cancelled", "job": 3}
+    {"event": "error", "job": 3, "error": "..."}
+"""
+
+# standard library
+import asyncio
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+# local
+from src.parser import parse_args
+from src.runner import (
+    read_sequence,
+    build_lattice,
+    run_search,
+    save_result,
+    split_args,
+    make_energy_model,
+    apply_profile,
+)
+
+# global options of fold.py that the jobs reject, the telemetry and the
+# statistics files and the restarts belong to a single fold.py process
+UNSUPPORTED_OPTIONS = {
+    "telemetry": "--telemetry",
+    "ensemble_stats": "--ensemble-stats",
+    "restarts": "--restarts",
+    "workers": "--workers",
+}
+
+
+def _run_job(job_id, args, progress, cancelled, progress_interval):
+    """
+    Run a folding job in a worker process.
+
+    Parameters
+    ----------
+    job_id : int
+        Identifier of the job.
+    args : dict
+        Parsed arguments of the job.
+    progress : multiprocessing.Queue
+        Queue on which progress messages are posted.
+    cancelled : dict
+        Shared mapping of the identifiers of the cancelled jobs.
+    progress_interval : float
+        Minimum time in seconds between two progress messages.
+
+    Returns
+    -------
+    dict
+        Sequence, final energy and conformation of the job.
+    """
+    # give every job its own random stream
+    np.random.seed()
+
+    options, params = split_args(args)
+    model = make_energy_model(options["energy_model"], options["energy_matrix"])
+    sequence = read_sequence(options["protein"], options["file"], model)
+    lattice = build_lattice(
+        sequence, options["initial_lattice"], options["store"], model
+    )
+    if options["subparser_name"] == "REMC":
+        apply_profile(params, options["tunable"], options["profiles"], sequence)
+    start = time.time()
+
+    last_report = time.monotonic()
+
+    def callback(step, energy):
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < progress_interval:
+            return True
+        last_report = now
+        if cancelled.get(job_id):
+            return False
+        progress.put((job_id, step, energy))
+        return True
+
+    lattice = run_search(options["subparser_name"], params, lattice, callback)
+
+    # workers write to the store concurrently, each with its own connection
+    if options["store"]:
+        metadata = {
+            "search": options["subparser_name"],
+            "params": params,
+            "initial_lattice": options["initial_lattice"],
+            "energy_model": model.name,
+            "time": time.time() - start,
+            "job": job_id,
+        }
+        save_result(
+            options["store"], options["store_size"], sequence, lattice, metadata, model
+        )
+
+    return {
+        "sequence": sequence,
+        "energy": lattice.calculate_energy(),
+        "conformation": lattice.get_conformation().tolist(),
+        "cancelled": bool(cancelled.pop(job_id, False)),
+    }
+
+
+class FoldServer:
+    """
+    Serve folding jobs from a pool of worker processes.
+
+    Attributes
+    ----------
+    n_workers : int
+        Number of worker processes.
+    timeout : float
+        Default time limit of a job in seconds, None for no limit.
+    progress_interval : float
+        Minimum time in seconds between two progress messages of a job.
+
+    Methods
+    -------
+    serve(socket_path, host, port):
+        Accept connections until the server is stopped.
+    """
+
+    def __init__(self, n_workers=None, timeout=None, progress_interval=0.5):
+        """
+        Initialize the server.
+
+        Parameters
+        ----------
+        n_workers : int
+            Number of worker processes, all the available CPUs if None.
+        timeout : float
+            Default time limit of a job in seconds, None for no limit.
+        progress_interval : float
+            Minimum time in seconds between two progress messages of a job.
+        """
+        self.n_workers = n_workers or os.cpu_count()
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self._job_ids = itertools.count(1)
+        self._jobs = {}
+
+    async def serve(self, socket_path=None, host="127.0.0.1", port=None):
+        """
+        Accept connections until the server is stopped.
+
+        Parameters
+        ----------
+        socket_path : str
+            Path of the Unix socket to listen on.
+        host : str
+            Host to listen on if no socket path is given.
+        port : int
+            Port to listen on if no socket path is given.
+        """
+        self._loop = asyncio.get_running_loop()
+        with multiprocessing.Manager() as manager:
+            self._progress = manager.Queue()
+            self._cancelled = manager.dict()
+            # the server runs threads, start the workers from a clean process
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self.n_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            reader = threading.Thread(target=self._read_progress, daemon=True)
+            reader.start()
+            try:
+                if socket_path:
+                    server = await asyncio.start_unix_server(
+                        self._handle_client, path=socket_path
+                    )
+                else:
+                    server = await asyncio.start_server(
+                        self._handle_client, host=host, port=port
+                    )
+                async with server:
+                    await server.serve_forever()
+            finally:
+                self._progress.put(None)
+                reader.join()
+                self._pool.shutdown(cancel_futures=True)
+                if socket_path:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(socket_path)
+
+    def _read_progress(self):
+        """
+        Forward the progress messages of the workers to the event loop.
+        """
+        while True:
+            item = self._progress.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch_progress, *item)
+
+    def _dispatch_progress(self, job_id, step, energy):
+        """
+        Send a progress message to the client owning the job.
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            self._send(
+                job["writer"],
+                {"event": "progress", "job": job_id, "step": step, "energy": energy},
+            )
+
+    @staticmethod
+    def _send(writer, message):
+        """
+        Send a message to a client, ignoring closed connections.
+        """
+        if not writer.is_closing():
+            writer.write((json.dumps(message) + "\n").encode())
+
+    async def _handle_client(self, reader, writer):
+        """
+        Handle the requests of a client connection.
+        """
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    self._send(writer, {"event": "error", "error": "invalid request"})
+                    continue
+
+                if op == "submit":
+                    task = asyncio.create_task(self._submit(request, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif op == "cancel":
+                    self._cancel(request.get("job"))
+                else:
+                    self._send(writer, {"event": "error", "error": f"unknown op {op}"})
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            # cancel the jobs of a client that went away
+            for job_id, job in list(self._jobs.items()):
+                if job["writer"] is writer:
+                    self._cancel(job_id)
+            writer.close()
+
+    def _cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        # queued jobs are dropped, running ones stop at their next progress check
+        self._cancelled[job_id] = True
+        job["future"].cancel()
+
+    async def _submit(self, request, writer):
+        """
+        Queue a job on the pool and send its events back to the client.
+        """
+        job_id = next(self._job_ids)
+        try:
+            with contextlib.redirect_stderr(io.StringIO()) as errors:
+                args = vars(parse_args(request.get("args", [])))
+            if args["subparser_name"] not in ("MC", "REMC"):
+                raise ValueError("the server runs MC or REMC jobs")
+            unsupported = [
+                flag for name, flag in UNSUPPORTED_OPTIONS.items() if args[name] is not None
+            ]
+            if unsupported:
+                raise ValueError(f"the server does not support {', '.join(unsupported)}")
+        except (SystemExit, ValueError) as error:
+            message = errors.getvalue().strip() or str(error)
+            self._send(writer, {"event": "error", "job": job_id, "error": message})
+            return
+
+        future = self._pool.submit(
+            _run_job,
+            job_id,
+            args,
+            self._progress,
+            self._cancelled,
+            self.progress_interval,
+        )
+        self._jobs[job_id] = {"writer": writer, "future": future}
+        self._send(writer, {"event": "queued", "job": job_id})
+
+        timeout = request.get("timeout", self.timeout)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._cancelled[job_id] = True
+            self._send(writer, {"event": "error", "job": job_id, "error": "timeout"})
+        except asyncio.CancelledError:
+            # also reached when the server shuts down, stop the running job
+            self._cancelled[job_id] = True
+            self._send(writer, {"event": "cancelled", "job": job_id})
+        except Exception as error:
+            self._send(writer, {"event": "error", "job": job_id, "error": repr(error)})
+        else:
+            if result.pop("cancelled"):
+                self._send(writer, {"event": "cancelled", "job": job_id, **result})
+            else:
+                self._send(writer, {"event": "result", "job": job_id, **result})
+        finally:
+            del self._jobs[job_id]
+            # the flag of a job that started is cleared by its worker
+            if future.cancelled():
+                self._cancelled.pop(job_id, None)
@@ -0,0 +1,270 @@
+"""Streaming statistics of the conformations sampled by the searches.
+
+The searches do not keep the conformations they sample. Instead, for each
+temperature, the statistics accumulate in fixed memory:
+
+- the number of samples in which each pair of H residues is in contact,
+  an N x N array,
+- the histogram and the first two moments of the energy,
+- the histogram and the first two moments of the radius of gyration.
+
+Within a search, a tracker follows the current conformation. It only
+updates the contacts of the residues moved by an accepted movement, and
+counts the samples of a contact lazily, when the contact breaks or the
+search ends. The radius of gyration is computed from running sums of the
+coordinates, updated from the moved residues as well.
+"""
+
+import numpy as np
+
+# number of bins of the radius of gyration histograms
+RG_BINS = 64
+
+
+class _Ensemble:
+    """
+    Accumulators of the samples at one temperature.
+    """
+
+    def __init__(self, length):
+        self.samples = 0
+        self.contact_counts = np.zeros((length, length), dtype=np.int64)
+        # energies from 0 down to -length, indexed by their opposite
+        self.energy_counts = np.zeros(length + 1, dtype=np.int64)
+        self.energy_sum = 0.0
+        self.energy_square_sum = 0.0
+        self.rg_counts = np.zeros(RG_BINS, dtype=np.int64)
+        self.rg_sum = 0.0
+        self.rg_square_sum = 0.0
+
+
+class EnsembleStatistics:
+    """
+    Accumulate contact frequencies, energy and radius of gyration
+    distributions of the sampled conformations, per temperature.
+
+    Attributes
+    ----------
+    sequence : str
+        HP sequence of the protein.
+    length : int
+        Length of the protein.
+    rg_max : float
+        Upper edge of the radius of gyration histograms, the radius of
+        gyration of a straight chain.
+
+    Methods
+    -------
+    tracker(lattice, temperature):
+        Return a tracker of the samples of a search at a temperature.
+    save(path):
+        Write the statistics in the NumPy npz format.
+    """
+
+    def __init__(self, sequence):
+        """
+        Initialize empty statistics.
+
+        Parameters
+        ----------
+        sequence : str
+            HP sequence of the protein.
+        """
+        self.sequence = sequence
+        self.length = len(sequence)
+        self.rg_max = max(np.sqrt((self.length**2 - 1) / 12), 1.0)
+        self._ensembles = {}
+
+    def tracker(self, lattice, temperature):
+        """
+        Return a tracker of the samples of a search at a temperature.
+
+        Parameters
+        ----------
+        lattice : Lattice
+            Initial lattice of the search.
+        temperature : float
+            Temperature of the search.
+
+        Returns
+        -------
+        _Tracker
+            Tracker of the current conformation of the search.
+        """
+        return _Tracker(self, self._ensemble(temperature), lattice)
+
+    def _ensemble(self, temperature):
+        """
+        Return the accumulators of a temperature, created if needed.
+        """
+        ensemble = self._ensembles.get(temperature)
+        if ensemble is None:
+            ensemble = self._ensembles[temperature] = _Ensemble(self.length)
+        return ensemble
+
+    def save(self, path):
+        """
+        Write the statistics in the NumPy npz format.
+
+        Parameters
+        ----------
+        path : str
+            Path of the npz file.
+        """
+        temperatures = sorted(self._ensembles)
+        ensembles = [self._ensembles[temperature] for temperature in temperatures]
+        samples = np.array([ensemble.samples for ensemble in ensembles], dtype=np.int64)
+        counts = np.array(
+            [ensemble.contact_counts + ensemble.contact_counts.T for ensemble in ensembles]
+        ).reshape(len(ensembles), self.length, self.length)
+        # avoid dividing by zero for temperatures without samples
+        norm = np.maximum(samples, 1)
+
+        def moments(total, square_total):
+            mean = np.array(total) / norm
+            return mean, np.array(square_total) / norm - mean**2
+
+        energy_mean, energy_var = moments(
+            [e.energy_sum for e in ensembles], [e.energy_square_sum for e in ensembles]
+        )
+        rg_mean, rg_var = moments(
+            [e.rg_sum for e in ensembles], [e.rg_square_sum for e in ensembles]
+        )
+        np.savez(
+            path,
+            sequence=self.sequence,
+            temperatures=np.array(temperatures, dtype=float),
+            samples=samples,
+            contact_counts=counts,
+            contact_frequencies=counts / norm[:, None, None],
+            energies=-np.arange(self.length + 1),
+            energy_histograms=np.array(
+                [ensemble.energy_counts for ensemble in ensembles]
+            ).reshape(len(ensembles), self.length + 1),
+            energy_mean=energy_mean,
+            energy_var=energy_var,
+            rg_edges=np.linspace(0, self.rg_max, RG_BINS + 1),
+            rg_histograms=np.array(
+                [ensemble.rg_counts for ensemble in ensembles]
+            ).reshape(len(ensembles), RG_BINS),
+            rg_mean=rg_mean,
+            rg_var=rg_var,
+        )
+
+
+class _Tracker:
+    """
+    Follow the conformation of a search and record its samples.
+    """
+
+    def __init__(self, statistics, ensemble, lattice):
+        self.statistics = statistics
+        self.ensemble = ensemble
+        self.hydrophobic = [residue == "H" for residue in statistics.sequence]
+        self.steps = 0
+
+        # sample at which each current contact started
+        self.contacts = {}
+        for residue in lattice.protein.residues:
+            for pair in self._contacts(lattice, residue.index):
+                self.contacts[pair] = 0
+
+        coords = lattice.get_conformation().astype(np.int64)
+        self.sum_i, self.sum_j = (int(total) for total in coords.sum(axis=0))
+        self.sum_squares = int((coords**2).sum())
+
+    def _contacts(self, lattice, index):
+        """
+        Return the H-H contacts of a residue, as sorted pairs of indices.
+        """
+        if not self.hydrophobic[index]:
+            return set()
+        residue = lattice.protein.residues[index]
+        return {
+            (min(index, neighbor.index), max(index, neighbor.index))
+            for neighbor in lattice.occupied_neighbors(residue.get_coords())
+            if self.hydrophobic[neighbor.index] and abs(neighbor.index - index) > 1
+        }
+
+    def move(self, old_lattice, new_lattice, moved_indices):
+        """
+        Update the conformation after an accepted movement.
+
+        Parameters
+        ----------
+        old_lattice : Lattice
+            Lattice before the movement.
+        new_lattice : Lattice
+            Lattice after the movement.
+        moved_indices : list
+            Indices of the residues moved by the movement.
+        """
+        old_pairs = set()
+        new_pairs = set()
+        for index in set(moved_indices):
+            old_pairs |= self._contacts(old_lattice, index)
+            new_pairs |= self._contacts(new_lattice, index)
+
+            old_i, old_j = old_lattice.protein.residues[index].get_coords()
+            new_i, new_j = new_lattice.protein.residues[index].get_coords()
+            self.sum_i += new_i - old_i
+            self.sum_j += new_j - old_j
+            self.sum_squares += new_i**2 + new_j**2 - old_i**2 - old_j**2
+
+        counts = self.ensemble.contact_counts
+        for pair in old_pairs - new_pairs:
+            counts[pair] += self.steps - self.contacts.pop(pair)
+        for pair in new_pairs - old_pairs:
+            self.contacts[pair] = self.steps
+
+    def record(self, energy):
+        """
+        Record the current conformation as a sample.
+
+        Parameters
+        ----------
+        energy : int
+            Energy of the current conformation.
+        """
+        ensemble = self.ensemble
+        ensemble.samples += 1
+        ensemble.energy_counts[-energy] += 1
+        ensemble.energy_sum += energy
+        ensemble.energy_square_sum += energy**2
+
+        length = self.statistics.length
+        rg_square = (
+            self.sum_squares / length
+            - (self.sum_i / length) ** 2
+            - (self.sum_j / length) ** 2
+        )
+        rg = np.sqrt(max(rg_square, 0.0))
+        ensemble.rg_counts[min(int(rg / self.statistics.rg_max * RG_BINS), RG_BINS - 1)] += 1
+        ensemble.rg_sum += rg
+        ensemble.rg_square_sum += rg_square
+        self.steps += 1
+
+    def set_temperature(self, temperature):
+        """
+        Record the next samples at another temperature.
+
+        Parameters
+        ----------
+        temperature : float
+            New temperature of the search.
+        """
+        counts = self.ensemble.contact_counts
+        for pair, start in self.contacts.items():
+            counts[pair] += self.steps - start
+        self.contacts = dict.fromkeys(self.contacts, 0)
+        self.steps = 0
+        self.ensemble = self.statistics._ensemble(temperature)
+
+    def close(self):
+        """
+        Count the samples of the contacts still formed at the end of the search.
+        """
+        counts = self.ensemble.contact_counts
+        for pair, start in self.contacts.items():
+            counts[pair] += self.steps - start
+        self.contacts = {}
@@ -0,0 +1,311 @@
+"""Persistent store of the best conformations found for each sequence.
+
+The store is an SQLite database keyed by the sequence, prefixed by the name
+of its energy model for the models other than HP. It keeps the K
+lowest-energy distinct conformations of each sequence, together with the
+metadata of the runs that found them, so that later runs can warm-start
+from them.
+
+Conformations are deduplicated by a symmetry-invariant encoding: the chain
+of relative turns (straight, left or right) between consecutive bonds,
+which does not depend on translations and rotations, taken as the smallest
+of itself and its mirror image.
+
+Each process opens its own connection. Writes are done in immediate
+transactions on a database in write-ahead logging mode, so that pool
+workers can add their results concurrently.
+"""
+
+# standard library
+import json
+import time
+import sqlite3
+
+import numpy as np
+
+# local
+from src.protein import Protein
+from src.lattice import Lattice, center_conformation
+
+from src.energy import HP
+
+# turn between two consecutive bonds, from the cross product of their directions
+TURNS = {0: "S", 1: "L", -1: "R"}
+MIRROR = str.maketrans("LR", "RL")
+
+# unit steps by heading, each one to the left of the previous one, the
+# first bond of a decoded conformation is along the second axis
+STEPS = ((0, 1), (-1, 0), (0, -1), (1, 0))
+
+
+def conformation_turns(conformations):
+    """
+    Return the turns of conformations, between their consecutive bonds.
+
+    Parameters
+    ----------
+    conformations : array-like
+        Coordinates of the residues, of shape (..., length, 2).
+
+    Returns
+    -------
+    numpy.ndarray of shape (..., length - 2) with the turn at each residue
+    but the ends, straight (0), left (1) or right (-1).
+    """
+    bonds = np.diff(np.asarray(conformations), axis=-2)
+    cross = bonds[..., :-1, 0] * bonds[..., 1:, 1] - bonds[..., :-1, 1] * bonds[..., 1:, 0]
+    return cross.astype(np.int8)
+
+
+def turns_conformations(turns):
+    """
+    Return the conformations of turns, see `conformation_turns`.
+
+    Parameters
+    ----------
+    turns : array-like
+        Turns of the chains, of shape (..., length - 2).
+
+    Returns
+    -------
+    numpy.ndarray of shape (..., length, 2) with the coordinates of the
+    residues, starting at the origin with a bond along the second axis.
+    """
+    turns = np.asarray(turns)
+    headings = np.zeros(turns.shape[:-1] + (turns.shape[-1] + 1,), dtype=np.intp)
+    headings[..., 1:] = np.cumsum(turns, axis=-1) % 4
+    coords = np.zeros(turns.shape[:-1] + (turns.shape[-1] + 2, 2), dtype=np.int32)
+    coords[..., 1:, :] = np.cumsum(np.array(STEPS)[headings], axis=-2)
+    return coords
+
+
+def encode_conformation(conformation):
+    """
+    Return the symmetry-invariant encoding of a conformation.
+
+    Parameters
+    ----------
+    conformation : array-like
+        Coordinates of the residues, of shape (length, 2).
+
+    Returns
+    -------
+    String of the relative turns of the chain, canonical under mirroring.
+    """
+    turns = "".join(TURNS[turn] for turn in conformation_turns(conformation).tolist())
+    return min(turns, turns.translate(MIRROR))
+
+
+def decode_conformation(encoding):
+    """
+    Return the coordinates of a conformation from its encoding.
+
+    Parameters
+    ----------
+    encoding : str
+        String of the relative turns of the chain.
+
+    Returns
+    -------
+    numpy.ndarray of shape (length, 2) with the coordinates of the residues,
+    starting at the origin with a bond along the second axis.
+    """
+    codes = {letter: turn for turn, letter in TURNS.items()}
+    return turns_conformations(np.array([codes[turn] for turn in encoding], dtype=np.int8))
+
+
+def _key(sequence, model):
+    """
+    Key of a sequence in the store, prefixed by its energy model if not HP.
+    """
+    if model is None or model.name == HP.name:
+        return sequence
+    return f"{model.name}:{sequence}"
+
+
+class ResultStore:
+    """
+    Keep the best distinct conformations of each sequence on disk.
+
+    Attributes
+    ----------
+    path : str
+        Path of the SQLite database.
+    top_k : int
+        Number of conformations kept for each sequence.
+
+    Methods
+    -------
+    add(sequence, conformation, energy, metadata, model):
+        Add a conformation if it is among the best of its sequence.
+    best(sequence, n, model):
+        Return the best stored conformations of a sequence.
+    load_lattices(sequence, n, model):
+        Return lattices with the best stored conformations of a sequence.
+    close():
+        Close the connection to the database.
+    """
+
+    def __init__(self, path, top_k=10):
+        """
+        Open the store, creating it if needed.
+
+        Parameters
+        ----------
+        path : str
+            Path of the SQLite database.
+        top_k : int
+            Number of conformations kept for each sequence.
+        """
+        self.path = path
+        self.top_k = top_k
+        # transactions are handled explicitly
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS conformations (
+                sequence TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                energy INTEGER NOT NULL,
+                conformation TEXT NOT NULL,
+                metadata TEXT,
+                created REAL NOT NULL,
+                PRIMARY KEY (sequence, encoding)
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS by_energy ON conformations (sequence, energy)"
+        )
+
+    def add(self, sequence, conformation, energy, metadata=None, model=None):
+        """
+        Add a conformation if it is among the best of its sequence.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence of the protein.
+        conformation : array-like
+            Coordinates of the residues, of shape (length, 2).
+        energy : int
+            Energy of the conformation.
+        metadata : dict
+            Description of the run that found the conformation.
+        model : EnergyModel
+            Energy model of the protein, HP if None.
+
+        Returns
+        -------
+        True if the conformation is kept, False if it was already stored
+        or is not among the best ones.
+        """
+        conformation = np.asarray(conformation)
+        encoding = encode_conformation(conformation)
+        normalized = conformation - conformation.min(axis=0)
+        sequence = _key(sequence, model)
+
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(
+                "INSERT OR IGNORE INTO conformations VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    sequence,
+                    encoding,
+                    float(energy) if isinstance(energy, float) else int(energy),
+                    json.dumps(normalized.tolist()),
+                    json.dumps(metadata, default=str),
+                    time.time(),
+                ),
+            )
+            inserted = cursor.rowcount == 1
+
+            # only keep the best conformations, the oldest first on ties
+            cursor.execute(
+                """
+                DELETE FROM conformations WHERE sequence = ? AND rowid NOT IN (
+                    SELECT rowid FROM conformations WHERE sequence = ?
+                    ORDER BY energy, created LIMIT ?
+                )
+                """,
+                (sequence, sequence, self.top_k),
+            )
+            cursor.execute(
+                "SELECT 1 FROM conformations WHERE sequence = ? AND encoding = ?",
+                (sequence, encoding),
+            )
+            kept = inserted and cursor.fetchone() is not None
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return kept
+
+    def best(self, sequence, n=None, model=None):
+        """
+        Return the best stored conformations of a sequence.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence of the protein.
+        n : int
+            Maximum number of conformations, all of them if None.
+        model : EnergyModel
+            Energy model of the protein, HP if None.
+
+        Returns
+        -------
+        list
+            (energy, conformation, metadata) tuples, by increasing energy.
+        """
+        rows = self._connection.execute(
+            """
+            SELECT energy, conformation, metadata FROM conformations
+            WHERE sequence = ? ORDER BY energy, created LIMIT ?
+            """,
+            (_key(sequence, model), -1 if n is None else n),
+        )
+        return [
+            (energy, np.array(json.loads(conformation), dtype=np.int32), json.loads(metadata))
+            for energy, conformation, metadata in rows
+        ]
+
+    def load_lattices(self, sequence, n=None, model=None):
+        """
+        Return lattices with the best stored conformations of a sequence.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence of the protein.
+        n : int
+            Maximum number of lattices, all of them if None.
+        model : EnergyModel
+            Energy model of the protein, HP if None.
+
+        Returns
+        -------
+        list
+            Lattices by increasing energy, empty if nothing is stored.
+        """
+        lattices = []
+        for _, conformation, _ in self.best(sequence, n, model):
+            lattice = Lattice(Protein(sequence, model))
+            lattice.set_conformation(center_conformation(conformation, lattice.size))
+            lattices.append(lattice)
+        return lattices
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
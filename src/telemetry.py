@@ -0,0 +1,226 @@
+"""Live telemetry of running searches.
+
+The searches record one entry per Monte Carlo step into a ring buffer.
+Writing is a single list assignment and an index increment, with no lock:
+the search thread is the only writer and the flushing thread only reads up
+to the last written index. A background thread drains the buffer at a fixed
+interval and writes per-replica metrics to a file, either as JSON lines
+appended at each flush or in the Prometheus text format, rewritten at each
+flush.
+"""
+
+# standard library
+import os
+import json
+import time
+import threading
+
+
+class Telemetry:
+    """
+    Collect the progress of a search and flush it to a metrics file.
+
+    Attributes
+    ----------
+    path : str
+        Path of the metrics file.
+    format : str
+        Format of the metrics file, either jsonl or prometheus.
+    interval : float
+        Time in seconds between two flushes.
+    capacity : int
+        Number of entries of the ring buffer.
+    dropped : int
+        Number of entries overwritten before being flushed.
+
+    Methods
+    -------
+    record(replica, temperature, energy, accepted):
+        Record a step of a search.
+    start():
+        Start the flushing thread.
+    stop():
+        Stop the flushing thread and flush the remaining entries.
+    flush():
+        Drain the ring buffer and write the metrics file.
+    """
+
+    def __init__(self, path, format="jsonl", interval=1.0, capacity=65536):
+        """
+        Initialize the telemetry.
+
+        Parameters
+        ----------
+        path : str
+            Path of the metrics file.
+        format : str
+            Format of the metrics file, either jsonl or prometheus.
+        interval : float
+            Time in seconds between two flushes.
+        capacity : int
+            Number of entries of the ring buffer.
+        """
+        if format not in ("jsonl", "prometheus"):
+            raise ValueError(f"unknown telemetry format {format}")
+        self.path = path
+        self.format = format
+        self.interval = interval
+        self.capacity = capacity
+        self.dropped = 0
+
+        self._buffer = [None] * capacity
+        # number of entries written, only updated by the search thread
+        self._head = 0
+        # number of entries read, only updated by the flushing thread
+        self._tail = 0
+
+        self._replicas = {}
+        self._start_time = time.monotonic()
+        self._last_flush = self._start_time
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, replica, temperature, energy, accepted):
+        """
+        Record a step of a search.
+
+        Parameters
+        ----------
+        replica : int
+            Index of the replica performing the step.
+        temperature : float
+            Temperature of the replica.
+        energy : int
+            Energy of the replica after the step.
+        accepted : bool
+            Whether the movement of the step was accepted.
+        """
+        head = self._head
+        self._buffer[head % self.capacity] = (replica, temperature, energy, accepted)
+        self._head = head + 1
+
+    def start(self):
+        """
+        Start the flushing thread.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the flushing thread and flush the remaining entries.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def _drain(self):
+        """
+        Return the entries written since the last drain.
+        """
+        head = self._head
+        tail = self._tail
+        if head - tail > self.capacity:
+            self.dropped += head - tail - self.capacity
+            tail = head - self.capacity
+        entries = [self._buffer[i % self.capacity] for i in range(tail, head)]
+
+        # entries overwritten while being copied are dropped
+        overwritten = self._head - self.capacity - tail
+        if overwritten > 0:
+            self.dropped += overwritten
+            entries = entries[overwritten:]
+        self._tail = head
+        return entries
+
+    def flush(self):
+        """
+        Drain the ring buffer and write the metrics file.
+        """
+        now = time.monotonic()
+        elapsed = now - self._last_flush
+        self._last_flush = now
+
+        counts = {}
+        for replica, temperature, energy, accepted in self._drain():
+            state = self._replicas.setdefault(
+                replica, {"steps": 0, "accepted": 0, "best": energy}
+            )
+            state["temperature"] = temperature
+            state["energy"] = energy
+            state["best"] = min(state["best"], energy)
+            state["steps"] += 1
+            state["accepted"] += accepted
+            count = counts.setdefault(replica, [0, 0])
+            count[0] += 1
+            count[1] += accepted
+
+        metrics = []
+        for replica, state in sorted(self._replicas.items()):
+            steps, accepted = counts.get(replica, (0, 0))
+            metrics.append(
+                {
+                    "time": round(now - self._start_time, 3),
+                    "replica": replica,
+                    "temperature": state["temperature"],
+                    "energy": state["energy"],
+                    "best": state["best"],
+                    "acceptance_rate": accepted / steps if steps else None,
+                    "steps_per_second": steps / elapsed if elapsed > 0 else None,
+                    "steps": state["steps"],
+                    "dropped": self.dropped,
+                }
+            )
+
+        if self.format == "jsonl":
+            self._write_jsonl(metrics)
+        else:
+            self._write_prometheus(metrics)
+
+    def _write_jsonl(self, metrics):
+        with open(self.path, "a") as handle:
+            for metric in metrics:
+                handle.write(json.dumps(metric) + "\n")
+
+    def _write_prometheus(self, metrics):
+        gauges = [
+            ("fold_energy", "energy", "Current energy of the replica."),
+            ("fold_best_energy", "best", "Lowest energy reached by the replica."),
+            ("fold_temperature", "temperature", "Temperature of the replica."),
+            ("fold_acceptance_rate", "acceptance_rate",
+             "Acceptance rate of the replica since the last flush."),
+            ("fold_steps_per_second", "steps_per_second",
+             "Steps per second of the replica since the last flush."),
+        ]
+        lines = []
+        for name, key, description in gauges:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            for metric in metrics:
+                if metric[key] is not None:
+                    lines.append(f'{name}{{replica="{metric["replica"]}"}} {metric[key]}')
+        lines.append("# HELP fold_steps_total Steps performed by the replica.")
+        lines.append("# TYPE fold_steps_total counter")
+        for metric in metrics:
+            lines.append(f'fold_steps_total{{replica="{metric["replica"]}"}} {metric["steps"]}')
+        lines.append("# HELP fold_dropped_total Telemetry entries dropped.")
+        lines.append("# TYPE fold_dropped_total counter")
+        lines.append(f"fold_dropped_total {self.dropped}")
+
+        # replace the file at once so that scrapers never read a partial file
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as handle:
+            handle.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
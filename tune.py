@@ -0,0 +1,75 @@
+import sys
+import argparse
+
+from src.runner import read_sequence
+from src.parser import energy_cutoff
+from src.exact import MAX_EXACT_LENGTH, energy_cutoff as exact_energy_cutoff
+from src.autotune import DEFAULT_PROFILES, successive_halving, save_profile
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Tune the REMC parameters of a sequence length by successive halving"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-p", "--protein", help="input protein sequence")
+    group.add_argument("-f", "--file", help="input file containing the protein sequence")
+    parser.add_argument("-e", "--energy-cutoff", type=energy_cutoff, default="auto",
+                        help="target energy, auto to compute it with the exact solver")
+    parser.add_argument("-c", "--n-configs", type=int, default=16,
+                        help="number of configurations drawn from the grid")
+    parser.add_argument("-r", "--n-runs", type=int, default=4,
+                        help="number of seeded runs of each configuration per round")
+    parser.add_argument("-b", "--budget", type=float, default=1.0,
+                        help="CPU time budget in seconds of each run of the first round, doubled at each round")
+    parser.add_argument("-w", "--n-workers", type=int, default=None,
+                        help="number of worker processes, all the CPUs by default")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the configurations and of the first run")
+    parser.add_argument("-o", "--profiles", default=DEFAULT_PROFILES,
+                        help="JSON file of the tuned profiles, updated with the profile of the sequence length")
+    return parser.parse_args(args)
+
+
+def main(args):
+    args = parse_args(args)
+    sequence = read_sequence(args.protein, args.file)
+    target = args.energy_cutoff
+    if target == "auto":
+        target = exact_energy_cutoff(sequence)
+        if target is None:
+            sys.exit(
+                f"tune.py: error: the exact solver is limited to {MAX_EXACT_LENGTH} "
+                "residues, give the target energy with -e"
+            )
+        print(f"Target set to the ground-state energy, {target}")
+
+    def progress(budget, ranking):
+        print(f"Round of {len(ranking)} configurations, {budget:g} s CPU per run")
+        for config, expected, success, lowest in ranking:
+            values = ", ".join(f"{name} {value}" for name, value in config.items())
+            print(
+                f"  {values}: expected time {expected:.2f} s, "
+                f"success rate {success:.2f}, mean lowest energy {lowest:.2f}"
+            )
+
+    config, expected = successive_halving(
+        sequence,
+        target,
+        args.n_configs,
+        args.n_runs,
+        args.budget,
+        args.n_workers,
+        args.seed,
+        progress,
+    )
+    bucket = save_profile(args.profiles, sequence, config, expected, target)
+    print(
+        f"Profile of the lengths {bucket} written to {args.profiles}: "
+        + ", ".join(f"{name} {value}" for name, value in config.items())
+    )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args)